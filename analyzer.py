@@ -0,0 +1,67 @@
+import collections
+
+import conjugator
+import lexicon
+
+
+Analysis = collections.namedtuple('Analysis', ('lemma', 'form'))
+
+
+def get_form_features(form_id):
+    """
+    :return: parts of a form id, e.g. ('indicative', 'past', 'formal', 'polite')
+    """
+    return tuple(form_id.split('.'))
+
+
+class ReverseIndex:
+    """
+    Inverted index from conjugated forms to (lemma, form id), filled from conjugator.conjugate_all.
+    Lookup is a single hash of the surface form, so it does not depend on the number of lemmas.
+    Lookups may run in several threads, adds may not run alongside other adds or lookups
+    """
+    def __init__(self, lemmas=()):
+        """
+        :param lemmas: iterable of (word, is_verb, irregular) as returned by lexicon.get_lemmas
+        """
+        self._index = {}
+        self._lemmas = set()
+        for word, is_verb, irregular in lemmas:
+            self.add(word, is_verb, irregular)
+
+    @classmethod
+    def from_lexicon(cls):
+        return cls(lexicon.get_lemmas())
+
+    def add(self, word, is_verb=True, irregular=None):
+        """
+        Index all forms of a word. Adding the same word again does nothing
+        :return: number of forms added
+        """
+        analysis = conjugator.analyze(word, irregular)
+        key = (word, is_verb, analysis.irregular)
+        if key in self._lemmas:
+            return 0
+        self._lemmas.add(key)
+        index = self._index
+        forms = conjugator.conjugate_all(analysis, is_verb)
+        for form_id, surface in forms.items():
+            entry = Analysis(word, form_id)
+            analyses = index.get(surface)
+            if analyses is None:
+                index[surface] = (entry,)
+            elif entry not in analyses:
+                index[surface] = analyses + (entry,)
+        return len(forms)
+
+    def analyze(self, surface):
+        """
+        :return: tuple of all Analysis of a conjugated form, empty if unknown
+        """
+        return self._index.get(surface, ())
+
+    def __contains__(self, surface):
+        return surface in self._index
+
+    def __len__(self):
+        return len(self._index)
@@ -0,0 +1,156 @@
+import collections
+import marshal
+import unicodedata
+
+import conjugator
+import jamo
+from analyzer import Analysis
+
+
+Completion = collections.namedtuple('Completion', ('surface', 'analyses'))
+
+format_version = 1
+
+# keyboards type compatibility jamo (U+3131..), the trie is keyed by conjoining jamo (U+1100..)
+compatibility_to_jamo = jamo.compatibility_to_jamo
+
+# a final consonant typed last may still become the initial of the next syllable, 갓 -> 가서, 앉 -> 안자
+_leading_by_name = {unicodedata.name(letter).split()[-1]: letter for letter in jamo.leading_jamo}
+trailing_to_leading = {letter: ('', _leading_by_name[unicodedata.name(letter).split()[-1]])
+                       for letter in jamo.trailing_jamo[1:]
+                       if unicodedata.name(letter).split()[-1] in _leading_by_name}
+trailing_to_leading.update({'ᆪ': ('ᆨ', 'ᄉ'), 'ᆬ': ('ᆫ', 'ᄌ'), 'ᆭ': ('ᆫ', 'ᄒ'), 'ᆰ': ('ᆯ', 'ᄀ'),
+                            'ᆱ': ('ᆯ', 'ᄆ'), 'ᆲ': ('ᆯ', 'ᄇ'), 'ᆳ': ('ᆯ', 'ᄉ'), 'ᆴ': ('ᆯ', 'ᄐ'),
+                            'ᆵ': ('ᆯ', 'ᄑ'), 'ᆶ': ('ᆯ', 'ᄒ'), 'ᆹ': ('ᆸ', 'ᄉ')})
+
+
+def to_jamo(text):
+    """
+    Conjoining jamo sequence of a text, syllables are decomposed and compatibility jamo mapped,
+    other characters are kept
+    """
+    letters = []
+    for char in text:
+        if jamo.SBase <= ord(char) < jamo.SBase + jamo.SCount:
+            letters.extend(jamo.decompose(char))
+        else:
+            letters.append(compatibility_to_jamo.get(char, char))
+    return ''.join(letters)
+
+
+class AutocompleteTrie:
+    """
+    Trie of conjugated forms keyed by jamo, so a partially typed syllable matches (머 -> 먹었어요).
+    Every node keeps its best k surfaces, a lookup walks the prefix and returns them without visiting the subtree.
+    Surfaces rank by weight, then length, then insertion order. Lookups may run in several threads, adds may not
+    run alongside other adds or lookups
+    """
+    def __init__(self, k=10):
+        self.k = k
+        self._children = [{}]   # node -> {jamo: child node}
+        self._top = [()]        # node -> surface indexes, best first
+        self._surfaces = []     # surface index -> (surface, ((lemma, form id), ...))
+        self._weights = []
+        self._surface_index = {}
+
+    @classmethod
+    def from_lemmas(cls, lemmas, k=10):
+        """
+        :param lemmas: iterable of (word, is_verb, irregular), e.g. lexicon.get_lemmas(), optionally with a weight
+        """
+        trie = cls(k)
+        for lemma in lemmas:
+            word, is_verb, irregular = lemma[:3]
+            weight = lemma[3] if len(lemma) > 3 else 0
+            try:
+                forms = conjugator.conjugate_all(word, is_verb, irregular)
+            except RuntimeError:
+                continue
+            for form_id, surface in forms.items():
+                trie.add(surface, word, form_id, weight)
+        return trie
+
+    def _rank(self, index):
+        return -self._weights[index], len(self._surfaces[index][0]), index
+
+    def add(self, surface, lemma, form_id, weight=0):
+        """
+        Forms with the same surface share one completion listing all their analyses, ranked by the highest weight
+        """
+        index = self._surface_index.get(surface)
+        if index is None:
+            index = len(self._surfaces)
+            self._surface_index[surface] = index
+            self._surfaces.append((surface, ((lemma, form_id),)))
+            self._weights.append(weight)
+        else:
+            surface, analyses = self._surfaces[index]
+            if (lemma, form_id) not in analyses:
+                self._surfaces[index] = (surface, analyses + ((lemma, form_id),))
+            if weight <= self._weights[index]:
+                return
+            self._weights[index] = weight
+        rank = self._rank(index)
+        node = 0
+        self._insert_top(node, index, rank)
+        for letter in to_jamo(surface):
+            child = self._children[node].get(letter)
+            if child is None:
+                child = len(self._children)
+                self._children[node][letter] = child
+                self._children.append({})
+                self._top.append(())
+            node = child
+            self._insert_top(node, index, rank)
+
+    def _insert_top(self, node, index, rank):
+        top = tuple(i for i in self._top[node] if i != index)
+        if len(top) >= self.k and rank >= self._rank(top[-1]):
+            return
+        position = len(top)
+        while position and rank < self._rank(top[position - 1]):
+            position -= 1
+        self._top[node] = (top[:position] + (index,) + top[position:])[:self.k]
+
+    def _find(self, letters):
+        node = 0
+        children = self._children
+        for letter in letters:
+            node = children[node].get(letter)
+            if node is None:
+                return None
+        return node
+
+    def complete(self, prefix, k=None):
+        """
+        :return: list of at most k Completion (the trie's k by default), analyses are analyzer.Analysis tuples
+        """
+        k = self.k if k is None else min(k, self.k)
+        letters = to_jamo(prefix)
+        node = self._find(letters)
+        candidates = self._top[node] if node is not None else ()
+        split = trailing_to_leading.get(letters[-1:])
+        if split is not None:
+            node = self._find(letters[:-1] + split[0] + split[1])
+            if node is not None:
+                candidates = sorted(set(candidates + self._top[node]), key=self._rank)
+        return [Completion(surface, tuple(Analysis(lemma, form_id) for lemma, form_id in analyses))
+                for surface, analyses in map(self._surfaces.__getitem__, candidates[:k])]
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            marshal.dump((format_version, self.k, self._children, self._top, self._surfaces, self._weights), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = marshal.load(f)
+        if data[0] != format_version:
+            raise RuntimeError(f'{path} has unsupported format version {data[0]}')
+        trie = cls(data[1])
+        trie._children, trie._top, trie._surfaces, trie._weights = data[2:]
+        trie._surface_index = {surface: i for i, (surface, _) in enumerate(trie._surfaces)}
+        return trie
@@ -0,0 +1,354 @@
+import concurrent.futures
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import conjugator
+import jamo
+import lexicon
+import stem2
+import stem3
+
+
+def _compile_rules(is_verb):
+    return {form_id: ((plan.stem, None if plan.merge is None else plan.merge.rule), plan.suffix)
+            for form_id, plan in conjugator._plans[is_verb].items()}
+
+
+# Every form is a stem rule applied to the last syllable(s) of stem1 followed by a fixed suffix. The rules are
+# taken from the compiled plans on first use: (stem, conjugator.MergeRule of the plan's merge or None)
+# is_verb -> form id -> (rule, suffix)
+rules_by_verb = conjugator._LazyTable(_compile_rules)
+
+
+def _vowel_index(vowel):
+    return ord(vowel) - jamo.VBase
+
+
+def _final_index(final):
+    return ord(final) - jamo.TBase
+
+
+V_A, V_AE, V_EO, V_O, V_WA, V_U, V_WO, V_EU, V_I, V_YEO = map(_vowel_index, 'ᅡᅢᅥᅩᅪᅮᅯᅳᅵᅧ')
+T_T, T_L, T_P, T_S, T_H, T_M, T_SS, T_LM = map(_final_index, (stem2.final_t, stem2.final_l, stem2.final_p,
+                                                             stem2.final_s, stem2.final_h, conjugator.final_m,
+                                                             conjugator.final_ss, 'ᆱ'))
+L_K, L_T = ord('ᄀ') - jamo.LBase, ord('ᄃ') - jamo.LBase
+
+CLASS_NONE, CLASS_HA, CLASS_EU, CLASS_LEU, CLASS_T, CLASS_L, CLASS_P, CLASS_S, CLASS_H, CLASS_INVALID = range(10)
+
+
+class _Syllables:
+    """
+    Codepoint arrays of the last two syllables of stem1 for a batch of words, prev is 0 for one syllable stems
+    """
+    def __init__(self, last, prev, irregular):
+        self.last = last
+        self.prev = prev
+        self.has_prev = prev != 0
+        self.irregular = np.asarray(irregular, dtype=bool)
+        self.L, self.V, self.T = self.split(self.last)
+        self.pL, self.pV, self.pT = self.split(np.where(self.has_prev, self.prev, jamo.SBase))
+        self.bright = (self.V == V_A) | (self.V == V_O)
+        self.eo_a = np.where(self.bright, ord('아'), ord('어'))
+        self.irregular_class = self.classify()
+
+    @staticmethod
+    def split(codes):
+        index = codes - jamo.SBase
+        return index // jamo.NCount, (index % jamo.NCount) // jamo.TCount, index % jamo.TCount
+
+    @staticmethod
+    def compose(L, V, T):
+        return jamo.SBase + (L * jamo.VCount + V) * jamo.TCount + T
+
+    def classify(self):
+        """
+        Same classes as stem2.get_irregular_class
+        """
+        T, irregular = self.T, self.irregular
+        open_eu = (T == 0) & (self.V == V_EU)
+        result = np.where(open_eu, CLASS_EU, np.where(irregular, CLASS_INVALID, CLASS_NONE))
+        for final, irregular_class in ((T_T, CLASS_T), (T_L, CLASS_L), (T_P, CLASS_P), (T_S, CLASS_S),
+                                       (T_H, CLASS_H)):
+            result[irregular & (T == final)] = irregular_class
+        result[irregular & (self.last == ord('르'))] = CLASS_LEU
+        result[self.last == ord('하')] = CLASS_HA
+        return result
+
+    def codes(self):
+        """
+        Columns of codepoints replacing the last two syllables of stem1, 0 for no character
+        """
+        return np.stack([self.prev, self.last, np.zeros_like(self.last), np.zeros_like(self.last)], axis=1)
+
+    def stem2(self):
+        codes = self.codes()
+        error = np.zeros(len(self.last), dtype=bool)
+        L, V, T, cls = self.L, self.V, self.T, self.irregular_class
+
+        closed = (T != 0) & ((cls == CLASS_NONE) | (cls == CLASS_L))
+        codes[closed, 2] = self.eo_a[closed]
+        for vowel, vowel_to in ((V_O, V_WA), (V_U, V_WO), (V_I, V_YEO)):
+            m = (cls == CLASS_NONE) & (T == 0) & (V == vowel)
+            codes[m, 1] = self.compose(L[m], vowel_to, 0)
+
+        m = cls == CLASS_EU
+        eu_vowel = np.where(self.has_prev & (self.pV == V_A), V_A, V_EO)
+        codes[m, 1] = np.where(self.last[m] == ord('쓰'), ord('써'), self.compose(L[m], eu_vowel[m], 0))
+
+        m = cls == CLASS_LEU
+        error |= m & (~self.has_prev | (self.pT != 0))
+        codes[m, 0] = self.compose(self.pL[m], self.pV[m], T_L)
+        p_bright = (self.pV[m] == V_A) | (self.pV[m] == V_O)
+        codes[m, 1] = np.where(p_bright, ord('라'), ord('러'))
+
+        m = cls == CLASS_T
+        codes[m, 1] = self.compose(L[m], V[m], T_L)
+        codes[m, 2] = self.eo_a[m]
+
+        m = cls == CLASS_P
+        codes[m, 1] = self.compose(L[m], V[m], 0)
+        wa = self.bright & ~self.has_prev & ((L == L_K) | (L == L_T))
+        codes[m, 2] = np.where(wa[m], ord('와'), ord('워'))
+
+        m = cls == CLASS_S
+        codes[m, 1] = self.compose(L[m], V[m], 0)
+        codes[m, 2] = self.eo_a[m]
+
+        m = cls == CLASS_H
+        codes[m, 1] = self.compose(L[m], V_AE, 0)
+
+        m = cls == CLASS_HA
+        codes[m, 1] = ord('해')
+
+        error |= cls == CLASS_INVALID
+        return codes, error
+
+    def past(self):
+        codes, error = self.stem2()
+        has_tail = codes[:, 2] != 0
+        codes[has_tail, 2] += T_SS
+        codes[~has_tail, 1] += T_SS
+        return codes, error
+
+    def stem3(self):
+        codes = self.codes()
+        L, V, T, irregular = self.L, self.V, self.T, self.irregular
+        codes[~irregular & (T != 0), 2] = ord(stem3.stem3_final)
+        error = irregular & ~np.isin(T, (T_S, T_T, T_P, T_L))
+        for final, final_to, tail in ((T_S, 0, ord(stem3.stem3_final)), (T_T, T_L, ord(stem3.stem3_final)),
+                                      (T_P, 0, ord('우')), (T_L, 0, 0)):
+            m = irregular & (T == final)
+            codes[m, 1] = self.compose(L[m], V[m], final_to)
+            codes[m, 2] = tail
+        return codes, error
+
+    def merge_final(self, final, connector):
+        """
+        Same as conjugator.merge_final: open and ㄹ syllables take the final, ㄹ and ㅁ give ㄻ, others are followed
+        by the connector carrying the final: 갑니다, 삶, 먹습니다
+        """
+        codes = self.codes()
+        T, final_index = self.T, _final_index(final)
+        for merged, final_to in ((T == 0, final_index), (T == T_L, T_LM if final_index == T_M else final_index)):
+            codes[merged, 1] = self.compose(self.L[merged], self.V[merged], final_to)
+        connector = jamo.decompose(connector)
+        codes[(T != 0) & (T != T_L), 2] = ord(jamo.compose(connector[0], connector[1], final))
+        return codes, None
+
+    def drop_l(self):
+        codes = self.codes()
+        m = self.T == T_L
+        codes[m, 1] = self.compose(self.L[m], self.V[m], 0)
+        return codes, None
+
+    def determiner(self, final, connector):
+        """
+        Same as conjugator.get_past_and_future_determiner
+        """
+        connector = jamo.decompose(connector)
+        regular_ending = jamo.compose(connector[0], connector[1], final)
+        p_irregular_ending = jamo.compose('ᄋ', 'ᅮ', final)
+        ending_final = _final_index(final)
+        codes = self.codes()
+        L, V, T, irregular = self.L, self.V, self.T, self.irregular
+        done = np.zeros(len(T), dtype=bool)
+        for final, final_to, ending in ((T_S, 0, regular_ending), (T_T, T_L, regular_ending),
+                                        (T_P, 0, p_irregular_ending)):
+            m = irregular & (T == final)
+            codes[m, 1] = self.compose(L[m], V[m], final_to)
+            codes[m, 2] = ord(ending)
+            done |= m
+        m = ~done & ((T == 0) | (T == T_L) | (T == T_H))
+        codes[m, 1] = self.compose(L[m], V[m], ending_final)
+        codes[~done & ~m, 2] = ord(regular_ending)
+        return codes, None
+
+    def stem1(self):
+        return self.codes(), None
+
+    def apply(self, rule):
+        """
+        :return: codes and error of a rule of rules_by_verb, None for a rule without an array version
+        """
+        stem, merge = rule
+        if merge is None:
+            method = {'stem1': self.stem1, 'stem2': self.stem2, 'stem3': self.stem3, 'past': self.past}.get(stem)
+            return None if method is None else method()
+        if stem == 'honorific' and merge.kind == 'drop_si':
+            return self.stem3()
+        if stem != 'stem1':
+            return None
+        if merge.kind == 'drop_l':
+            return self.drop_l()
+        elif merge.kind == 'merge_final':
+            return self.merge_final(merge.final, merge.connector)
+        elif merge.kind == 'determiner':
+            return self.determiner(merge.final, merge.connector)
+        return None
+
+
+def _render(codes):
+    """
+    Strings from columns of replacement codepoints
+    """
+    # shift out the empty first column of one syllable stems so that only trailing columns are empty
+    no_prev = codes[:, 0] == 0
+    codes[no_prev, :-1] = codes[no_prev, 1:]
+    codes[no_prev, -1] = 0
+    return codes.astype(np.uint32).view(f'<U{codes.shape[1]}').ravel().tolist()
+
+
+def _is_syllable(codes):
+    return (codes >= jamo.SBase) & (codes < jamo.SBase + jamo.SCount)
+
+
+def _last_codes(words):
+    """
+    Codepoints of the last three characters of every word (0 if shorter) and whether the kernel can handle it:
+    a word ending with 다 after one or two syllables
+    """
+    matrix = np.array(words, dtype=str)
+    width = max(matrix.dtype.itemsize // 4, 3)
+    codes = np.zeros((len(words), width), dtype=np.int64)
+    codes[:, :matrix.dtype.itemsize // 4] = matrix.view(np.uint32).reshape(len(words), -1)
+    lengths = np.count_nonzero(codes, axis=1)
+    rows = np.arange(len(words))
+    ending, last, prev = (np.where(lengths >= offset, codes[rows, np.maximum(lengths - offset, 0)], 0)
+                          for offset in (1, 2, 3))
+    valid = (lengths >= 2) & (ending == ord('다')) & _is_syllable(last) & ((lengths == 2) | _is_syllable(prev))
+    return last, prev, valid
+
+
+def _is_irregular(word):
+    try:
+        return lexicon.is_irregular(word)
+    except RuntimeError:
+        return False
+
+
+def _conjugate_scalar(word, form, is_verb, irregular):
+    try:
+        return conjugator.conjugate_all(word, is_verb, irregular).get(form)
+    except RuntimeError:
+        return None
+
+
+def conjugate_batch(words, form, is_verb=True, irregular=None):
+    """
+    One form of many words. Stem rules run as NumPy array operations over the last syllables of all words,
+    strings are built only at the end. Without NumPy every word is conjugated with conjugator.conjugate_all
+    :param words: dictionary forms
+    :param form: form id, see conjugator.FORM_IDS
+    :param is_verb: picks the rules of verbs or adjectives, they differ in indicative.non_past.formal.non_polite
+    :param irregular: sequence of flags, looked up in the lexicon if omitted or None
+    :return: list of forms, None for words the rules cannot conjugate
+    :raise ValueError: irregular and words differ in length
+    """
+    if form not in rules_by_verb[True]:
+        raise RuntimeError(f'{form} not implemented')
+    words = list(words)
+    if irregular is None:
+        irregular = [None] * len(words)
+    elif len(irregular) != len(words):
+        raise ValueError(f'{len(irregular)} irregular flags for {len(words)} words')
+    irregular = [_is_irregular(word) if flag is None else flag for word, flag in zip(words, irregular)]
+    rule, suffix = rules_by_verb[bool(is_verb)][form]
+    applied = None
+    if np is not None and words:
+        last, prev, valid = _last_codes(words)
+        applied = _Syllables(last, prev, irregular).apply(rule)
+    if applied is None:
+        return [_conjugate_scalar(word, form, is_verb, irr) for word, irr in zip(words, irregular)]
+
+    codes, error = applied
+    endings = _render(codes)
+    result = [word[:-3] + ending + suffix for word, ending in zip(words, endings)]
+
+    if rule[0] == 'honorific':
+        error = error.copy()
+        for i in np.flatnonzero(np.isin(np.array(words, dtype=str), list(stem3.honorific_versions))):
+            result[i] = stem3.honorific_versions[words[i]][:-1] + suffix
+            error[i] = False
+    if error is not None:
+        for i in np.flatnonzero(error):
+            result[i] = None
+    for i in np.flatnonzero(~valid):
+        result[i] = _conjugate_scalar(words[i], form, is_verb, irregular[i])
+    return result
+
+
+def _map_chunks(function, chunks, threads, executor):
+    if executor is None:
+        with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+            return _map_chunks(function, chunks, threads, pool)
+    return [item for result in executor.map(function, chunks) for item in result]
+
+
+def conjugate_batch_threaded(words, form, is_verb=True, irregular=None, threads=None, chunk_size=1024,
+                             executor=None):
+    """
+    conjugate_batch of chunks of words on a thread pool, forms in word order. With the GIL, chunks run in
+    parallel only inside NumPy operations, free-threaded CPython runs them in parallel throughout
+    :param threads: pool size, ThreadPoolExecutor's default if omitted, ignored if executor is given
+    :param executor: concurrent.futures.Executor reused across calls
+    """
+    if form not in rules_by_verb[True]:
+        raise RuntimeError(f'{form} not implemented')
+    words = list(words)
+    flags = list(irregular) if irregular is not None else [None] * len(words)
+    if len(flags) != len(words):
+        raise ValueError(f'{len(flags)} irregular flags for {len(words)} words')
+    chunks = [(words[i:i + chunk_size], flags[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
+
+    def run(chunk):
+        chunk_words, chunk_flags = chunk
+        if irregular is None:
+            chunk_flags = None
+        return conjugate_batch(chunk_words, form, is_verb, chunk_flags)
+
+    return _map_chunks(run, chunks, threads, executor)
+
+
+def _conjugate_all_or_none(lemmas):
+    paradigms = []
+    for word, is_verb, irregular in lemmas:
+        try:
+            paradigms.append(conjugator.conjugate_all(word, is_verb, irregular))
+        except RuntimeError:
+            paradigms.append(None)
+    return paradigms
+
+
+def conjugate_all_threaded(lemmas, threads=None, chunk_size=256, executor=None):
+    """
+    conjugator.conjugate_all of chunks of lemmas on a thread pool
+    :param lemmas: iterable of (word, is_verb, irregular)
+    :return: list of dicts form id -> form in lemma order, None for lemmas the rules cannot conjugate
+    """
+    lemmas = list(lemmas)
+    chunks = [lemmas[i:i + chunk_size] for i in range(0, len(lemmas), chunk_size)]
+    return _map_chunks(_conjugate_all_or_none, chunks, threads, executor)
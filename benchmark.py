@@ -0,0 +1,552 @@
+# -*- encoding: utf-8 -*-
+
+import argparse
+import concurrent.futures
+import json
+import os
+import pickle
+import platform
+import random
+import subprocess
+import sys
+import sysconfig
+import time
+import timeit
+import tracemalloc
+
+import analyzer
+import batch
+import cache
+import conjugator
+import fuzzy
+import jamo
+import lexicon
+import paradigm
+import stem2
+import stem3
+from conjugator import SentenceFinalForm, ConnectiveForm, DeterminerForm, NounForm
+
+
+def report(name, seconds, number):
+    print(f'{name:<40} {seconds / number * 1e9:10.1f} ns/op')
+
+
+def bench_jamo(number=200000):
+    syllables = '항가있닭넓짧먹걷돕낫노랗르'
+    letters = [jamo.decompose(s) for s in syllables]
+    triples = [(x[0], x[1], x[2] if len(x) == 3 else None) for x in letters]
+    number = number // len(syllables) * len(syllables)
+    loops = number // len(syllables)
+
+    def run_decompose(func):
+        return lambda: [func(s) for s in syllables]
+
+    def run_compose(func):
+        return lambda: [func(L, V, T) for L, V, T in triples]
+
+    for name, func in (('decompose (arithmetic)', jamo._decompose_arithmetic),
+                       ('decompose (table)', jamo.decompose)):
+        report(name, timeit.timeit(run_decompose(func), number=loops), number)
+    for name, func in (('compose (arithmetic)', jamo._compose_arithmetic),
+                       ('compose (table)', jamo.compose)):
+        report(name, timeit.timeit(run_compose(func), number=loops), number)
+
+
+paradigm_words = (('가다', True, False), ('먹다', True, False), ('걷다', True, True), ('돕다', True, True),
+                  ('모르다', True, True), ('살다', True, True), ('짓다', True, True), ('많다', False, False),
+                  ('고맙다', False, True), ('노랗다', False, True), ('쓰다', True, False), ('공부하다', True, False))
+
+
+def per_form_paradigm(word, is_verb, irregular):
+    """
+    Same forms as conjugator.conjugate_all, one public API call per form
+    """
+    def call(func, *args):
+        try:
+            return func(*args)
+        except RuntimeError:
+            return None
+
+    forms = []
+    for honorific in (False, True):
+        w = call(lambda: stem3.get_honorific_stem(word, irregular) + '다') if honorific else word
+        irr = False if honorific else irregular
+        if w is None:
+            continue
+        for tense in (conjugator.TENSE_NON_PAST, conjugator.TENSE_PAST):
+            for formal, polite in conjugator.styles:
+                forms.append(call(SentenceFinalForm.indicative, w, is_verb, irr, tense, formal, polite))
+                forms.append(call(SentenceFinalForm.interrogative, w, irr, tense, formal, polite))
+        for formal, polite in conjugator.styles:
+            forms.append(call(SentenceFinalForm.imperative, w, formal, polite))
+            forms.append(call(SentenceFinalForm.hortative, w, formal, polite))
+            forms.append(call(SentenceFinalForm.assertive, w, formal, polite))
+    forms.append(call(ConnectiveForm.reason, word, irregular))
+    forms.append(call(ConnectiveForm.contrast, word))
+    forms.append(call(ConnectiveForm.conjunction, word))
+    forms.append(call(ConnectiveForm.condition, word, irregular))
+    forms.append(call(ConnectiveForm.motive, word, irregular))
+    for tense in (DeterminerForm.PAST, DeterminerForm.PRESENT, DeterminerForm.FUTURE):
+        forms.append(call(DeterminerForm.get, word, tense, irregular))
+    for tense in (NounForm.PRESENT, NounForm.PAST):
+        forms.append(call(NounForm.get, word, tense, irregular))
+    return forms
+
+
+def _cold_paradigm(word, is_verb, irregular):
+    conjugator.clear_caches()
+    return conjugator.conjugate_all(word, is_verb, irregular)
+
+
+def bench_paradigm(number=200, repeat=5):
+    """
+    Per-form loop against conjugate_all, run alternately repeat times so all see the same machine load.
+    conjugate_all is timed as in steady use, every stem tail seen before, and cold, with its memos cleared
+    before each word. Prints the best time of each and the range of the per-run speedups
+    """
+    def run(func):
+        return lambda: [func(word, is_verb, irregular) for word, is_verb, irregular in paradigm_words]
+
+    cases = (('paradigm (per-form loop)', per_form_paradigm), ('paradigm (conjugate_all)', conjugator.conjugate_all),
+             ('paradigm (conjugate_all, cold)', _cold_paradigm))
+    runs = {name: [] for name, _ in cases}
+    for _ in range(repeat):
+        for name, func in cases:
+            runs[name].append(timeit.timeit(run(func), number=number))
+    for name, _ in cases:
+        report(name, min(runs[name]), number * len(paradigm_words))
+    loop = runs[cases[0][0]]
+    for name, _ in cases[1:]:
+        speedups = sorted(a / b for a, b in zip(loop, runs[name]))
+        print(f'speedup of {name}: {speedups[0]:.1f}x to {speedups[-1]:.1f}x over {repeat} runs')
+
+
+def make_words(count):
+    """
+    Synthetic two syllable words covering all final syllables
+    """
+    step = max(1, jamo.SCount // count)
+    return ['아' + chr(jamo.SBase + (i * step) % jamo.SCount) + '다' for i in range(count)]
+
+
+def bench_batch(count=20000, number=3):
+    words = make_words(count)
+    irregular = [False] * count
+
+    def scalar():
+        return [SentenceFinalForm.indicative(word, True, False, conjugator.TENSE_PAST,
+                                             conjugator.STYLE_INFORMAL, conjugator.STYLE_POLITE) for word in words]
+
+    def vectorized():
+        return batch.conjugate_batch(words, 'indicative.past.informal.polite', irregular=irregular)
+
+    results = {}
+    for name, func in (('past polite (per word)', scalar), ('past polite (conjugate_batch)', vectorized)):
+        results[name] = timeit.timeit(func, number=number)
+        report(name, results[name], number * count)
+    print(f'speedup: {results["past polite (per word)"] / results["past polite (conjugate_batch)"]:.1f}x')
+
+
+def bench_checked(count=20000, number=3):
+    """
+    Messy input, a fifth of the words are not predicates or flagged irregular by mistake
+    """
+    words = make_words(count)
+    words[::10] = ['foo'] * len(words[::10])
+    irregular = [i % 10 == 5 for i in range(count)]
+    form_id = 'indicative.past.informal.polite'
+
+    def per_word():
+        results = []
+        for word, irr in zip(words, irregular):
+            try:
+                results.append(conjugator.conjugate(word, form_id, True, irr))
+            except RuntimeError as e:
+                results.append(e)
+        return results
+
+    per_word()  # fills the jamo tables
+    results = {}
+    for name, func in (('messy words (try/except)', per_word),
+                       ('messy words (conjugate_checked)',
+                        lambda: conjugator.conjugate_checked(words, form_id, True, irregular))):
+        results[name] = timeit.timeit(func, number=number)
+        report(name, results[name], number * count)
+    print(f'speedup: {results["messy words (try/except)"] / results["messy words (conjugate_checked)"]:.1f}x')
+
+
+def percentiles(func, number):
+    timings = []
+    for _ in range(number):
+        start = time.perf_counter_ns()
+        func()
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    return timings[len(timings) // 2], timings[len(timings) * 99 // 100]
+
+
+def bench_latency(number=20000):
+    analysis = conjugator.analyze('먹다', False)
+    calls = [('indicative(word)', lambda: SentenceFinalForm.indicative('먹다', True, False, conjugator.TENSE_PAST,
+                                                                      conjugator.STYLE_FORMAL, conjugator.STYLE_POLITE)),
+             ('indicative(analysis)', lambda: SentenceFinalForm.indicative(analysis, True, False,
+                                                                          conjugator.TENSE_PAST,
+                                                                          conjugator.STYLE_FORMAL,
+                                                                          conjugator.STYLE_POLITE)),
+             ('hortative(word)', lambda: SentenceFinalForm.hortative('먹다', conjugator.STYLE_FORMAL,
+                                                                    conjugator.STYLE_POLITE))]
+    if hasattr(conjugator, 'conjugate'):
+        calls += [('conjugate(word)', lambda: conjugator.conjugate('먹다', 'indicative.past.formal.polite',
+                                                                  irregular=False)),
+                  ('conjugate(analysis)', lambda: conjugator.conjugate(analysis, 'indicative.past.formal.polite'))]
+    for name, func in calls:
+        p50, p99 = percentiles(func, number)
+        print(f'{name:<40} p50 {p50:8d} ns   p99 {p99:8d} ns')
+
+
+def zipf_trace(words, length, exponent=1.0, seed=0):
+    weights = [1 / (rank + 1) ** exponent for rank in range(len(words))]
+    return random.Random(seed).choices(words, weights, k=length)
+
+
+def bench_cache(maxsize=1024, count=20000, length=100000):
+    trace = zipf_trace(make_words(count), length)
+
+    def run():
+        return [conjugator.conjugate(word, 'indicative.past.formal.polite') for word in trace]
+
+    report('conjugate (no cache)', timeit.timeit(run, number=1), length)
+    for policy in (cache.POLICY_LRU, cache.POLICY_TINYLFU):
+        cache.enable(maxsize, policy)
+        try:
+            seconds = timeit.timeit(run, number=1)
+            stats = cache.get_stats()['conjugator.analyze']
+        finally:
+            cache.disable()
+        report(f'conjugate ({policy}, {maxsize} items)', seconds, length)
+        print(f'hit rate {stats.hits / (stats.hits + stats.misses):.1%}, {stats.evictions} evictions')
+
+
+# common words of the classes missing from the shipped lists, (word, is_verb)
+common_lemmas = (('가다', True), ('먹다', True), ('읽다', True), ('받다', True), ('좋다', False), ('많다', False),
+                 ('하다', True), ('공부하다', True), ('좋아하다', True), ('따뜻하다', False),
+                 ('모르다', True), ('부르다', True), ('고르다', True), ('빠르다', False),
+                 ('살다', True), ('알다', True), ('만들다', True), ('길다', False),
+                 ('쓰다', True), ('크다', False), ('바쁘다', False), ('아프다', False))
+
+
+def lemma_mix():
+    """
+    Shipped irregular lists plus common words of the other classes
+    :return: list of (word, is_verb, irregular, irregularity class)
+    """
+    lemmas = [(word, is_verb) for word, is_verb, _ in lexicon.get_lemmas()] + list(common_lemmas)
+    mix = []
+    for word, is_verb in lemmas:
+        irregular_class = lexicon.classify(word)
+        mix.append((word, is_verb, irregular_class in stem2.irregular_classes, irregular_class))
+    return mix
+
+
+def _succeeds(func, args):
+    try:
+        func(*args)
+        return True
+    except RuntimeError:
+        return False
+
+
+def layer_cases(mix):
+    """
+    :return: list of (name, callable running one pass, number of operations in a pass)
+    """
+    cases = []
+
+    def add(name, func, calls):
+        calls = [args for args in calls if _succeeds(func, args)]
+        if calls:
+            cases.append((name, lambda: [func(*args) for args in calls], len(calls)))
+
+    stems = [(stem2.get_stem1(word), irregular, irregular_class) for word, _, irregular, irregular_class in mix]
+    syllables = [stem1[-1] for stem1, _, _ in stems]
+    add('jamo.decompose', jamo.decompose, [(s,) for s in syllables])
+    add('jamo.compose', jamo.compose,
+        [tuple(letters) + (None,) * (3 - len(letters)) for letters in map(jamo.decompose, syllables)])
+    for irregular_class in sorted({irregular_class for _, _, irregular_class in stems}):
+        add(f'stem2.stem1_to_stem2[{irregular_class}]', stem2.stem1_to_stem2,
+            [(stem1, irregular) for stem1, irregular, c in stems if c == irregular_class])
+    add('stem3.stem1_to_stem3', stem3.stem1_to_stem3, [(stem1, irregular) for stem1, irregular, _ in stems])
+
+    tenses = (conjugator.TENSE_NON_PAST, conjugator.TENSE_PAST)
+    add('SentenceFinalForm.indicative', SentenceFinalForm.indicative,
+        [(word, is_verb, irregular, tense, formal, polite) for word, is_verb, irregular, _ in mix
+         for tense in tenses for formal, polite in conjugator.styles])
+    add('SentenceFinalForm.interrogative', SentenceFinalForm.interrogative,
+        [(word, irregular, tense, formal, polite) for word, _, irregular, _ in mix
+         for tense in tenses for formal, polite in conjugator.styles])
+    for name in ('imperative', 'hortative', 'assertive'):
+        add(f'SentenceFinalForm.{name}', getattr(SentenceFinalForm, name),
+            [(word, formal, polite) for word, is_verb, _, _ in mix if is_verb for formal, polite in conjugator.styles])
+    for name in ('reason', 'condition', 'motive'):
+        add(f'ConnectiveForm.{name}', getattr(ConnectiveForm, name), [(word, irregular) for word, _, irregular, _ in mix])
+    for name in ('contrast', 'conjunction'):
+        add(f'ConnectiveForm.{name}', getattr(ConnectiveForm, name), [(word,) for word, _, _, _ in mix])
+    add('DeterminerForm.get', DeterminerForm.get,
+        [(word, tense, irregular) for word, _, irregular, _ in mix
+         for tense in (DeterminerForm.PAST, DeterminerForm.PRESENT, DeterminerForm.FUTURE)])
+    add('NounForm.get', NounForm.get,
+        [(word, tense, irregular) for word, _, irregular, _ in mix for tense in (NounForm.PRESENT, NounForm.PAST)])
+    add('conjugate_all', conjugator.conjugate_all, [(word, is_verb, irregular) for word, is_verb, irregular, _ in mix])
+    return cases
+
+
+def run_suite(number=20, repeat=5, verbose=True):
+    """
+    Best of repeat runs of number passes per case
+    :return: dict case name -> operations per second
+    """
+    results = {}
+    for name, func, count in layer_cases(lemma_mix()):
+        seconds = min(timeit.repeat(func, number=number, repeat=repeat))
+        results[name] = count * number / seconds
+        if verbose:
+            print(f'{name:<45} {results[name]:12.0f} ops/sec')
+    return results
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'python': platform.python_version(), 'results': results}, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def compare(baseline, results, threshold=0.1):
+    """
+    :param threshold: allowed relative drop of operations per second
+    :return: list of (case name, baseline ops/sec, current ops/sec) of cases slower than allowed
+    """
+    regressions = []
+    for name, expected in sorted(baseline.items()):
+        current = results.get(name)
+        if current is not None and current < expected * (1 - threshold):
+            regressions.append((name, expected, current))
+    return regressions
+
+
+def bench_memory(sizes=(0, 1000, 5000, 20000)):
+    """
+    Peak traced memory of all paradigms and of a ReverseIndex as synthetic words are added to the lemma mix
+    """
+    mix = [(word, is_verb, irregular) for word, is_verb, irregular, _ in lemma_mix()]
+    for size in sizes:
+        lemmas = mix + [(word, True, False) for word in make_words(size)] if size else mix
+        peaks = []
+        for build in (lambda: [conjugator.conjugate_all(*lemma) for lemma in lemmas],
+                      lambda: analyzer.ReverseIndex(lemmas)):
+            tracemalloc.start()
+            result = build()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            del result
+        print(f'{len(lemmas):>6} lemmas   paradigms peak {peaks[0] / 2 ** 20:8.1f} MiB   '
+              f'reverse index peak {peaks[1] / 2 ** 20:8.1f} MiB')
+
+
+def make_lemmas(count):
+    """
+    Distinct synthetic two syllable words, every syllable as the last one
+    """
+    return [chr(jamo.SBase + i // jamo.SCount) + chr(jamo.SBase + i % jamo.SCount) + '다' for i in range(count)]
+
+
+def bench_paradigm_memory(sizes=(10000, 100000, 1000000)):
+    """
+    Bytes per lemma of paradigms kept as lists of form strings and as paradigm.Paradigm, sys.getsizeof of the
+    objects a lemma adds, the lemma string left out of both. Patterns and suffixes shared by paradigms are counted
+    once, the lists are measured one at a time and not kept. Pickled sizes are per lemma too
+    """
+    for size in sizes:
+        strings = strings_pickled = compact = 0
+        paradigms = []
+        for word in make_lemmas(size):
+            forms = conjugator.conjugate_all(word, True, lexicon.is_irregular(word))
+            values = list(forms.values())
+            strings += sys.getsizeof(values) + sum(map(sys.getsizeof, values))
+            strings_pickled += len(pickle.dumps(values, pickle.HIGHEST_PROTOCOL))
+            paradigms.append(paradigm.Paradigm.from_forms(word, True, forms))
+        patterns = {id(p._pattern): p._pattern for p in paradigms}
+        compact = (sum(map(sys.getsizeof, paradigms)) + sys.getsizeof(paradigms)
+                   + sum(map(sys.getsizeof, patterns.values()))
+                   + sys.getsizeof(paradigm.suffix_pool) + sum(map(sys.getsizeof, paradigm.suffix_pool)))
+        compact_pickled = len(pickle.dumps(paradigms, pickle.HIGHEST_PROTOCOL)) - sum(
+            len(p.lemma.encode('utf-8')) + 2 for p in paradigms)
+        print(f'{size:>8} lemmas   strings {strings / size:8.0f} B/lemma   Paradigm {compact / size:6.0f} B/lemma '
+              f'({strings / compact:5.1f}x, {len(patterns)} patterns)   pickled {strings_pickled / size:6.0f} -> '
+              f'{compact_pickled / size:4.0f} B/lemma')
+        del paradigms, patterns
+
+
+def bench_fuzzy(sizes=(1000, 10000, 100000), number=200, k=5, seed=0):
+    """
+    Grows one fuzzy.FuzzyIndex with the paradigms of synthetic lemmas in random order and looks up forms of
+    indexed lemmas with one jamo replaced, reporting the share of nodes a lookup computes a distance to
+    """
+    rng = random.Random(seed)
+    lemmas = make_lemmas(sizes[-1])
+    rng.shuffle(lemmas)
+    index = fuzzy.FuzzyIndex()
+    added = 0
+    letters = 'ᄀᄂ사ᅥᅩᅵᆨᆫᆯ'
+    for size in sizes:
+        start = time.perf_counter()
+        for word in lemmas[added:size]:
+            index.add_forms(word, conjugator.conjugate_all(word, True, False))
+        build = time.perf_counter() - start
+        added = size
+        queries = []
+        for word in rng.sample(lemmas[:size], number):
+            form = fuzzy.to_jamo(rng.choice(list(conjugator.conjugate_all(word, True, False).values())))
+            i = rng.randrange(len(form))
+            queries.append(form[:i] + rng.choice(letters.replace(form[i], '')) + form[i + 1:])
+        visited = 0
+        start = time.perf_counter()
+        for query in queries:
+            visited += index._search(query, k, 6)[1]
+        seconds = (time.perf_counter() - start) / number
+        print(f'{size:>7} lemmas {len(index):>8} surfaces   built in {build:7.1f} s   {seconds * 1000:7.2f} ms/lookup   '
+              f'{visited / number / len(index):6.2%} visited')
+
+
+def describe_interpreter():
+    """
+    Version and whether the GIL is enabled, free-threaded builds can run with it enabled
+    """
+    free_threaded = bool(sysconfig.get_config_var('Py_GIL_DISABLED'))
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    return f'{platform.python_implementation()} {platform.python_version()} ' \
+           f'{"free-threaded" if free_threaded else "standard"} build, GIL {"enabled" if gil else "disabled"}'
+
+
+def bench_threads(counts=(1, 2, 4, 8, 16), count=20000, number=3):
+    """
+    Throughput of batch.conjugate_all_threaded and batch.conjugate_batch_threaded on pools of each size,
+    best of number runs, speedup relative to one thread
+    """
+    print(describe_interpreter())
+    lemmas = [(word, True, False) for word in make_lemmas(count)]
+    words = [word for word, _, _ in lemmas]
+    cases = [('conjugate_all_threaded', lambda pool: batch.conjugate_all_threaded(lemmas, executor=pool))]
+    if batch.np is not None:
+        cases.append(('conjugate_batch_threaded', lambda pool: batch.conjugate_batch_threaded(
+            words, 'indicative.past.formal.polite', irregular=[False] * count, executor=pool)))
+    for name, run in cases:
+        single = None
+        for threads in counts:
+            with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+                run(pool)
+                seconds = min(timeit.repeat(lambda: run(pool), number=1, repeat=number))
+            single = single or seconds
+            print(f'{name:<26} {threads:>3} threads {count / seconds:12.0f} lemmas/sec {single / seconds:6.2f}x')
+
+
+def run_thread_scaling(interpreters=()):
+    """
+    bench_threads in this interpreter, or in each of the given ones, e.g. python3.13 and python3.13t
+    """
+    if not interpreters:
+        bench_threads()
+        return
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for interpreter in interpreters:
+        subprocess.run([interpreter, '-c', 'import benchmark; benchmark.bench_threads()'], cwd=directory, check=True)
+
+
+def measure_import(module='conjugator', repeat=5):
+    """
+    Cumulative import time of a module as -X importtime reports it, best of repeat fresh interpreters.
+    Bytecode is written and used, as in an installed package
+    :return: microseconds
+    """
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    command = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+    directory = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run(command, cwd=directory, env=env, capture_output=True, check=True)
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(command, cwd=directory, env=env, capture_output=True, text=True, check=True).stderr
+        for line in output.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                times.append(int(fields[1]))
+    return min(times)
+
+
+def run_comparisons():
+    bench_jamo()
+    bench_paradigm()
+    bench_latency()
+    bench_cache()
+    bench_checked()
+    if batch.np is not None:
+        bench_batch()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per layer benchmark suite')
+    parser.add_argument('--save', metavar='PATH', help='write results to a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='fail if slower than a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed drop of ops/sec, 0.1 by default')
+    parser.add_argument('--number', type=int, default=20, help='passes over the lemma mix per run')
+    parser.add_argument('--memory', action='store_true', help='report peak memory as the lexicon grows')
+    parser.add_argument('--paradigm-memory', action='store_true',
+                        help='compare bytes per lemma of form lists and Paradigm at 10k, 100k and 1M lemmas')
+    parser.add_argument('--fuzzy', action='store_true',
+                        help='fuzzy lookup time and nodes visited at 1k, 10k and 100k lemmas')
+    parser.add_argument('--threads', action='store_true',
+                        help='thread pool throughput at 1, 2, 4, 8 and 16 threads')
+    parser.add_argument('--interpreter', action='append', default=[], metavar='PATH',
+                        help='run --threads in this interpreter instead, repeat to compare e.g. python3.13t')
+    parser.add_argument('--comparisons', action='store_true', help='also run the implementation comparisons')
+    parser.add_argument('--import-budget', type=float, metavar='MS',
+                        help='fail if import conjugator takes longer, measured with -X importtime')
+    args = parser.parse_args(argv)
+
+    status = 0
+    results = run_suite(args.number)
+    if args.save:
+        save_baseline(args.save, results)
+    if args.memory:
+        bench_memory()
+    if args.paradigm_memory:
+        bench_paradigm_memory()
+    if args.fuzzy:
+        bench_fuzzy()
+    if args.threads:
+        run_thread_scaling(args.interpreter)
+    if args.comparisons:
+        run_comparisons()
+    if args.import_budget is not None:
+        milliseconds = measure_import() / 1000
+        print(f'{"import conjugator":<45} {milliseconds:12.1f} ms')
+        if milliseconds > args.import_budget:
+            print(f'IMPORT BUDGET import conjugator: {milliseconds:.1f} ms > {args.import_budget:.1f} ms',
+                  file=sys.stderr)
+            status = 1
+    if args.compare:
+        regressions = compare(load_baseline(args.compare), results, args.threshold)
+        for name, expected, current in regressions:
+            print(f'REGRESSION {name}: {expected:.0f} -> {current:.0f} ops/sec ({current / expected - 1:+.1%})',
+                  file=sys.stderr)
+        if regressions:
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
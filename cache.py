@@ -0,0 +1,248 @@
+import collections
+import functools
+import threading
+
+import conjugator
+import lexicon
+import stem2
+import stem3
+
+
+POLICY_LRU = 'lru'
+POLICY_TINYLFU = 'tinylfu'
+
+CacheStats = collections.namedtuple('CacheStats', ('hits', 'misses', 'evictions', 'size', 'maxsize'))
+
+# (module, function name) of the pure functions of (word, irregular) replaced by enable. conjugate,
+# conjugate_all and the form methods get their stems from the LemmaAnalysis analyze returns
+cached_functions = ((conjugator, 'analyze'),
+                    (stem2, 'get_stem2'),
+                    (stem3, 'get_stem3'),
+                    (stem3, 'get_honorific_stem'),
+                    (conjugator, 'get_past'))
+
+_missing = object()
+_originals = {}
+
+
+class LRUCache:
+    """
+    Mapping of at most maxsize items, the least recently used item is evicted first.
+    Lookups do not take the lock, they rely on single OrderedDict operations being atomic, inserts and evictions do.
+    The counters are statistics and may miss an increment when threads race
+    """
+    def __init__(self, maxsize=4096):
+        if maxsize < 1:
+            raise RuntimeError('cache size must be positive')
+        self.maxsize = maxsize
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        value = self._items.get(key, _missing)
+        if value is _missing:
+            self.misses += 1
+            return default
+        self.hits += 1
+        try:
+            self._items.move_to_end(key)
+        except KeyError:  # evicted by another thread meanwhile
+            pass
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            items = self._items
+            if key in items:
+                items[key] = value
+                items.move_to_end(key)
+                return
+            if len(items) >= self.maxsize:
+                victim = next(iter(items))
+                if not self._admit(key, victim):
+                    return
+                del items[victim]
+                self.evictions += 1
+            items[key] = value
+
+    def _admit(self, key, victim):
+        return True
+
+    def discard(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def discard_matching(self, predicate):
+        """
+        Drops the items whose key predicate is true for
+        """
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                del self._items[key]
+
+    def clear(self):
+        """
+        Drops all items, counters are kept
+        """
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._items), self.maxsize)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+_halve = bytes(count // 2 for count in range(256))
+
+
+class TinyLFUCache(LRUCache):
+    """
+    LRU cache with TinyLFU admission: access frequencies are estimated with a count-min sketch of 4 rows of
+    4 * maxsize counters and a new item replaces the least recently used one only if it was requested more often.
+    One-off words then cannot flush frequent lemmas out of the cache. Counters saturate at 15 and are halved after
+    10 * maxsize accesses so old popularity fades
+    """
+    def __init__(self, maxsize=4096):
+        super().__init__(maxsize)
+        width = 1
+        while width < 4 * maxsize:
+            width *= 2
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in range(4)]
+        self._samples = 0
+        self._reset_after = 10 * maxsize
+
+    def get(self, key, default=None):
+        # each row is indexed by a different 16 bit part of the hash, unrolled as this runs on every lookup
+        h = hash(key)
+        mask = self._mask
+        a, b, c, d = self._rows
+        i = h & mask
+        if a[i] < 15:
+            a[i] += 1
+        i = h >> 16 & mask
+        if b[i] < 15:
+            b[i] += 1
+        i = h >> 32 & mask
+        if c[i] < 15:
+            c[i] += 1
+        i = h >> 48 & mask
+        if d[i] < 15:
+            d[i] += 1
+        self._samples += 1
+        if self._samples >= self._reset_after:
+            self._samples = 0
+            self._rows = [row.translate(_halve) for row in self._rows]
+        return LRUCache.get(self, key, default)
+
+    def frequency(self, key):
+        h = hash(key)
+        mask = self._mask
+        a, b, c, d = self._rows
+        return min(a[h & mask], b[h >> 16 & mask], c[h >> 32 & mask], d[h >> 48 & mask])
+
+    def _admit(self, key, victim):
+        return self.frequency(key) > self.frequency(victim)
+
+
+cache_classes = {POLICY_LRU: LRUCache, POLICY_TINYLFU: TinyLFUCache}
+
+
+def memoize(function, maxsize=4096, policy=POLICY_LRU):
+    """
+    Wraps a function of (word, irregular). Results are cached by (word, irregular), errors are not cached.
+    Calls with an already computed conjugator.LemmaAnalysis bypass the cache. Results of irregular None depend on
+    the lexicon and are dropped when it is reloaded
+    :return: wrapper, its cache is the cache attribute
+    """
+    cache = cache_classes[policy](maxsize)
+
+    @functools.wraps(function)
+    def wrapper(word, irregular=None):
+        if not isinstance(word, str):
+            return function(word, irregular)
+        key = (word, irregular)
+        value = cache.get(key, _missing)
+        if value is _missing:
+            value = function(word, irregular)
+            cache.put(key, value)
+        return value
+
+    wrapper.cache = cache
+    return wrapper
+
+
+def enable(maxsize=4096, policy=POLICY_LRU):
+    """
+    Replaces conjugator.analyze, stem2.get_stem2, stem3.get_stem3, stem3.get_honorific_stem and
+    conjugator.get_past with memoized versions, each with its own cache of maxsize items. Cached analyses are shared,
+    so conjugate, conjugate_all and the form methods compute the stems of a cached word once.
+    Enabling again starts with empty caches
+    :param policy: POLICY_LRU or POLICY_TINYLFU
+    """
+    if policy not in cache_classes:
+        raise RuntimeError(f'unknown cache policy {policy}')
+    for module, name in cached_functions:
+        original = _originals.setdefault((module, name), getattr(module, name))
+        setattr(module, name, memoize(original, maxsize, policy))
+
+
+def disable():
+    """
+    Restores the original functions
+    """
+    for (module, name), original in _originals.items():
+        setattr(module, name, original)
+    _originals.clear()
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def invalidate(word=None):
+    """
+    Drops the cached results of a word, or of all words if omitted
+    """
+    for module, name in cached_functions:
+        cache = getattr(getattr(module, name), 'cache', None)
+        if cache is None:
+            continue
+        if word is None:
+            cache.clear()
+        else:
+            for irregular in (None, False, True):
+                cache.discard((word, irregular))
+
+
+def _drop_looked_up():
+    """
+    Drops the results whose irregular flag was looked up in the lexicon
+    """
+    for module, name in cached_functions:
+        cache = getattr(getattr(module, name), 'cache', None)
+        if cache is not None:
+            cache.discard_matching(lambda key: key[1] is None)
+
+
+lexicon.reload_callbacks.append(_drop_looked_up)
+
+
+def get_stats():
+    """
+    :return: {'module.function': CacheStats}, empty if caching is disabled
+    """
+    stats = {}
+    for module, name in cached_functions:
+        cache = getattr(getattr(module, name), 'cache', None)
+        if cache is not None:
+            stats[f'{module.__name__}.{name}'] = cache.stats()
+    return stats
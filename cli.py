@@ -0,0 +1,135 @@
+import argparse
+import collections
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import conjugator
+import normalize
+
+
+FORMAT_JSONL = 'jsonl'
+FORMAT_TSV = 'tsv'
+
+
+def parse_line(line):
+    """
+    word[<TAB>verb|adj[<TAB>regular|irregular]], the irregular flag is looked up in the lexicon if omitted
+    :return: (word, is_verb, irregular) or None for an empty line
+    """
+    fields = line.strip().split('\t')
+    if not fields[0]:
+        return None
+    is_verb = len(fields) < 2 or fields[1] != 'adj'
+    irregular = None if len(fields) < 3 else fields[2] == 'irregular'
+    return fields[0], is_verb, irregular
+
+
+def format_lemma(word, forms, error, output_format):
+    if output_format == FORMAT_TSV:
+        if error:
+            return f'{word}\terror\t{error}\n'
+        return ''.join(f'{word}\t{form_id}\t{form}\n' for form_id, form in forms.items())
+    if error:
+        return json.dumps({'lemma': word, 'error': error}, ensure_ascii=False) + '\n'
+    return json.dumps({'lemma': word, 'forms': forms}, ensure_ascii=False) + '\n'
+
+
+def conjugate_chunk(lines, form_ids, output_format):
+    """
+    Words are normalized first (NFD, compatibility jamo, whitespace), words that cannot be are reported as errors
+    :return: formatted output of a chunk of input lines and the number of lemmas in it
+    """
+    output = []
+    lemmas = [lemma for lemma in map(parse_line, lines) if lemma is not None]
+    words = normalize.normalize_batch([word for word, _, _ in lemmas])
+    for (raw, is_verb, irregular), word in zip(lemmas, words):
+        if word is None:
+            output.append(format_lemma(raw, None, f'{raw} is not a verb or adjective', output_format))
+            continue
+        try:
+            forms = conjugator.conjugate_all(word, is_verb, irregular)
+        except RuntimeError as e:
+            output.append(format_lemma(word, None, str(e), output_format))
+            continue
+        if form_ids is not None:
+            forms = {form_id: forms[form_id] for form_id in form_ids if form_id in forms}
+        output.append(format_lemma(word, forms, None, output_format))
+    return ''.join(output), len(lemmas)
+
+
+def iterate_chunks(lines, chunk_size):
+    lines = iter(lines)
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def conjugate_stream(lines, form_ids=None, output_format=FORMAT_JSONL, processes=None, chunk_size=1000):
+    """
+    Conjugates a stream of input lines in chunks on a process pool.
+    Results are yielded in input order, at most two chunks per process are in flight at a time
+    :return: generator of (formatted output, number of lemmas) per chunk
+    """
+    processes = processes or os.cpu_count() or 1
+    chunks = iterate_chunks(lines, chunk_size)
+    if processes == 1:
+        for chunk in chunks:
+            yield conjugate_chunk(chunk, form_ids, output_format)
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(conjugate_chunk, (chunk, form_ids, output_format)))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m conjugator',
+                                     description='Conjugate Korean verbs and adjectives, one per input line: '
+                                                 'word[<TAB>verb|adj[<TAB>regular|irregular]]')
+    parser.add_argument('input', nargs='?', default='-', help='input file, - for stdin')
+    parser.add_argument('-o', '--output', default='-', help='output file, - for stdout')
+    parser.add_argument('-f', '--format', choices=(FORMAT_JSONL, FORMAT_TSV), default=FORMAT_JSONL)
+    parser.add_argument('--forms', help='comma separated form ids, all forms by default')
+    parser.add_argument('-j', '--processes', type=int, default=None, help='worker processes, CPU count by default')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='lemmas per task')
+    args = parser.parse_args(argv)
+
+    form_ids = None
+    if args.forms:
+        form_ids = args.forms.split(',')
+        unknown = set(form_ids) - set(conjugator.FORM_IDS)
+        if unknown:
+            parser.error(f'unknown forms: {", ".join(sorted(unknown))}')
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8-sig')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    start = time.perf_counter()
+    total = 0
+    try:
+        for output, count in conjugate_stream(source, form_ids, args.format, args.processes, args.chunk_size):
+            target.write(output)
+            total += count
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+        else:
+            target.flush()
+    elapsed = time.perf_counter() - start
+    print(f'{total} lemmas in {elapsed:.2f} s, {total / elapsed if elapsed else 0:.0f} lemmas/sec', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,39 @@
 
+import collections
+import enum
+import functools
+import operator
+
 import jamo
+import lexicon
 import stem2
 import stem3
 
 
-TENSE_NON_PAST = 1
-TENSE_PAST = 2
+class Tense(enum.IntEnum):
+    NON_PAST = 1
+    PAST = 2
+
+
+class Formality(enum.IntEnum):
+    FORMAL = 3
+    INFORMAL = 4
+
+
+class Politeness(enum.IntEnum):
+    POLITE = 5
+    NON_POLITE = 6
+
+
+# aliases kept for existing callers, IntEnum members compare and hash equal to these ints
+TENSE_NON_PAST = Tense.NON_PAST
+TENSE_PAST = Tense.PAST
 
-STYLE_FORMAL = 3
-STYLE_INFORMAL = 4
+STYLE_FORMAL = Formality.FORMAL
+STYLE_INFORMAL = Formality.INFORMAL
 
-STYLE_POLITE = 5
-STYLE_NON_POLITE = 6
+STYLE_POLITE = Politeness.POLITE
+STYLE_NON_POLITE = Politeness.NON_POLITE
 
 
 final_ss = 'ᆻ'
@@ -21,95 +43,189 @@ polite_formal_suffix = '습니'
 polite_formal_question_ending = '까'
 
 
+class LemmaAnalysis:
+    """
+    Stems of a single (word, irregular) pair, computed once and shared by all forms.
+    stem1 and the jamo of its last syllable are computed eagerly, other stems on first access
+    """
+    __slots__ = ('word', 'irregular', 'stem1', 'letters',
+                 '_stem2', '_stem3', '_honorific', '_past', '_irregular_class')
+
+    def __init__(self, word: str, irregular: bool = None):
+        """
+        :param irregular: looked up in the lexicon if omitted
+        """
+        if irregular is None:
+            irregular = lexicon.is_irregular(word)
+        self.word = word
+        self.irregular = irregular
+        self.stem1 = stem2.get_stem1(word)
+        self.letters = jamo.decompose(self.stem1[-1])
+        self._stem2 = None
+        self._stem3 = None
+        self._honorific = None
+        self._past = None
+        self._irregular_class = None
+
+    @property
+    def stem2(self):
+        if self._stem2 is None:
+            self._stem2 = stem2.stem1_to_stem2(self.stem1, irregular=self.irregular)
+        return self._stem2
+
+    @property
+    def stem3(self):
+        if self._stem3 is None:
+            self._stem3 = stem3.stem1_to_stem3(self.stem1, self.irregular)
+        return self._stem3
+
+    @property
+    def honorific(self):
+        if self._honorific is None:
+            self._honorific = stem3.get_honorific_stem(self.word, self.irregular)
+        return self._honorific
+
+    @property
+    def past(self):
+        if self._past is None:
+            self._past = stem2_to_past(self.stem2)
+        return self._past
+
+    @property
+    def irregular_class(self):
+        if self._irregular_class is None:
+            self._irregular_class = stem2.get_irregular_class(self.stem1, self.irregular)
+        return self._irregular_class
+
+    def stem_or_none(self, name):
+        """
+        Stem by attribute name, None where the attribute raises RuntimeError because the rules cannot produce
+        the stem for the irregular flag, e.g. stem2 of 먹다 flagged irregular
+        """
+        return _stem_getters[name](self)
+
+    def _stem2_or_none(self):
+        if self._stem2 is None:
+            self._stem2 = stem2.stem1_to_stem2_or_none(self.stem1, self.irregular)
+        return self._stem2
+
+    def _stem3_or_none(self):
+        if self._stem3 is None:
+            self._stem3 = stem3.stem1_to_stem3_or_none(self.stem1, self.irregular)
+        return self._stem3
+
+    def _honorific_or_none(self):
+        if self._honorific is None:
+            self._honorific = stem3.get_honorific_stem_or_none(self.word, self.irregular)
+        return self._honorific
+
+    def _past_or_none(self):
+        if self._past is None and self._stem2_or_none() is not None:
+            self._past = stem2_to_past(self._stem2)
+        return self._past
+
+    def __repr__(self):
+        return f'LemmaAnalysis({self.word!r}, irregular={self.irregular!r})'
+
+
+# stem name -> function of a LemmaAnalysis returning the stem or None
+_stem_getters = {'stem1': operator.attrgetter('stem1'),
+                 'stem2': LemmaAnalysis._stem2_or_none,
+                 'stem3': LemmaAnalysis._stem3_or_none,
+                 'honorific': LemmaAnalysis._honorific_or_none,
+                 'past': LemmaAnalysis._past_or_none}
+
+
+def analyze(word, irregular=None):
+    """
+    :param word: dictionary form or an already computed LemmaAnalysis, which is returned as is
+    :param irregular: ignored if word is LemmaAnalysis, looked up in the lexicon if omitted
+    """
+    if isinstance(word, LemmaAnalysis):
+        return word
+    return LemmaAnalysis(word, irregular)
+
+
+final_m = 'ᆷ'
+
+# the compatibility jamo grammar notation uses for a final consonant attached to the stem, -(스)ㅂ니다
+notation_finals = {'ㄴ': stem2.final_n, 'ㄹ': stem2.final_l, 'ㅁ': final_m, 'ㅂ': stem2.final_p}
+
+# ㄹ of a stem is dropped before these initials: 살다 -> 사니, 사는
+l_dropping_initials = frozenset('ᄂᄇᄉ')
+
+
+def merge_final(stem, final, connector):
+    """
+    Attaches a final consonant to the last syllable of a stem, -(스)ㅂ니다, -(느)ㄴ다, -(으)ㅁ:
+    an open syllable takes it (가 -> 갑), ㄹ is replaced by it (살 -> 삽) except ㅁ (살 -> 삶),
+    other finals are followed by the connector syllable carrying it (먹 -> 먹습)
+    """
+    letters = jamo.decompose(stem[-1])
+    if len(letters) == 2:
+        return stem[:-1] + jamo.compose(letters[0], letters[1], final)
+    if letters[2] == stem2.final_l:
+        return stem[:-1] + jamo.compose(letters[0], letters[1], 'ᆱ' if final == final_m else final)
+    connector = jamo.decompose(connector)
+    return stem + jamo.compose(connector[0], connector[1], final)
+
+
+def drop_l(stem):
+    letters = jamo.decompose(stem[-1])
+    if len(letters) == 3 and letters[2] == stem2.final_l:
+        return stem[:-1] + jamo.compose(letters[0], letters[1], None)
+    return stem
+
+
 def get_seumni(word):
-    stem1 = stem2.get_stem1(word)
-    letters = jamo.decompose(stem1[-1])
-    if len(letters) == 3 and letters[2] != stem2.final_l:
-        return stem1 + polite_formal_suffix
-    else:
-        return stem1[:-1] + jamo.compose(letters[0], letters[1], stem2.final_p) + '니'
+    return merge_final(analyze(word).stem1, stem2.final_p, '스') + '니'
 
 
 def get_eupsi(word):
-    stem1 = stem2.get_stem1(word)
-    letters = jamo.decompose(stem1[-1])
-    if len(letters) == 3 and letters[2] != stem2.final_l:
-        return stem1 + '읍시'
-    else:
-        return stem1[:-1] + jamo.compose(letters[0], letters[1], stem2.final_p) + '시'
+    return merge_final(analyze(word).stem1, stem2.final_p, '으') + '시'
 
 
-def get_past(word, irregular):
-    stem = stem2.get_stem2(word, irregular)
+def stem2_to_past(stem):
     letters = jamo.decompose(stem[-1])
     assert(len(letters) == 2)
     return stem[:-1] + jamo.compose(letters[0], letters[1], final_ss)
 
 
-def get_plain(word: str, adjective: bool):
+def get_past(word, irregular):
+    return analyze(word, irregular).past
+
+
+def get_plain(word, adjective: bool):
+    analysis = analyze(word)
     if adjective:
-        return word
-    stem1 = stem2.get_stem1(word)
-    letters = jamo.decompose(stem1[-1])
-    if len(letters) == 2 or letters[2] == stem2.final_l:
-        return stem1[:-1] + jamo.compose(letters[0], letters[1], stem2.final_n) + word_ending  # final l -> n
-    else:
-        return stem1 + '는' + word_ending
+        return analysis.word
+    return merge_final(analysis.stem1, stem2.final_n, '느') + word_ending
 
 
 # TODO: 니 is a direct question, (느)냐 is indirect (quote)
-def get_plain_interrogative(word: str):
-    stem1 = stem2.get_stem1(word)
-    letters = jamo.decompose(stem1[-1])
-    if len(letters) == 3 and letters[2] == stem2.final_l:
-        return stem1[:-1] + jamo.compose(letters[0], letters[1], None) + '니'  # '냐'
-    else:
-        return stem1 + '니'  # '으' + '냐'
+def get_plain_interrogative(word):
+    return drop_l(analyze(word).stem1) + '니'
 
 
-def get_plan_past_interrogative(word: str, irregular):
+def get_plan_past_interrogative(word, irregular):
     past = get_past(word, irregular)
     return past + '니'
 
 
 class SentenceFinalForm:
+    """
+    Every method accepts either a dictionary form or a LemmaAnalysis as word.
+    Reuse one LemmaAnalysis to generate many forms of a lemma without recomputing the stems
+    """
     @staticmethod
-    def indicative(word, is_verb, is_irregular, tense, formal, polite):
-        conjugate_methods = {
-                # non-past
-                (TENSE_NON_PAST, STYLE_FORMAL, STYLE_POLITE):
-                lambda x: get_seumni(word) + word_ending,
-
-                (TENSE_NON_PAST, STYLE_FORMAL, STYLE_NON_POLITE):
-                lambda x: get_plain(word, adjective=not is_verb),
-
-                (TENSE_NON_PAST, STYLE_INFORMAL, STYLE_POLITE):
-                lambda x: stem2.get_stem2(word, is_irregular) + polite_ending,
-
-                (TENSE_NON_PAST, STYLE_INFORMAL, STYLE_NON_POLITE):
-                lambda x: stem2.get_stem2(word, is_irregular),
-
-                # past
-                (TENSE_PAST, STYLE_FORMAL, STYLE_POLITE):
-                lambda x: get_past(word, irregular=is_irregular) + polite_formal_suffix + word_ending,
-
-                (TENSE_PAST, STYLE_FORMAL, STYLE_NON_POLITE):
-                lambda x: get_past(word, irregular=is_irregular) + word_ending,
-
-                (TENSE_PAST, STYLE_INFORMAL, STYLE_POLITE):
-                lambda x: get_past(word, irregular=is_irregular) + '어' + polite_ending,
-
-                (TENSE_PAST, STYLE_INFORMAL, STYLE_NON_POLITE):
-                lambda x: get_past(word, irregular=is_irregular) + '어',
-            }
-        method = conjugate_methods.get((tense, formal, polite))
-        if method:
-            return method(word)
-        else:
+    def indicative(word, is_verb, is_irregular, tense: Tense, formal: Formality, polite: Politeness):
+        plan = _style_plans[bool(is_verb)].get((MOOD_INDICATIVE, tense, formal, polite))
+        if plan is None:
             raise RuntimeError(f'{tense}, {formal}, {polite} not implemented')
+        return apply_plan(plan, analyze(word, is_irregular))
 
     @staticmethod
-    def interrogative(word: str, is_irregular: bool, tense, formal, polite):
+    def interrogative(word, is_irregular: bool, tense: Tense, formal: Formality, polite: Politeness):
         """
         해체        STYLE_INFORMAL, STYLE_NON_POLITE
         해라체      STYLE_FORMAL, STYLE_NON_POLITE
@@ -122,135 +238,60 @@ class SentenceFinalForm:
         :param polite:
         :return:
         """
-        conjugate_methods = {
-            # non-past
-            (TENSE_NON_PAST, STYLE_FORMAL, STYLE_POLITE):
-            lambda x: get_seumni(word) + '까',
-
-            (TENSE_NON_PAST, STYLE_FORMAL, STYLE_NON_POLITE):
-                lambda x: get_plain_interrogative(word),
-
-
-            (TENSE_NON_PAST, STYLE_INFORMAL, STYLE_POLITE):
-                lambda x: stem2.get_stem2(word, is_irregular) + polite_ending,
-
-            (TENSE_NON_PAST, STYLE_INFORMAL, STYLE_NON_POLITE):
-            lambda x: stem2.get_stem2(word, is_irregular),
-
-            # past
-            (TENSE_PAST, STYLE_FORMAL, STYLE_POLITE):
-                lambda x: get_past(word, irregular=is_irregular) + polite_formal_suffix + polite_formal_question_ending,
-
-            (TENSE_PAST, STYLE_FORMAL, STYLE_NON_POLITE):
-                lambda x: get_plan_past_interrogative(word, irregular=is_irregular),
-
-            (TENSE_PAST, STYLE_INFORMAL, STYLE_POLITE):
-            lambda x: get_past(word, is_irregular) + '어' + polite_ending,
-
-
-            (TENSE_PAST, STYLE_INFORMAL, STYLE_NON_POLITE):
-                lambda x: get_past(word, is_irregular) + '어',
-        }
-
-        method = conjugate_methods.get((tense, formal, polite))
-        if method:
-            return method(word)
-        else:
+        plan = _style_plans[True].get((MOOD_INTERROGATIVE, tense, formal, polite))
+        if plan is None:
             raise RuntimeError(f'{tense}, {formal}, {polite} not implemented')
+        return apply_plan(plan, analyze(word, is_irregular))
 
     @staticmethod
-    def assertive(word, formal, polite):
-        assertive_suffix = '겠'
-        conjugate_methods = {
-                # non-past
-                (TENSE_NON_PAST, STYLE_FORMAL, STYLE_POLITE):
-                lambda x: stem2.get_stem1(word) + assertive_suffix + polite_formal_suffix + word_ending,
-
-                (TENSE_NON_PAST, STYLE_FORMAL, STYLE_NON_POLITE):
-                lambda x: stem2.get_stem1(word) + assertive_suffix + word_ending,
-
-                (TENSE_NON_PAST, STYLE_INFORMAL, STYLE_POLITE):
-                lambda x: stem2.get_stem1(word) + assertive_suffix + '어' + polite_ending,
-
-                (TENSE_NON_PAST, STYLE_INFORMAL, STYLE_NON_POLITE):
-                lambda x: stem2.get_stem1(word) + assertive_suffix + '어'
-        }
-        method = conjugate_methods.get((TENSE_NON_PAST, formal, polite))
-        if method:
-            return method(word)
-        else:
+    def assertive(word, formal: Formality, polite: Politeness):
+        plan = _style_plans[True].get((MOOD_ASSERTIVE, TENSE_NON_PAST, formal, polite))
+        if plan is None:
             raise RuntimeError(f'Assertive form of {formal}, {polite} not implemented')
+        return apply_plan(plan, analyze(word))
 
     @staticmethod
-    def imperative(word, formal, polite):
-        conjugate_methods = {
-                # non-past
-                (TENSE_NON_PAST, STYLE_FORMAL, STYLE_POLITE):
-                lambda x: get_eupsi(word) + '오',
-
-                (TENSE_NON_PAST, STYLE_FORMAL, STYLE_NON_POLITE):
-                lambda x: stem2.get_stem1(word) + '라',
-
-                (TENSE_NON_PAST, STYLE_INFORMAL, STYLE_POLITE):
-                lambda x: stem2.get_stem2(word) + polite_ending,
-
-                (TENSE_NON_PAST, STYLE_INFORMAL, STYLE_NON_POLITE):
-                lambda x: stem2.get_stem2(word)
-        }
-        method = conjugate_methods.get((TENSE_NON_PAST, formal, polite))
-        if method:
-            return method(word)
-        else:
-            raise RuntimeError(f'Assertive form of {formal}, {polite} not implemented')
+    def imperative(word, formal: Formality, polite: Politeness):
+        plan = _style_plans[True].get((MOOD_IMPERATIVE, TENSE_NON_PAST, formal, polite))
+        if plan is None:
+            raise RuntimeError(f'Imperative form of {formal}, {polite} not implemented')
+        return apply_plan(plan, analyze(word))
 
     @staticmethod
-    def hortative(word, formal, polite):
-        conjugate_methods = {
-                # non-past
-                (TENSE_NON_PAST, STYLE_FORMAL, STYLE_POLITE):
-                lambda x: get_eupsi(word) + '다',
-
-                (TENSE_NON_PAST, STYLE_FORMAL, STYLE_NON_POLITE):
-                lambda x: stem2.get_stem2(word) + '자',
-
-                (TENSE_NON_PAST, STYLE_INFORMAL, STYLE_POLITE):
-                lambda x: stem2.get_stem2(word) + polite_ending,
-
-                (TENSE_NON_PAST, STYLE_INFORMAL, STYLE_NON_POLITE):
-                lambda x: stem2.get_stem1(word)
-        }
-        method = conjugate_methods.get((TENSE_NON_PAST, formal, polite))
-        if method:
-            return method(word)
-        else:
-            raise RuntimeError(f'Assertive form of {formal}, {polite} not implemented')
+    def hortative(word, formal: Formality, polite: Politeness):
+        plan = _style_plans[True].get((MOOD_HORTATIVE, TENSE_NON_PAST, formal, polite))
+        if plan is None:
+            raise RuntimeError(f'Hortative form of {formal}, {polite} not implemented')
+        return apply_plan(plan, analyze(word))
+
+
+def _apply_all(analysis, form_ids):
+    plans = _plans[True]
+    return [apply_plan(plans[form_id], analysis) for form_id in form_ids]
 
 
 class ConnectiveForm:
     @staticmethod
-    def reason(word: str, irregular: bool):
-        st2 = stem2.get_stem2(word, irregular=irregular)
-        st3 = stem3.get_stem3(word, irregular=irregular)
-        return [st2, st2 + '서', st3 + '니', st3 + '니까']
+    def reason(word, irregular: bool):
+        return _apply_all(analyze(word, irregular), ('connective.reason.eo', 'connective.reason.eoseo',
+                                                     'connective.reason.euni', 'connective.reason.eunikka'))
 
     @staticmethod
     def contrast(word):
-        st1 = stem2.get_stem1(word)
-        return [st1 + '지만', st1 + '는데', st1 + '더니']
+        return _apply_all(analyze(word), ('connective.contrast.jiman', 'connective.contrast.neunde',
+                                          'connective.contrast.deoni'))
 
     @staticmethod
     def conjunction(word):
-        st1 = stem2.get_stem1(word)
-        return [st1 + '고']
+        return _apply_all(analyze(word), ('connective.conjunction.go',))
 
     @staticmethod
     def condition(word, irregular: bool):
-        return [stem3.get_stem3(word, irregular=irregular) + '면',
-                stem2.get_stem2(word, irregular=irregular) + '야']
+        return _apply_all(analyze(word, irregular), ('connective.condition.eumyeon', 'connective.condition.eoya'))
 
     @staticmethod
     def motive(word, irregular: bool):
-        return [stem3.get_stem3(word, irregular=irregular) + '려고']
+        return _apply_all(analyze(word, irregular), ('connective.motive.euryeogo',))
 
 
 def get_past_determiner(word, irregular):
@@ -262,9 +303,9 @@ def get_future_determiner(word, irregular):
 
 
 def get_past_and_future_determiner(word, irregular, regular_ending, p_irregular_ending, ending_final):
-    stem1 = stem2.get_stem1(word)
-    letters = jamo.decompose(stem1[-1])
-    if irregular and len(letters) == 3:
+    analysis = analyze(word, irregular)
+    stem1, letters = analysis.stem1, analysis.letters
+    if analysis.irregular and len(letters) == 3:
         if letters[2] == stem2.final_s:
             return stem1[:-1] + jamo.compose(letters[0], letters[1], None) + regular_ending  # s removed
         elif letters[2] == stem2.final_t:
@@ -279,12 +320,7 @@ def get_past_and_future_determiner(word, irregular, regular_ending, p_irregular_
 
 
 def get_present_determiner(word):
-    stem1 = stem2.get_stem1(word)
-    letters = jamo.decompose(stem1[-1])
-    if len(letters) == 3 and letters[2] == stem2.final_l:
-        return stem1[:-1] + jamo.compose(letters[0], letters[1], None) + '는'
-    else:
-        return stem1 + '는'
+    return drop_l(analyze(word).stem1) + '는'
 
 
 class DeterminerForm:
@@ -308,14 +344,434 @@ class NounForm:
 
     @staticmethod
     def get(word, tense: int, irregular: bool):
+        analysis = analyze(word, irregular)
         if tense == NounForm.PRESENT:
-            st1 = stem2.get_stem1(word)
-            letters = jamo.decompose(st1[-1])
-            if len(letters) == 3 and letters[2] == stem2.final_l:
-                nominalization = (st1[:-1] + jamo.compose(letters[0], letters[1], 'ᆱ'))
-            else:
-                nominalization = stem2.get_stem1(word) + '음'
-            return [nominalization, stem2.get_stem1(word) + '기']
+            return _apply_all(analysis, ('noun.present.eum', 'noun.present.gi'))
         elif tense == NounForm.PAST:
-            past = get_past(word, irregular)
-            return [past + '음', past + '기']
+            return _apply_all(analysis, ('noun.past.eum', 'noun.past.gi'))
+
+
+tense_names = {TENSE_NON_PAST: 'non_past', TENSE_PAST: 'past'}
+formality_names = {STYLE_FORMAL: 'formal', STYLE_INFORMAL: 'informal'}
+politeness_names = {STYLE_POLITE: 'polite', STYLE_NON_POLITE: 'non_polite'}
+
+# (formal, polite) in the order forms are listed by conjugate_all
+styles = ((STYLE_FORMAL, STYLE_POLITE),
+          (STYLE_FORMAL, STYLE_NON_POLITE),
+          (STYLE_INFORMAL, STYLE_POLITE),
+          (STYLE_INFORMAL, STYLE_NON_POLITE))
+
+MOOD_INDICATIVE = 'indicative'
+MOOD_INTERROGATIVE = 'interrogative'
+MOOD_IMPERATIVE = 'imperative'
+MOOD_HORTATIVE = 'hortative'
+MOOD_ASSERTIVE = 'assertive'
+
+honorific_suffix = '.honorific'
+
+
+def get_form_id(mood, tense, formal, polite, honorific=False):
+    """
+    Id of a sentence final form, e.g. 'indicative.past.formal.polite' or
+    'imperative.non_past.informal.polite.honorific'
+    """
+    return '.'.join((mood, tense_names[tense], formality_names[formal], politeness_names[polite])) + \
+        (honorific_suffix if honorific else '')
+
+
+# A form is a stem of LemmaAnalysis ('stem1', 'stem2', 'stem3', 'past') followed by a suffix.
+# Suffixes in grammar notation merge with the stem: (스)ㅂ니다 gives 갑니다, 삽니다, 먹습니다, see merge_final.
+# stem1 drops ㄹ before ㄴ, ㅂ and ㅅ. merge names a rule of _merge_rules for the rest (determiners)
+Template = collections.namedtuple('Template', ('stem', 'suffix', 'merge'), defaults=(None,))
+
+# (mood, tense) -> templates of styles in the order of styles
+style_templates = {
+    (MOOD_INDICATIVE, TENSE_NON_PAST): (Template('stem1', '(스)ㅂ니다'), Template('stem1', '(느)ㄴ다'),
+                                        Template('stem2', '요'), Template('stem2', '')),
+    (MOOD_INDICATIVE, TENSE_PAST): (Template('past', '습니다'), Template('past', '다'),
+                                    Template('past', '어요'), Template('past', '어')),
+    (MOOD_INTERROGATIVE, TENSE_NON_PAST): (Template('stem1', '(스)ㅂ니까'), Template('stem1', '니'),
+                                           Template('stem2', '요'), Template('stem2', '')),
+    (MOOD_INTERROGATIVE, TENSE_PAST): (Template('past', '습니까'), Template('past', '니'),
+                                       Template('past', '어요'), Template('past', '어')),
+    (MOOD_IMPERATIVE, TENSE_NON_PAST): (Template('stem1', '(으)ㅂ시오'), Template('stem2', '라'),
+                                        Template('stem2', '요'), Template('stem2', '')),
+    (MOOD_HORTATIVE, TENSE_NON_PAST): (Template('stem1', '(으)ㅂ시다'), Template('stem1', '자'),
+                                       Template('stem2', '요'), Template('stem2', '')),
+    (MOOD_ASSERTIVE, TENSE_NON_PAST): (Template('stem1', '겠습니다'), Template('stem1', '겠다'),
+                                       Template('stem1', '겠어요'), Template('stem1', '겠어')),
+}
+
+form_templates = {get_form_id(mood, tense, formal, polite): template
+                  for (mood, tense), templates in style_templates.items()
+                  for (formal, polite), template in zip(styles, templates)}
+form_templates.update({
+    'connective.reason.eo': Template('stem2', ''),
+    'connective.reason.eoseo': Template('stem2', '서'),
+    'connective.reason.euni': Template('stem3', '니'),
+    'connective.reason.eunikka': Template('stem3', '니까'),
+    'connective.contrast.jiman': Template('stem1', '지만'),
+    'connective.contrast.neunde': Template('stem1', '는데'),
+    'connective.contrast.deoni': Template('stem1', '더니'),
+    'connective.conjunction.go': Template('stem1', '고'),
+    'connective.condition.eumyeon': Template('stem3', '면'),
+    'connective.condition.eoya': Template('stem2', '야'),
+    'connective.motive.euryeogo': Template('stem3', '려고'),
+    'determiner.past': Template('stem1', '(으)ㄴ', 'determiner'),
+    'determiner.present': Template('stem1', '는'),
+    'determiner.future': Template('stem1', '(으)ㄹ', 'determiner'),
+    'noun.present.eum': Template('stem1', '(으)ㅁ'),
+    'noun.present.gi': Template('stem1', '기'),
+    'noun.past.eum': Template('past', '음'),
+    'noun.past.gi': Template('past', '기'),
+})
+
+# adjectives replacing a verb template
+adjective_templates = {get_form_id(MOOD_INDICATIVE, TENSE_NON_PAST, STYLE_FORMAL, STYLE_NON_POLITE):
+                       Template('stem1', word_ending)}
+
+
+def _style_ids(mood, tense, honorific=False):
+    return tuple(get_form_id(mood, tense, formal, polite, honorific) for formal, polite in styles)
+
+
+def _sentence_final_ids(honorific=False):
+    return tuple(form_id for mood, tense in style_templates for form_id in _style_ids(mood, tense, honorific))
+
+
+_connective_ids = ('connective.reason.eo', 'connective.reason.eoseo',
+                   'connective.reason.euni', 'connective.reason.eunikka',
+                   'connective.contrast.jiman', 'connective.contrast.neunde', 'connective.contrast.deoni',
+                   'connective.conjunction.go',
+                   'connective.condition.eumyeon', 'connective.condition.eoya',
+                   'connective.motive.euryeogo')
+_determiner_ids = ('determiner.past', 'determiner.present', 'determiner.future')
+_noun_ids = ('noun.present.eum', 'noun.present.gi', 'noun.past.eum', 'noun.past.gi')
+
+FORM_IDS = _sentence_final_ids() + _sentence_final_ids(honorific=True) + \
+    _connective_ids + _determiner_ids + _noun_ids
+
+# Compiled template: stem attribute of LemmaAnalysis, merge(stem, analysis) -> stem or None, suffix
+Plan = collections.namedtuple('Plan', ('stem', 'merge', 'suffix'))
+
+# What a merge function does, its rule attribute, so other engines (batch, tagger) derive their rules from the
+# plans: kind 'drop_l', 'merge_final' or 'determiner' of a final and connector, or 'drop_si' of honorific stems
+MergeRule = collections.namedtuple('MergeRule', ('kind', 'final', 'connector'), defaults=(None, None))
+
+
+def _parse_notation(suffix):
+    """
+    :return: (connector, final, rest) of a suffix in grammar notation, (으)ㄹ -> ('으', 'ㄹ', ''), None for others
+    """
+    if len(suffix) > 3 and suffix[0] == '(' and suffix[2] == ')' and suffix[3] in notation_finals:
+        return suffix[1], suffix[3], suffix[4:]
+    return None
+
+
+def _merge_determiner(final, connector):
+    regular_ending = merge_final('ᄋ' + connector[-1], final, connector)[-1:]
+    p_irregular_ending = jamo.compose('ᄋ', 'ᅮ', final)
+
+    def merge(stem, analysis):
+        # looked up on every call, so instrument sees the calls
+        return get_past_and_future_determiner(analysis, analysis.irregular, regular_ending, p_irregular_ending, final)
+    merge.rule = MergeRule('determiner', final, connector)
+    return merge
+
+
+_merge_rules = {'determiner': _merge_determiner}
+
+
+def _drop_l(head, analysis):
+    return drop_l(head)
+
+
+_drop_l.rule = MergeRule('drop_l')
+
+
+# syllables kept by the merge functions, emptied by clear_caches
+_merged_syllables = []
+
+
+@functools.lru_cache(None)
+def _merge_final(final, connector):
+    """
+    One merge function per final and connector, so conjugate_all merges once for all forms sharing it.
+    The merge only depends on the last syllable, merged syllables are kept (at most one per syllable)
+    """
+    merged = {}
+    _merged_syllables.append(merged)
+
+    def merge(head, analysis):
+        tail = merged.get(head[-1])
+        if tail is None:
+            tail = merged[head[-1]] = merge_final(head[-1], final, connector)
+        return head[:-1] + tail
+    merge.rule = MergeRule('merge_final', final, connector)
+    return merge
+
+
+def compile_template(template):
+    """
+    :return: Plan of a template, the work depending only on the template is done here
+    """
+    stem, suffix, merge = template
+    notation = _parse_notation(suffix)
+    if merge is not None:
+        if notation is None:
+            raise RuntimeError(f'{merge} merge needs a suffix in grammar notation, not {suffix}')
+        return Plan(stem, _merge_rules[merge](notation_finals[notation[1]], notation[0]), notation[2])
+    if notation is not None:
+        return Plan(stem, _merge_final(notation_finals[notation[1]], notation[0]), notation[2])
+    if stem == 'stem1' and suffix and jamo.decompose(suffix[0])[0] in l_dropping_initials:
+        return Plan(stem, _drop_l, suffix)
+    return Plan(stem, None, suffix)
+
+
+def apply_plan(plan, analysis):
+    head = getattr(analysis, plan.stem)
+    if plan.merge is not None:
+        head = plan.merge(head, analysis)
+    return head + plan.suffix
+
+
+def _drop_honorific_si(head, analysis):
+    return head[:-1]
+
+
+_drop_honorific_si.rule = MergeRule('drop_si')
+
+
+def _compile_plans(is_verb):
+    """
+    Plans of all forms. Honorific stems end with 시 and conjugate like 시다, so an honorific form is the
+    honorific stem without 시 followed by the regular form of 시다, computed here once
+    """
+    templates = dict(form_templates)
+    if not is_verb:
+        templates.update(adjective_templates)
+    plans = {form_id: compile_template(template) for form_id, template in templates.items()}
+    model = LemmaAnalysis('시다', False)
+    for form_id in _sentence_final_ids():
+        plans[form_id + honorific_suffix] = Plan('honorific', _drop_honorific_si, apply_plan(plans[form_id], model))
+    assert set(plans) == set(FORM_IDS)
+    return plans
+
+
+class _LazyTable(dict):
+    """
+    is_verb -> table, a table is built by build(is_verb) on first use instead of at import.
+    Threads racing on first use may each build it, setdefault keeps the first so all use the same table
+    """
+    __slots__ = ('build',)
+
+    def __init__(self, build):
+        super().__init__()
+        self.build = build
+
+    def __missing__(self, is_verb):
+        return self.setdefault(is_verb, self.build(is_verb))
+
+
+# is_verb -> form id -> Plan
+_plans = _LazyTable(_compile_plans)
+
+# is_verb -> (mood, tense, formal, polite) -> Plan of the regular sentence final forms
+_style_plans = _LazyTable(lambda is_verb: {(mood, tense, formal, polite): _plans[is_verb][get_form_id(mood, tense,
+                                                                                                    formal, polite)]
+                                           for mood, tense in style_templates for formal, polite in styles})
+
+# endings kept per stem group, a group's endings depend only on the stem's last syllable and the irregular flag
+ending_cache_size = 4096
+
+# (stem tail, is_verb, irregular) -> form ids and forms of the tail, see _stem_tail
+paradigm_cache_size = 4096
+_tail_paradigms = {}
+
+
+def _group_plans(plans):
+    """
+    Plans grouped by stem in FORM_IDS order, so conjugate_all computes a stem once and a stem the rules cannot
+    produce drops only its group
+    :return: tuple of (stem, merges, form ids, function picking the merged stem of every form, suffixes,
+             dict of endings)
+    """
+    groups = {}
+    for form_id in FORM_IDS:
+        plan = plans[form_id]
+        merges, entries = groups.setdefault(plan.stem, ([], []))
+        if plan.merge not in merges:
+            merges.append(plan.merge)
+        entries.append((form_id, merges.index(plan.merge), plan.suffix))
+    result = []
+    for stem, (merges, entries) in groups.items():
+        form_ids, indexes, suffixes = zip(*entries)
+        # itemgetter of one index returns the item, not a tuple
+        pick = operator.itemgetter(*indexes) if len(indexes) > 1 else lambda heads: (heads[indexes[0]],)
+        result.append((stem, tuple(merges), form_ids, pick, suffixes, {}))
+    return tuple(result)
+
+
+_plan_groups = _LazyTable(lambda is_verb: _group_plans(_plans[is_verb]))
+
+
+def _endings(stem, analysis, merges, pick, suffixes):
+    """
+    Forms of a group without stem[:-1]
+    """
+    start = len(stem) - 1
+    heads = [stem[start:] if merge is None else merge(stem, analysis)[start:] for merge in merges]
+    return tuple(map(operator.add, pick(heads), suffixes))
+
+
+def _group_endings(stem, analysis, merges, pick, suffixes, endings):
+    """
+    _endings kept in endings. Merge rules only rewrite the last syllable of a stem,
+    so they are run once per (last syllable, irregular)
+    """
+    key = (stem[-1], analysis.irregular)
+    result = endings.get(key)
+    if result is None:
+        result = _endings(stem, analysis, merges, pick, suffixes)
+        if len(endings) >= ending_cache_size:
+            endings.clear()
+        endings[key] = result
+    return result
+
+
+def _stem_tail(analysis):
+    """
+    End of stem1 conjugating like the whole stem: the stem rules look at the last two syllables only, honorific
+    versions (드시다) at the whole word
+    """
+    stem1 = analysis.stem1
+    tail = stem1[-2:]
+    if tail != stem1 and (analysis.word in stem3.honorific_versions or tail + '다' in stem3.honorific_versions):
+        return stem1
+    return tail
+
+
+def _conjugate_groups(analysis, is_verb):
+    """
+    :return: form ids and forms of the plan groups whose stem the rules can produce
+    """
+    form_ids, forms = [], []
+    for stem, merges, group_ids, pick, suffixes, endings in _plan_groups[is_verb]:
+        try:
+            stem = analysis.stem_or_none(stem)
+        except RuntimeError:
+            continue    # a syllable before the last one is not Hangul
+        if stem is None:
+            continue
+        form_ids += group_ids
+        forms += map(stem[:-1].__add__, _group_endings(stem, analysis, merges, pick, suffixes, endings))
+    return tuple(form_ids), tuple(forms)
+
+
+def _tail_paradigm(analysis, tail, is_verb):
+    """
+    _conjugate_groups of the stem tail kept per (tail, is_verb, irregular), so words ending alike (가다, 나가다)
+    share one paradigm of the tail and run no rule after the first
+    """
+    key = (tail, is_verb, analysis.irregular)
+    result = _tail_paradigms.get(key)
+    if result is None:
+        if tail != analysis.stem1:
+            analysis = LemmaAnalysis(tail + '다', analysis.irregular)
+        result = _conjugate_groups(analysis, is_verb)
+        if len(_tail_paradigms) >= paradigm_cache_size:
+            _tail_paradigms.clear()
+        _tail_paradigms[key] = result
+    return result
+
+
+def clear_caches():
+    """
+    Forgets the paradigms conjugate_all keeps per stem tail, the endings kept per last syllable and the syllables
+    merge rules keep, so the next calls run every rule again. Compiled plans are kept
+    """
+    _tail_paradigms.clear()
+    for merged in _merged_syllables:
+        merged.clear()
+    for groups in list(_plan_groups.values()):
+        for group in groups:
+            group[-1].clear()
+
+
+def conjugate_all(word, is_verb=True, irregular=None):
+    """
+    All forms of a word in one pass, keyed by form id (see FORM_IDS).
+    Forms the rules cannot produce for the word, e.g. stem3 of an irregular 르 verb, are left out
+    :param word: dictionary form or LemmaAnalysis
+    :param irregular: looked up in the lexicon if omitted
+    :return: dict form id -> form
+    """
+    analysis = analyze(word, irregular)
+    tail = _stem_tail(analysis)
+    form_ids, forms = _tail_paradigm(analysis, tail, bool(is_verb))
+    if len(tail) == len(analysis.stem1):
+        return dict(zip(form_ids, forms))
+    return dict(zip(form_ids, map(analysis.stem1[:-len(tail)].__add__, forms)))
+
+
+def conjugate(word, form_id, is_verb=True, irregular=None):
+    """
+    Single form of a word, a precompiled plan applied to the word's stems
+    :param word: dictionary form or LemmaAnalysis
+    :param form_id: see FORM_IDS
+    :param irregular: looked up in the lexicon if omitted
+    """
+    plan = _plans[bool(is_verb)].get(form_id)
+    if plan is None:
+        raise RuntimeError(f'{form_id} not implemented')
+    return apply_plan(plan, analyze(word, irregular))
+
+
+# error codes of conjugate_checked
+ERROR_NOT_A_PREDICATE = 'not_a_predicate'
+ERROR_IMPOSSIBLE_IRREGULAR = 'impossible_irregular'
+ERROR_UNSUPPORTED_FORM = 'unsupported_form'
+
+CheckedForms = collections.namedtuple('CheckedForms', ('forms', 'errors'))
+
+
+def conjugate_checked(words, form_id, is_verb=True, irregular=None):
+    """
+    conjugate of many words in one pass without raising, every bad word is reported instead of the first one
+    stopping the batch
+    :param irregular: sequence of flags, looked up in the lexicon if omitted or None
+    :return: CheckedForms, forms in word order with None for words that cannot be conjugated, errors
+             dict word index -> one of ERROR_* for these words
+    :raise ValueError: irregular and words differ in length
+    """
+    words = list(words)
+    if irregular is not None:
+        irregular = list(irregular)
+        if len(irregular) != len(words):
+            raise ValueError(f'{len(irregular)} irregular flags for {len(words)} words')
+    plan = _plans[bool(is_verb)].get(form_id)
+    if plan is None:
+        return CheckedForms([None] * len(words), dict.fromkeys(range(len(words)), ERROR_UNSUPPORTED_FORM))
+    get_stem = _stem_getters[plan.stem]
+    merge, suffix = plan.merge, plan.suffix
+    is_predicate = stem2.is_predicate
+    forms, errors = [], {}
+    for i, (word, irr) in enumerate(zip(words, irregular if irregular is not None else [None] * len(words))):
+        if not is_predicate(word):
+            errors[i] = ERROR_NOT_A_PREDICATE
+            forms.append(None)
+            continue
+        analysis = LemmaAnalysis(word, irr)
+        head = get_stem(analysis)
+        if head is None:
+            errors[i] = ERROR_IMPOSSIBLE_IRREGULAR
+            forms.append(None)
+            continue
+        if merge is not None:
+            head = merge(head, analysis)
+        forms.append(head + suffix)
+    return CheckedForms(forms, errors)
+
+if __name__ == '__main__':
+    import cli
+    cli.main()
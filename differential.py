@@ -0,0 +1,237 @@
+import argparse
+import collections
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import batch
+import cache
+import conjugator
+import jamo
+import reference
+import stem3
+import store
+
+
+Mismatch = collections.namedtuple('Mismatch', ('engine', 'word', 'is_verb', 'irregular', 'form_id', 'expected',
+                                               'actual'))
+Report = collections.namedtuple('Report', ('forms', 'mismatches', 'examples', 'seconds'))
+
+# syllables put in front of every stem ending: none, and the ones the stem rules look at. 아 and 오 are bright
+# (돕다 -> 도와, but 아름답다 -> 아름다워), only ㅏ makes ㅡ stems take 아 (아프다 -> 아파), 악 is closed
+# (a 르 stem needs an open syllable before 르)
+prefixes = ('', '아', '오', '어', '악')
+
+
+def get_words(step=1):
+    """
+    Every step-th precomposed syllable as the last syllable of a stem, after every prefix,
+    and the words with their own honorific stem
+    """
+    syllables = [chr(code) for code in range(jamo.SBase, jamo.SBase + jamo.SCount, step)]
+    return [prefix + syllable + '다' for prefix in prefixes for syllable in syllables] + list(stem3.honorific_versions)
+
+
+def run_reference(words, is_verb, irregular):
+    """
+    reference.conjugate_all, the hand written form rules the engines have to match. The engines all run the
+    compiled plans, so the reference does not
+    :return: per word a tuple of forms in FORM_IDS order, None for forms the rules cannot produce
+    """
+    rows = []
+    for word in words:
+        forms = reference.conjugate_all(word, is_verb, irregular)
+        rows.append(tuple(map(forms.get, conjugator.FORM_IDS)))
+    return rows
+
+
+def run_conjugate(words, is_verb, irregular):
+    """
+    One conjugator.conjugate call per form
+    """
+    rows = []
+    for word in words:
+        row = []
+        for form_id in conjugator.FORM_IDS:
+            try:
+                row.append(conjugator.conjugate(word, form_id, is_verb, irregular))
+            except RuntimeError:
+                row.append(None)
+        rows.append(tuple(row))
+    return rows
+
+
+def run_paradigm(words, is_verb, irregular):
+    """
+    conjugator.conjugate_all, plans grouped by stem with endings memoized per last syllable
+    """
+    rows = []
+    for word in words:
+        forms = conjugator.conjugate_all(word, is_verb, irregular)
+        rows.append(tuple(map(forms.get, conjugator.FORM_IDS)))
+    return rows
+
+
+def run_cached(words, is_verb, irregular):
+    """
+    run_conjugate with cache.enable, every form of a word after the first gets its LemmaAnalysis from the cache
+    """
+    enabled = cache.is_enabled()
+    if not enabled:
+        cache.enable()
+    try:
+        return run_conjugate(words, is_verb, irregular)
+    finally:
+        if not enabled:
+            cache.disable()
+
+
+def run_checked(words, is_verb, irregular):
+    flags = [irregular] * len(words)
+    return list(zip(*(conjugator.conjugate_checked(words, form_id, is_verb, flags).forms
+                      for form_id in conjugator.FORM_IDS)))
+
+
+def run_batch(words, is_verb, irregular):
+    """
+    batch.conjugate_batch, NumPy array rules if NumPy is installed
+    """
+    flags = [irregular] * len(words)
+    return list(zip(*(batch.conjugate_batch(words, form_id, is_verb, flags) for form_id in conjugator.FORM_IDS)))
+
+
+def run_store(words, is_verb, irregular):
+    """
+    store.ParadigmStore lookups, the time includes building the store
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'paradigms')
+        store.build_store(path, [(word, is_verb, irregular) for word in words])
+        rows = []
+        with store.ParadigmStore(path) as paradigms:
+            for word in words:
+                row = []
+                for form_id in conjugator.FORM_IDS:
+                    try:
+                        row.append(paradigms.lookup(word, form_id, is_verb, irregular))
+                    except RuntimeError:
+                        row.append(None)
+                rows.append(tuple(row))
+    return rows
+
+
+# engine name -> function(words, is_verb, irregular) returning rows like run_reference
+engines = {'reference': run_reference,
+           'conjugate': run_conjugate,
+           'cached': run_cached,
+           'conjugate_all': run_paradigm,
+           'conjugate_checked': run_checked,
+           'conjugate_batch': run_batch,
+           'store': run_store}
+
+
+def compare_chunk(words, names, max_examples=10):
+    """
+    Runs the reference and the named engines on words as verbs and adjectives, regular and irregular
+    :return: (number of forms compared per engine, mismatch count per engine, examples per engine, seconds
+             per engine)
+    """
+    mismatches = collections.Counter()
+    examples = collections.defaultdict(list)
+    seconds = collections.Counter()
+    for is_verb in (True, False):
+        for irregular in (False, True):
+            rows = {}
+            for name in ('reference',) + tuple(names):
+                start = time.perf_counter()
+                rows[name] = engines[name](words, is_verb, irregular)
+                seconds[name] += time.perf_counter() - start
+            for name in names:
+                for word, expected_row, actual_row in zip(words, rows['reference'], rows[name]):
+                    if expected_row == actual_row:
+                        continue
+                    for form_id, expected, actual in zip(conjugator.FORM_IDS, expected_row, actual_row):
+                        if expected != actual:
+                            mismatches[name] += 1
+                            if len(examples[name]) < max_examples:
+                                examples[name].append(Mismatch(name, word, is_verb, irregular, form_id, expected,
+                                                               actual))
+    return len(words) * 4 * len(conjugator.FORM_IDS), mismatches, dict(examples), seconds
+
+
+def _compare_task(args):
+    return compare_chunk(*args)
+
+
+def run(names=None, words=None, processes=None, chunk_size=500, max_examples=10):
+    """
+    Compares engines with the reference on chunks of words on a process pool
+    :param names: engines other than the reference, all by default
+    :param words: get_words() by default
+    :param processes: pool size, CPU count by default, 1 runs in this process
+    :return: Report, seconds are summed over the processes
+    """
+    names = tuple(name for name in engines if name != 'reference') if names is None else tuple(names)
+    words = get_words() if words is None else list(words)
+    tasks = [(words[i:i + chunk_size], names, max_examples) for i in range(0, len(words), chunk_size)]
+    forms = 0
+    mismatches = collections.Counter()
+    examples = collections.defaultdict(list)
+    seconds = collections.Counter()
+
+    def collect(results):
+        nonlocal forms
+        for chunk_forms, chunk_mismatches, chunk_examples, chunk_seconds in results:
+            forms += chunk_forms
+            mismatches.update(chunk_mismatches)
+            seconds.update(chunk_seconds)
+            for name, found in chunk_examples.items():
+                examples[name].extend(found[:max_examples - len(examples[name])])
+
+    if processes == 1:
+        collect(map(_compare_task, tasks))
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            collect(pool.imap_unordered(_compare_task, tasks))
+    return Report(forms, mismatches, dict(examples), seconds)
+
+
+def print_report(report, file=sys.stdout):
+    print(f'{report.forms} forms per engine', file=file)
+    reference = report.seconds['reference']
+    for name, seconds in report.seconds.items():
+        print(f'{name:<20} {report.forms / seconds:12.0f} forms/sec {reference / seconds:8.2f}x '
+              f'{report.mismatches[name]:10d} mismatches', file=file)
+    for found in report.examples.values():
+        for mismatch in found:
+            print(f'MISMATCH {mismatch.engine}: {mismatch.word} is_verb={mismatch.is_verb} '
+                  f'irregular={mismatch.irregular} {mismatch.form_id}: {mismatch.expected} != {mismatch.actual}',
+                  file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare conjugation engines with the reference rules on every '
+                                                 'Hangul syllable as stem ending')
+    parser.add_argument('-j', '--processes', type=int, default=None, help='pool processes, CPU count by default')
+    parser.add_argument('--engines', default=','.join(name for name in engines if name != 'reference'),
+                        help='comma separated engines compared with the reference')
+    parser.add_argument('--step', type=int, default=1, help='use every step-th syllable, for a quick run')
+    parser.add_argument('--chunk-size', type=int, default=500, help='words per task')
+    parser.add_argument('--examples', type=int, default=10, help='mismatches listed per engine')
+    args = parser.parse_args(argv)
+
+    names = [name for name in args.engines.split(',') if name]
+    unknown = [name for name in names if name not in engines]
+    if unknown:
+        parser.error(f'unknown engines: {", ".join(unknown)}')
+    start = time.perf_counter()
+    report = run(names, get_words(args.step), args.processes, args.chunk_size, args.examples)
+    print_report(report)
+    print(f'{time.perf_counter() - start:.1f} s')
+    return 1 if sum(report.mismatches.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
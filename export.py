@@ -0,0 +1,294 @@
+import argparse
+import ast
+import bisect
+import collections
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+
+import conjugator
+import lexicon
+import stem2
+import stem3
+
+
+format_version = 1
+manifest_name = 'manifest.json'
+paradigms_dir = 'paradigms'
+diff_name = 'diff.jsonl'
+
+rule_modules = (stem2, stem3, conjugator)
+
+Change = collections.namedtuple('Change', ('lemma', 'is_verb', 'form_id', 'old', 'new'))
+ExportResult = collections.namedtuple('ExportResult', ('lemmas', 'regenerated', 'removed', 'changes'))
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def get_module_fingerprints(module):
+    """
+    Digest of every function and method of a rule module keyed by module and qualified name, e.g.
+    'stem2.get_stem1', and of the rest of the module (constants, templates, class attributes) keyed by its name.
+    Digests are taken from the syntax tree, so comments and formatting do not count
+    """
+    fingerprints = {}
+    rest = []
+    for node in ast.parse(inspect.getsource(module)).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            fingerprints[f'{module.__name__}.{node.name}'] = _digest(ast.dump(node))
+        elif isinstance(node, ast.ClassDef):
+            rest.append(ast.dump(ast.ClassDef(node.name, node.bases, node.keywords, [], node.decorator_list)))
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    fingerprints[f'{module.__name__}.{node.name}.{item.name}'] = _digest(ast.dump(item))
+                else:
+                    rest.append(ast.dump(item))
+        else:
+            rest.append(ast.dump(node))
+    fingerprints[module.__name__] = _digest('\n'.join(rest))
+    return fingerprints
+
+
+def get_rule_fingerprints(cached=None):
+    """
+    get_module_fingerprints of all rule modules
+    :param cached: dict module name -> [size, modification time, fingerprints] of the module files, entries of
+                   unchanged files are used instead of parsing them, new entries are added
+    """
+    cached = {} if cached is None else cached
+    fingerprints = {}
+    for module in rule_modules:
+        stat = os.stat(module.__file__)
+        entry = cached.get(module.__name__)
+        if entry is None or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+            entry = cached[module.__name__] = [stat.st_size, stat.st_mtime_ns, get_module_fingerprints(module)]
+        fingerprints.update(entry[2])
+    return fingerprints
+
+
+def get_definitions(module):
+    """
+    Functions and methods of a module by line, for interpreters before 3.11 whose code objects have no co_qualname
+    :return: sorted list of (first line, last line, qualified name), decorators included
+    """
+    functions = (ast.FunctionDef, ast.AsyncFunctionDef)
+    definitions = []
+    for node in ast.parse(inspect.getsource(module)).body:
+        if isinstance(node, functions):
+            items = [(node, node.name)]
+        elif isinstance(node, ast.ClassDef):
+            items = [(item, f'{node.name}.{item.name}') for item in node.body if isinstance(item, functions)]
+        else:
+            continue
+        for item, name in items:
+            first = min([item.lineno] + [decorator.lineno for decorator in item.decorator_list])
+            definitions.append((first, item.end_lineno, name))
+    return sorted(definitions)
+
+
+def _enclosing_name(code, definitions):
+    """
+    Qualified name of the function or method whose lines hold a code object, None for module level code
+    """
+    i = bisect.bisect_right(definitions, (code.co_firstlineno, float('inf'))) - 1
+    if i >= 0 and code.co_firstlineno <= definitions[i][1]:
+        return definitions[i][2]
+    return None
+
+
+class _Tracer:
+    """
+    Records the functions of the rule modules called while active, nested functions and lambdas count as the
+    function defining them
+    """
+    def __init__(self):
+        self._modules = {module.__file__: module.__name__ for module in rule_modules}
+        self._definitions = {}
+        self._previous = None
+        self.called = set()
+
+    def _profile(self, frame, event, arg):
+        if event == 'call' and frame.f_code.co_filename in self._modules:
+            self.called.add(frame.f_code)
+
+    def __enter__(self):
+        self.called = set()
+        self._previous = sys.getprofile()
+        sys.setprofile(self._profile)
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.setprofile(self._previous)
+
+    def _qualname(self, code):
+        if hasattr(code, 'co_qualname'):
+            qualname = code.co_qualname.split('.<locals>', 1)[0]
+            return None if qualname.startswith('<') else qualname
+        definitions = self._definitions.get(code.co_filename)
+        if definitions is None:
+            module = next(module for module in rule_modules if module.__file__ == code.co_filename)
+            definitions = self._definitions[code.co_filename] = get_definitions(module)
+        return _enclosing_name(code, definitions)
+
+    def names(self):
+        names = set()
+        for code in self.called:
+            qualname = self._qualname(code)
+            if qualname is not None:
+                names.add(f'{self._modules[code.co_filename]}.{qualname}')
+        return names
+
+
+def _get_shared_rules(fingerprints):
+    """
+    Digest of what every lemma depends on: the module level code of the rule modules and the functions compiling
+    the templates into plans
+    """
+    with _Tracer() as tracer:
+        for is_verb in (True, False):
+            conjugator._group_plans(conjugator._compile_plans(is_verb))
+    names = sorted(tracer.names() | {module.__name__ for module in rule_modules})
+    return _digest('\n'.join(f'{name} {fingerprints.get(name)}' for name in names + list(conjugator.FORM_IDS)))
+
+
+def _trace_lemma(word, is_verb, irregular):
+    """
+    Forms of a lemma and the rule functions producing them, run without the memos of conjugate_all
+    so every rule the lemma needs is called
+    """
+    conjugator.clear_caches()
+    with _Tracer() as tracer:
+        # analyzed here, an analysis cache.enable keeps would skip the stem rules
+        forms = conjugator.conjugate_all(conjugator.LemmaAnalysis(word, irregular), is_verb)
+    return forms, tracer.names()
+
+
+def get_lemma_hash(word, is_verb, irregular, rules, fingerprints, shared):
+    """
+    :param rules: names of the rule functions the lemma calls
+    :return: digest of the lemma, its irregular class and the rules it depends on
+    """
+    irregular_class = conjugator.analyze(word, irregular).irregular_class
+    parts = [str(format_version), word, str(bool(is_verb)), str(irregular), str(irregular_class), shared]
+    parts += (f'{name} {fingerprints.get(name)}' for name in sorted(rules))
+    return _digest('\n'.join(parts))
+
+
+def _paradigm_path(directory, word, is_verb):
+    return os.path.join(directory, paradigms_dir, f'{_digest(f"{word} {bool(is_verb)}")}.json')
+
+
+def _read_manifest(directory):
+    """
+    :return: dict (word, is_verb) -> (hash, rule names), fingerprints cached per module, both empty for a new
+             or incompatible export
+    """
+    try:
+        with open(os.path.join(directory, manifest_name), encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}
+    if not isinstance(data, dict) or data.get('format_version') != format_version:
+        return {}, {}
+    rule_sets = [frozenset(names) for names in data['rule_sets']]
+    return ({(word, is_verb): (digest, rule_sets[rule_set]) for word, is_verb, digest, rule_set in data['lemmas']},
+            data['modules'])
+
+
+def _write_manifest(directory, entries, modules):
+    rule_set_ids = {}
+    lemmas = []
+    for (word, is_verb), (digest, rules) in sorted(entries.items()):
+        rule_set = rule_set_ids.setdefault(frozenset(rules), len(rule_set_ids))
+        lemmas.append([word, is_verb, digest, rule_set])
+    data = {'format_version': format_version,
+            'modules': modules,
+            'rule_sets': [sorted(rules) for rules in rule_set_ids],
+            'lemmas': lemmas}
+    path = os.path.join(directory, manifest_name)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def _read_forms(directory, word, is_verb):
+    try:
+        with open(_paradigm_path(directory, word, is_verb), encoding='utf-8') as f:
+            return json.load(f)['forms']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _diff(word, is_verb, old, new):
+    return [Change(word, is_verb, form_id, old.get(form_id), new.get(form_id))
+            for form_id in conjugator.FORM_IDS if old.get(form_id) != new.get(form_id)]
+
+
+def export(directory, lemmas=None):
+    """
+    Writes the paradigm of every lemma to directory/paradigms, one JSON file per lemma, and a manifest of lemma
+    hashes. A lemma is regenerated only if its hash changed: the word, its irregular flag and class, or the
+    source of a rule function its conjugation calls. Changes to module level code and plan compilation
+    regenerate every lemma. The forms that changed are written to directory/diff.jsonl
+    :param lemmas: iterable of (word, is_verb, irregular), lexicon.get_lemmas() by default
+    :return: ExportResult, lemmas exported, lemmas regenerated and removed, list of Change, old or new is None
+             for a form added or removed
+    """
+    lemmas = lexicon.get_lemmas() if lemmas is None else lemmas
+    os.makedirs(os.path.join(directory, paradigms_dir), exist_ok=True)
+    previous, modules = _read_manifest(directory)
+    fingerprints = get_rule_fingerprints(modules)
+    shared = _get_shared_rules(fingerprints)
+    entries = {}
+    changes = []
+    regenerated = 0
+    for word, is_verb, irregular in lemmas:
+        key = (word, bool(is_verb))
+        if key in entries:
+            continue
+        old = previous.get(key)
+        try:
+            if old is not None and old[0] == get_lemma_hash(word, is_verb, irregular, old[1], fingerprints, shared):
+                entries[key] = old
+                continue
+            forms, rules = _trace_lemma(word, is_verb, irregular)
+        except RuntimeError:
+            continue
+        entries[key] = (get_lemma_hash(word, is_verb, irregular, rules, fingerprints, shared), rules)
+        regenerated += 1
+        changes += _diff(word, key[1], _read_forms(directory, *key) if old is not None else {}, forms)
+        with open(_paradigm_path(directory, *key), 'w', encoding='utf-8') as f:
+            json.dump({'lemma': word, 'is_verb': key[1], 'irregular': irregular, 'forms': forms}, f,
+                      ensure_ascii=False)
+    removed = [key for key in previous if key not in entries]
+    for key in removed:
+        changes += _diff(*key, _read_forms(directory, *key), {})
+        try:
+            os.remove(_paradigm_path(directory, *key))
+        except OSError:
+            pass
+    _write_manifest(directory, entries, modules)
+    with open(os.path.join(directory, diff_name), 'w', encoding='utf-8') as f:
+        for change in changes:
+            f.write(json.dumps(change._asdict(), ensure_ascii=False) + '\n')
+    return ExportResult(len(entries), regenerated, len(removed), changes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export paradigms of the lexicon, regenerating only lemmas whose '
+                                                 'word, irregularity or rules changed since the last export')
+    parser.add_argument('directory')
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    result = export(args.directory)
+    print(f'{result.lemmas} lemmas, {result.regenerated} regenerated, {result.removed} removed, '
+          f'{len(result.changes)} forms changed in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
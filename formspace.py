@@ -0,0 +1,119 @@
+import collections
+import random
+
+import conjugator
+
+
+FormAddress = collections.namedtuple('FormAddress', ('lemma_index', 'form_id', 'mood', 'tense', 'formal', 'polite',
+                                                     'honorific'))
+
+_tenses = {name: tense for tense, name in conjugator.tense_names.items()}
+_formalities = {name: formal for formal, name in conjugator.formality_names.items()}
+_politenesses = {name: polite for polite, name in conjugator.politeness_names.items()}
+# ConnectiveForm, DeterminerForm and NounForm ids start with their kind
+_other_kinds = ('connective', 'determiner', 'noun')
+
+
+def get_axes(form_id):
+    """
+    :return: (mood, tense, formal, polite, honorific) of a form id. Sentence final forms give conjugator.Tense,
+             Formality and Politeness members, the others their kind as mood, e.g. 'connective', and None
+    """
+    if form_id not in conjugator.FORM_IDS:
+        raise RuntimeError(f'{form_id} not implemented')
+    parts = form_id.split('.')
+    if parts[0] in _other_kinds:
+        return parts[0], None, None, None, False
+    return parts[0], _tenses[parts[1]], _formalities[parts[2]], _politenesses[parts[3]], len(parts) == 5
+
+
+class FormSpace:
+    """
+    Every (lemma, form) pair of a lemma sequence under a dense id, lemma major:
+    id = lemma index * number of forms + form index. Addresses are computed from the id, so a space of billions
+    of pairs can be sampled or split into shards without building it. The lemma sequence needs only len and
+    indexing
+    """
+    def __init__(self, lemmas, form_ids=None):
+        """
+        :param lemmas: sequence of (word, is_verb, irregular), e.g. lexicon.get_lemmas()
+        :param form_ids: forms of each lemma in id order, FORM_IDS by default
+        """
+        self.lemmas = lemmas
+        self.form_ids = conjugator.FORM_IDS if form_ids is None else tuple(form_ids)
+        self._axes = [get_axes(form_id) for form_id in self.form_ids]
+        self._form_index = {form_id: i for i, form_id in enumerate(self.form_ids)}
+        if len(self._form_index) != len(self.form_ids):
+            raise RuntimeError('form ids are not unique')
+
+    def __len__(self):
+        return len(self.lemmas) * len(self.form_ids)
+
+    def _check(self, i):
+        size = len(self)
+        if i < 0:
+            i += size
+        if not 0 <= i < size:
+            raise IndexError(f'form id {i} out of range')
+        return i
+
+    def form_at(self, i):
+        """
+        :param i: id, negative ids count from the end
+        :return: FormAddress
+        """
+        lemma_index, form_index = divmod(self._check(i), len(self.form_ids))
+        return FormAddress(lemma_index, self.form_ids[form_index], *self._axes[form_index])
+
+    def index_of(self, lemma_index, form_id):
+        """
+        Inverse of form_at
+        """
+        form_index = self._form_index.get(form_id)
+        if form_index is None:
+            raise RuntimeError(f'{form_id} not in this space')
+        if not 0 <= lemma_index < len(self.lemmas):
+            raise IndexError(f'lemma index {lemma_index} out of range')
+        return lemma_index * len(self.form_ids) + form_index
+
+    def iter_range(self, start=0, stop=None):
+        """
+        Addresses of the ids from start to stop, which are clamped and may be negative like slice bounds
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        count = len(self.form_ids)
+        lemma_index, form_index = divmod(start, count)
+        form_ids = self.form_ids
+        axes = self._axes
+        for _ in range(stop - start):
+            yield FormAddress(lemma_index, form_ids[form_index], *axes[form_index])
+            form_index += 1
+            if form_index == count:
+                form_index = 0
+                lemma_index += 1
+
+    def shard(self, index, count):
+        """
+        :return: range of the ids of shard index out of count contiguous shards differing in size by at most one
+        """
+        if not 0 <= index < count:
+            raise IndexError(f'shard {index} out of range for {count} shards')
+        size = len(self)
+        return range(size * index // count, size * (index + 1) // count)
+
+    def shards(self, count):
+        return [self.shard(index, count) for index in range(count)]
+
+    def sample(self, k, rng=random):
+        """
+        :return: k addresses drawn without replacement, in O(k) whatever the size of the space
+        """
+        return [self.form_at(i) for i in rng.sample(range(len(self)), k)]
+
+    def conjugate_at(self, i):
+        """
+        :raise RuntimeError: the rules cannot produce the form
+        """
+        address = self.form_at(i)
+        word, is_verb, irregular = self.lemmas[address.lemma_index]
+        return conjugator.conjugate(word, address.form_id, is_verb, irregular)
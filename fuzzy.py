@@ -0,0 +1,220 @@
+import collections
+import heapq
+import marshal
+import unicodedata
+
+import conjugator
+from analyzer import Analysis
+from autocomplete import to_jamo
+
+
+Correction = collections.namedtuple('Correction', ('surface', 'distance', 'analyses'))
+
+format_version = 2
+
+# analysis code: lemma id << form_bits | form index
+form_bits = 16
+# child key: node << distance_bits | distance, surfaces are limited to max_letters jamo so distances fit
+distance_bits = 8
+max_letters = (1 << distance_bits) - 1
+
+
+def matcher(pattern):
+    """
+    Levenshtein distance to one pattern, Myers' bit-parallel algorithm: one pass over the other string with the
+    pattern's columns as bits of an integer. On jamo strings a wrong letter costs 1 and a wrong syllable up to 3
+    :return: function text -> distance between pattern and text
+    """
+    m = len(pattern)
+    if not m:
+        return len
+    columns = {}
+    for i, letter in enumerate(pattern):
+        columns[letter] = columns.get(letter, 0) | 1 << i
+    mask = (1 << m) - 1
+    last = 1 << m - 1
+    get = columns.get
+
+    def distance(text):
+        positive = mask
+        negative = 0
+        score = m
+        for letter in text:
+            equal = get(letter, 0)
+            vertical = equal | negative
+            horizontal = (((equal & positive) + positive) ^ positive) | equal
+            horizontal_positive = negative | ~(horizontal | positive)
+            horizontal_negative = positive & horizontal
+            if horizontal_positive & last:
+                score += 1
+            elif horizontal_negative & last:
+                score -= 1
+            horizontal_positive = horizontal_positive << 1 | 1
+            positive = (horizontal_negative << 1 | ~(vertical | horizontal_positive)) & mask
+            negative = horizontal_positive & vertical
+        return score
+
+    return distance
+
+
+def distance(a, b):
+    """
+    Levenshtein distance
+    """
+    return matcher(a)(b)
+
+
+class FuzzyIndex:
+    """
+    BK-tree of conjugated forms keyed by jamo, for the nearest forms to a misspelled one (먹었읍니다 -> 먹었습니다).
+    Every node is a surface, its children are keyed by their distance to it. By the triangle inequality a lookup
+    only descends into children whose key is within the k-th best distance found of the query's distance to the
+    node, so it visits a small part of the tree. Forms can be added at any time, but not while other threads
+    add or look up forms
+    """
+    def __init__(self):
+        self._letters = []      # node -> jamo of the surface, the surface is their NFC
+        self._children = {}     # node << distance_bits | distance -> child node
+        self._analyses = []     # node -> analysis code or tuple of codes, lemma id << form_bits | form index
+        self._lemmas = []
+        self._lemma_ids = {}
+        self._forms = list(conjugator.FORM_IDS)
+        self._form_ids = {form_id: i for i, form_id in enumerate(self._forms)}
+
+    @classmethod
+    def from_lemmas(cls, lemmas):
+        """
+        :param lemmas: iterable of (word, is_verb, irregular), e.g. lexicon.get_lemmas()
+        """
+        index = cls()
+        for word, is_verb, irregular in lemmas:
+            try:
+                forms = conjugator.conjugate_all(word, is_verb, irregular)
+            except RuntimeError:
+                continue
+            index.add_forms(word, forms)
+        return index
+
+    def add_forms(self, lemma, forms):
+        """
+        :param forms: dict form id -> surface, e.g. from conjugator.conjugate_all or a paradigm.Paradigm
+        """
+        for form_id, surface in forms.items():
+            self.add(surface, lemma, form_id)
+
+    def _code(self, lemma, form_id):
+        """
+        :raise ValueError: a new form id would not fit in form_bits
+        """
+        form_index = self._form_ids.get(form_id)
+        if form_index is None:
+            if len(self._forms) >> form_bits:
+                raise ValueError(f'more than {1 << form_bits} form ids')
+            form_index = self._form_ids[form_id] = len(self._forms)
+            self._forms.append(form_id)
+        lemma_id = self._lemma_ids.get(lemma)
+        if lemma_id is None:
+            lemma_id = self._lemma_ids[lemma] = len(self._lemmas)
+            self._lemmas.append(lemma)
+        return lemma_id << form_bits | form_index
+
+    def add(self, surface, lemma, form_id):
+        """
+        Forms with the same surface share one node listing all their analyses
+        :raise ValueError: surface longer than max_letters jamo
+        """
+        letters = to_jamo(surface)
+        if len(letters) > max_letters:
+            raise ValueError(f'{surface} has more than {max_letters} jamo')
+        code = self._code(lemma, form_id)
+        node = len(self._letters)
+        if node:
+            distance_to = matcher(letters)
+            parent = 0
+            while True:
+                d = distance_to(self._letters[parent])
+                if d == 0:
+                    analyses = self._analyses[parent]
+                    if isinstance(analyses, int):
+                        analyses = (analyses,)
+                    if code not in analyses:
+                        self._analyses[parent] = analyses + (code,)
+                    return
+                key = parent << distance_bits | d
+                child = self._children.get(key)
+                if child is None:
+                    self._children[key] = node
+                    break
+                parent = child
+        self._letters.append(letters)
+        self._analyses.append(code)
+
+    def _search(self, letters, k, max_distance):
+        """
+        Best first: every node below the child with key c of a node at distance d is c from that node, so at least
+        abs(d - c) from the query. Subtrees are visited by that bound, lowest first, until it exceeds the k-th best
+        :return: (distance, node) of the k nearest surfaces, nearest and then oldest first, number of nodes visited
+        """
+        if not self._letters:
+            return [], 0
+        distance_to = matcher(letters)
+        nodes = self._letters
+        get_child = self._children.get
+        best = []   # heap of (-distance, -node), the worst kept first
+        bound = max_distance
+        pending = [(0, 0)]  # heap of (lower bound, node)
+        visited = 0
+        while pending:
+            lower, node = heapq.heappop(pending)
+            if lower > bound:
+                break
+            visited += 1
+            d = distance_to(nodes[node])
+            if d <= bound:
+                heapq.heappush(best, (-d, -node))
+                if len(best) > k:
+                    heapq.heappop(best)
+                if len(best) == k:
+                    bound = -best[0][0]
+            # keys above max_letters would run into the next node's keys
+            for key in range(max(1, d - bound), min(d + bound, max_letters) + 1):
+                child = get_child(node << distance_bits | key)
+                if child is not None:
+                    heapq.heappush(pending, (max(lower, abs(d - key)), child))
+        return sorted((-d, -node) for d, node in best), visited
+
+    def nearest(self, surface, k=5, max_distance=6):
+        """
+        :param max_distance: in jamo, corrections further away are not returned
+        :return: list of at most k Correction, nearest first, analyses are analyzer.Analysis tuples
+        """
+        found, _ = self._search(to_jamo(surface), k, max_distance)
+        corrections = []
+        for d, node in found:
+            analyses = self._analyses[node]
+            if isinstance(analyses, int):
+                analyses = (analyses,)
+            corrections.append(Correction(unicodedata.normalize('NFC', self._letters[node]), d,
+                                          tuple(Analysis(self._lemmas[code >> form_bits],
+                                                         self._forms[code & (1 << form_bits) - 1])
+                                                for code in analyses)))
+        return corrections
+
+    def __len__(self):
+        return len(self._letters)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            marshal.dump((format_version, self._letters, self._children, self._analyses, self._lemmas, self._forms), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = marshal.load(f)
+        if data[0] != format_version:
+            raise RuntimeError(f'{path} has unsupported format version {data[0]}')
+        index = cls()
+        index._letters, index._children, index._analyses, index._lemmas, index._forms = data[1:]
+        index._lemma_ids = {lemma: i for i, lemma in enumerate(index._lemmas)}
+        index._form_ids = {form_id: i for i, form_id in enumerate(index._forms)}
+        return index
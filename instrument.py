@@ -0,0 +1,257 @@
+import collections
+import functools
+import threading
+import time
+
+import conjugator
+import jamo
+import stem2
+import stem3
+
+
+_lock = threading.Lock()
+_calls = collections.Counter()
+_seconds = collections.Counter()
+_errors = collections.Counter()
+_branches = collections.Counter()   # (function, branch) -> count
+_originals = {}                     # (owner, attribute) -> original attribute value
+
+
+def _record(counter, key, value=1):
+    with _lock:
+        counter[key] += value
+
+
+def _timed(function, label):
+    """
+    Counts calls, cumulative time and RuntimeError of a function under the name label returns for the arguments
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        name = label(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except RuntimeError:
+            _record(_errors, name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with _lock:
+                _calls[name] += 1
+                _seconds[name] += elapsed
+    return wrapper
+
+
+def _branch(function, name, branch):
+    """
+    Counts which rule branch of a function fires, branch returns its name for the arguments.
+    RuntimeError and None, what the *_or_none functions return instead, count as errors
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        _record(_branches, (name, branch(*args, **kwargs)))
+        try:
+            result = function(*args, **kwargs)
+        except RuntimeError:
+            _record(_errors, name)
+            raise
+        if result is None:
+            _record(_errors, name)
+        return result
+    return wrapper
+
+
+def _form_id(mood, tense, formal, polite):
+    try:
+        return conjugator.get_form_id(mood, tense, formal, polite)
+    except KeyError:
+        return mood
+
+
+_determiner_names = {conjugator.DeterminerForm.PAST: 'determiner.past',
+                     conjugator.DeterminerForm.PRESENT: 'determiner.present',
+                     conjugator.DeterminerForm.FUTURE: 'determiner.future'}
+_noun_names = {conjugator.NounForm.PRESENT: 'noun.present', conjugator.NounForm.PAST: 'noun.past'}
+
+# (class, static method, name of the call for its arguments)
+timed_methods = (
+    (conjugator.SentenceFinalForm, 'indicative',
+     lambda word, is_verb, is_irregular, tense, formal, polite:
+     _form_id(conjugator.MOOD_INDICATIVE, tense, formal, polite)),
+    (conjugator.SentenceFinalForm, 'interrogative',
+     lambda word, is_irregular, tense, formal, polite: _form_id(conjugator.MOOD_INTERROGATIVE, tense, formal, polite)),
+    (conjugator.SentenceFinalForm, 'imperative',
+     lambda word, formal, polite: _form_id(conjugator.MOOD_IMPERATIVE, conjugator.TENSE_NON_PAST, formal, polite)),
+    (conjugator.SentenceFinalForm, 'hortative',
+     lambda word, formal, polite: _form_id(conjugator.MOOD_HORTATIVE, conjugator.TENSE_NON_PAST, formal, polite)),
+    (conjugator.SentenceFinalForm, 'assertive',
+     lambda word, formal, polite: _form_id(conjugator.MOOD_ASSERTIVE, conjugator.TENSE_NON_PAST, formal, polite)),
+    (conjugator.ConnectiveForm, 'reason', lambda word, irregular: 'connective.reason'),
+    (conjugator.ConnectiveForm, 'contrast', lambda word: 'connective.contrast'),
+    (conjugator.ConnectiveForm, 'conjunction', lambda word: 'connective.conjunction'),
+    (conjugator.ConnectiveForm, 'condition', lambda word, irregular: 'connective.condition'),
+    (conjugator.ConnectiveForm, 'motive', lambda word, irregular: 'connective.motive'),
+    (conjugator.DeterminerForm, 'get', lambda word, tense, irregular: _determiner_names.get(tense, 'determiner')),
+    (conjugator.NounForm, 'get', lambda word, tense, irregular: _noun_names.get(tense, 'noun')),
+)
+
+# (module, function, name of the call for its arguments)
+timed_functions = (
+    (conjugator, 'conjugate', lambda word, form_id, is_verb=True, irregular=None: form_id),
+    (conjugator, 'conjugate_all', lambda word, is_verb=True, irregular=None: 'conjugate_all'),
+)
+
+
+def _stem2_branch(stem1, irregular=False):
+    if stem1[-1] == '하':
+        return stem2.IRREGULAR_HA
+    return 'irregular' if irregular else 'regular'
+
+
+def _irregular_stem2_branch(stem1):
+    try:
+        return stem2.get_irregular_class(stem1, irregular=True)
+    except RuntimeError:
+        return 'error'
+
+
+def _irregular_stem3_branch(stem1):
+    letters = jamo.decompose(stem1[-1])
+    if len(letters) == 3 and letters[2] in (stem2.final_s, stem2.final_t, stem2.final_p, stem2.final_l):
+        return stem2.irregular_finals[letters[2]]
+    return 'error'
+
+
+def _eu_stem2_branch(stem1, initial):
+    if stem1[-1] == '쓰':
+        return '쓰'
+    elif len(stem1) > 1:
+        return 'after_a' if jamo.decompose(stem1[-2])[1] == 'ᅡ' else 'after_other'
+    return 'single_syllable'
+
+
+def _determiner_branch(word, irregular, regular_ending, p_irregular_ending, ending_final):
+    analysis = conjugator.analyze(word, irregular)
+    letters = analysis.letters
+    if analysis.irregular and len(letters) == 3:
+        branch = {stem2.final_s: 's_dropped', stem2.final_t: 't_to_l', stem2.final_p: 'p_to_u'}.get(letters[2])
+        if branch is not None:
+            return branch
+    if len(letters) == 2 or letters[2] in (stem2.final_l, stem2.final_h):
+        return 'final_merged'
+    return 'regular'
+
+
+# (module, function, name, branch of the call for its arguments). The raising rule functions and the forms
+# methods call the non raising ones conjugate_all and conjugate_checked use, so both paths are counted once
+branch_functions = (
+    (stem2, 'stem1_to_stem2_or_none', 'stem1_to_stem2', _stem2_branch),
+    (stem2, 'get_irregular_stem2_or_none', 'get_irregular_stem2', _irregular_stem2_branch),
+    (stem2, 'get_eu_stem2', 'get_eu_stem2', _eu_stem2_branch),
+    (stem3, 'get_irregular_stem3_or_none', 'get_irregular_stem3', _irregular_stem3_branch),
+    (conjugator, 'get_past_and_future_determiner', 'get_past_and_future_determiner', _determiner_branch),
+)
+
+
+def _uncached_group_endings(stem, analysis, merges, pick, suffixes, endings):
+    return conjugator._endings(stem, analysis, merges, pick, suffixes)
+
+
+def _uncached_tail_paradigm(analysis, tail, is_verb):
+    forms = conjugator._conjugate_groups(analysis, is_verb)
+    return forms[0], tuple(form[len(analysis.stem1) - len(tail):] for form in forms[1])
+
+
+# (module, function, replacement while enabled). conjugate_all keeps paradigms per stem tail and endings per last
+# syllable, without them every call runs the stem and merge rules, so their branches are counted per call as with
+# the form methods
+uncached_functions = (
+    (conjugator, '_tail_paradigm', _uncached_tail_paradigm),
+    (conjugator, '_group_endings', _uncached_group_endings),
+)
+
+
+def enable():
+    """
+    Replaces the form methods, conjugate, conjugate_all and the rule functions with counting wrappers.
+    Calls made by other wrapped functions are counted too, e.g. the rule functions conjugate_all calls.
+    conjugate_all does not keep paradigms or endings while enabled.
+    Nothing is recorded and nothing is slower while disabled
+    """
+    if _originals:
+        return
+    for owner, name, label in timed_methods:
+        _originals[(owner, name)] = owner.__dict__[name]
+        setattr(owner, name, staticmethod(_timed(getattr(owner, name), label)))
+    for owner, name, label in timed_functions:
+        _originals[(owner, name)] = getattr(owner, name)
+        setattr(owner, name, _timed(getattr(owner, name), label))
+    for owner, attribute, name, branch in branch_functions:
+        _originals[(owner, attribute)] = getattr(owner, attribute)
+        setattr(owner, attribute, _branch(getattr(owner, attribute), name, branch))
+    for owner, name, replacement in uncached_functions:
+        _originals[(owner, name)] = getattr(owner, name)
+        setattr(owner, name, replacement)
+
+
+def disable():
+    """
+    Restores the original functions, recorded values are kept until reset
+    """
+    for (owner, name), original in _originals.items():
+        setattr(owner, name, original)
+    _originals.clear()
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def reset():
+    with _lock:
+        for counter in (_calls, _seconds, _errors, _branches):
+            counter.clear()
+
+
+def snapshot():
+    """
+    :return: {'calls': {name: count}, 'seconds': {name: cumulative seconds}, 'errors': {name: RuntimeError count},
+              'branches': {function: {branch: count}}}
+    names are form ids for sentence final forms and conjugate, e.g. 'indicative.past.formal.polite'
+    """
+    with _lock:
+        branches = {}
+        for (name, branch), count in _branches.items():
+            branches.setdefault(name, {})[branch] = count
+        return {'calls': dict(_calls), 'seconds': dict(_seconds), 'errors': dict(_errors), 'branches': branches}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def to_prometheus(values=None, prefix='conjugator'):
+    """
+    Prometheus text exposition format of a snapshot, the current one if omitted
+    """
+    values = snapshot() if values is None else values
+    lines = []
+
+    def metric(name, help_text, samples):
+        lines.append(f'# HELP {prefix}_{name} {help_text}')
+        lines.append(f'# TYPE {prefix}_{name} counter')
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels)
+            lines.append(f'{prefix}_{name}{{{label_text}}} {value}')
+
+    metric('calls_total', 'Calls per form.', [((('form', name),), count)
+                                               for name, count in sorted(values['calls'].items())])
+    metric('seconds_total', 'Cumulative time per form in seconds.',
+           [((('form', name),), f'{seconds:.9f}') for name, seconds in sorted(values['seconds'].items())])
+    metric('errors_total', 'RuntimeError raised per form or rule function.',
+           [((('name', name),), count) for name, count in sorted(values['errors'].items())])
+    metric('rule_branch_total', 'Rule branches taken.',
+           [((('function', name), ('branch', branch)), count)
+            for name, branches in sorted(values['branches'].items()) for branch, count in sorted(branches.items())])
+    return '\n'.join(lines) + '\n'
@@ -4,6 +4,8 @@
 # 3.12 Hangul Syllable Decomposition
 # Jamo codes: http://www.unicode.org/charts/PDF/U1100.pdf
 
+import unicodedata
+
 SBase = 0xAC00
 LBase = 0x1100
 VBase = 0x1161
@@ -15,7 +17,7 @@ TCount = 28
 NCount = VCount * TCount
 
 
-def decompose(syllable):
+def _decompose_arithmetic(syllable):
     global SBase, LBase, VBase, TBase, SCount, LCount, VCount, TCount, NCount
 
     S = ord(syllable)
@@ -32,7 +34,7 @@ def decompose(syllable):
     return tuple(map(chr, result))
 
 
-def compose(L, V, T):
+def _compose_arithmetic(L, V, T):
     assert(len(L) == 1)
     assert(len(V) == 1)
     assert(T is None or len(T) == 0 or len(T) == 1)
@@ -54,6 +56,64 @@ def compose(L, V, T):
     return chr(S)
 
 
+# Every jamo string is created once and shared by all table entries
+leading_jamo = tuple(chr(LBase + i) for i in range(LCount))
+vowel_jamo = tuple(chr(VBase + i) for i in range(VCount))
+trailing_jamo = (None,) + tuple(chr(TBase + i) for i in range(1, TCount))
+
+
+class _Table(dict):
+    """
+    dict whose missing keys are filled by fill(key) on first lookup, so importing builds no table.
+    Threads racing on a key compute equal values, whichever is stored last is kept
+    """
+    __slots__ = ('fill',)
+
+    def __init__(self, fill):
+        super().__init__()
+        self.fill = fill
+
+    def __missing__(self, key):
+        value = self[key] = self.fill(key)
+        return value
+
+
+def _syllable_letters(syllable):
+    """
+    :raise KeyError: not a Hangul syllable
+    """
+    SIndex = ord(syllable) - SBase if isinstance(syllable, str) and len(syllable) == 1 else -1
+    if SIndex < 0 or SIndex >= SCount:
+        raise KeyError(syllable)
+    L = leading_jamo[SIndex // NCount]
+    V = vowel_jamo[(SIndex % NCount) // TCount]
+    T = trailing_jamo[SIndex % TCount]
+    return (L, V) if T is None else (L, V, T)
+
+
+_syllable_to_jamo = _Table(_syllable_letters)
+_jamo_to_syllable = _Table(lambda letters: _compose_arithmetic(*letters))
+
+
+# keyboards type compatibility jamo (U+3131..U+3163): consonants map to leading jamo, except finals only
+# (ㄳ -> ᆪ), vowels to vowel jamo
+compatibility_to_jamo = {chr(code): unicodedata.normalize('NFKC', chr(code)) for code in range(0x3131, 0x3164)}
+
+
+def decompose(syllable):
+    try:
+        return _syllable_to_jamo[syllable]
+    except KeyError:
+        raise RuntimeError(f'{syllable} is not a Hangul syllable') from None
+
+
+def compose(L, V, T):
+    try:
+        return _jamo_to_syllable[(L, V, T)]
+    except TypeError:
+        return _compose_arithmetic(L, V, T)
+
+
 def test_decompose():
     test_values = '항가있닭넓짧'
     for syllable in test_values:
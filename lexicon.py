@@ -0,0 +1,144 @@
+import marshal
+import os.path
+
+import jamo
+import stem2
+
+
+lexicon_dir = os.path.dirname(os.path.abspath(__file__))
+
+# file name, irregularity class, is verb
+lexicon_files = (('d_irregular_verbs.txt', stem2.IRREGULAR_T, True),
+                 ('p_irregular_verb.txt', stem2.IRREGULAR_P, True),
+                 ('p_irregular_adj.txt', stem2.IRREGULAR_P, False),
+                 ('s_irregular_verbs.txt', stem2.IRREGULAR_S, True),
+                 ('s_irregular_adj.txt', stem2.IRREGULAR_S, False),
+                 ('h_irregular_adj.txt', stem2.IRREGULAR_H, False),
+                 ('leu_regular_verb.txt', stem2.IRREGULAR_EU, True))
+
+# Endings of derived words which always conjugate the same way. A word ending with one of them takes its class,
+# a compound ending with a listed word (여닫다, 파묻다) does not: compounds conjugating like their last word are listed
+derived_suffixes = {'스럽다': stem2.IRREGULAR_P,   # 자연스럽다
+                    '롭다': stem2.IRREGULAR_P,     # 자유롭다
+                    '쓰다': stem2.IRREGULAR_EU,    # 애쓰다
+                    '하다': stem2.IRREGULAR_HA}    # 공부하다
+
+_classes = None
+_lemmas = None
+
+# functions called by reload, e.g. to drop results computed with the old lists
+reload_callbacks = []
+
+# read on first use instead of the word lists if it was made from the same lists, see save_snapshot
+snapshot_path = os.path.join(lexicon_dir, 'lexicon.snapshot')
+snapshot_format_version = 1
+
+
+def read_words(file_name):
+    with open(os.path.join(lexicon_dir, file_name), encoding='utf-8-sig') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _fingerprint():
+    """
+    Lists, derived suffixes and size and modification time of the list files a snapshot was made from
+    """
+    stats = []
+    for file_name, _, _ in lexicon_files:
+        stat = os.stat(os.path.join(lexicon_dir, file_name))
+        stats.append((stat.st_size, stat.st_mtime_ns))
+    return lexicon_files, tuple(derived_suffixes.items()), tuple(stats)
+
+
+def save_snapshot(path=None):
+    """
+    Writes the parsed lexicon with marshal, a later process reads it in one call on first use
+    """
+    classes = _classes if _classes is not None else _load()
+    with open(path or snapshot_path, 'wb') as f:
+        marshal.dump((snapshot_format_version, _fingerprint(), classes, _lemmas), f)
+
+
+def _read_snapshot(path):
+    """
+    :return: (classes, lemmas) of a snapshot of the current lists, None if there is none
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(data, tuple) or data[:2] != (snapshot_format_version, _fingerprint()):
+        return None
+    return data[2], data[3]
+
+
+def _load():
+    global _classes, _lemmas
+    snapshot = _read_snapshot(snapshot_path)
+    if snapshot is not None:
+        _classes, _lemmas = snapshot
+        return _classes
+    classes = dict(derived_suffixes)
+    lemmas = []
+    for file_name, irregular_class, is_verb in lexicon_files:
+        for word in read_words(file_name):
+            classes[word] = irregular_class
+            lemmas.append((word, is_verb, irregular_class in stem2.irregular_classes))
+    _lemmas = lemmas
+    _classes = classes
+    return classes
+
+
+def reload():
+    """
+    Reads the lists again, or their snapshot, after they were changed
+    """
+    global _classes, _lemmas
+    _classes = _lemmas = None
+    _load()
+    for callback in reload_callbacks:
+        callback()
+
+
+def get_lemmas():
+    """
+    :return: list of (word, is_verb, irregular) read from the shipped lists, in file order
+    """
+    if _lemmas is None:
+        _load()
+    return _lemmas
+
+
+def classify_by_ending(word):
+    stem1 = stem2.get_stem1(word)
+    letters = jamo.decompose(stem1[-1])
+    if len(letters) == 3 and letters[2] == stem2.final_l:
+        return stem2.IRREGULAR_L
+    if stem1[-1] == '르':
+        return stem2.IRREGULAR_LEU
+    return stem2.get_irregular_class(stem1)
+
+
+def classify(word):
+    """
+    Irregularity class of a word, one of stem2.IRREGULAR_* constants.
+    Listed words (알아듣다) and words ending with a derived suffix (자연스럽다) are looked up, others are classified
+    by the last syllable of the stem
+    """
+    classes = _classes if _classes is not None else _load()
+    irregular_class = classes.get(word)
+    if irregular_class is not None:
+        return irregular_class
+    for i in range(1, len(word) - 1):
+        irregular_class = derived_suffixes.get(word[i:])
+        if irregular_class is not None:
+            return irregular_class
+    return classify_by_ending(word)
+
+
+def is_irregular(word):
+    """
+    Value of the irregular flag stem2, stem3 and conjugator functions expect for the word
+    """
+    return classify(word) in stem2.irregular_classes
@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import json
+import os.path
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+
+import lexicon
+
+
+async def request(reader, writer, target):
+    """
+    GET on a keep-alive connection
+    :return: status and decoded JSON payload
+    """
+    writer.write(f'GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode('latin-1'))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def make_targets(words, forms, count, paradigm_ratio=0.0, seed=0):
+    """
+    Request targets with lemmas drawn from a Zipf distribution over words
+    """
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    targets = []
+    for word in rng.choices(words, weights, k=count):
+        query = {'word': word}
+        if rng.random() < paradigm_ratio:
+            targets.append('/paradigm?' + urllib.parse.urlencode(query))
+        else:
+            query['form'] = rng.choice(forms)
+            targets.append('/conjugate?' + urllib.parse.urlencode(query))
+    return targets
+
+
+async def run_load(host, port, targets, concurrency=64):
+    """
+    :return: latencies in seconds, number of error responses, elapsed seconds
+    """
+    queue = iter(targets)
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for target in queue:
+                start = time.perf_counter()
+                status, _ = await request(reader, writer, target)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def get_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await request(reader, writer, '/stats'))[1]
+    finally:
+        writer.close()
+
+
+def report(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f'{len(latencies)} requests in {elapsed:.2f} s, {len(latencies) / elapsed:.0f} requests/sec, {errors} errors')
+    print(f'latency ms   p50 {percentile(0.5):.2f}   p95 {percentile(0.95):.2f}   p99 {percentile(0.99):.2f}   '
+          f'max {latencies[-1] * 1000:.2f}')
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_local_service(port, timeout=10):
+    """
+    Starts service.py in a subprocess and waits until it accepts connections
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'service.py')
+    process = subprocess.Popen([sys.executable, script, '--port', str(port)], stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('local service did not start')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load generator for service.py, starts a local instance '
+                                                 'unless --port is given')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('-n', '--requests', type=int, default=20000)
+    parser.add_argument('-c', '--concurrency', type=int, default=64)
+    parser.add_argument('--paradigm-ratio', type=float, default=0.0, help='share of full paradigm requests')
+    parser.add_argument('--forms', default='indicative.past.formal.polite,indicative.non_past.informal.polite',
+                        help='comma separated form ids of single form requests')
+    args = parser.parse_args(argv)
+
+    words = [word for word, _, _ in lexicon.get_lemmas()]
+    targets = make_targets(words, args.forms.split(','), args.requests, args.paradigm_ratio)
+    process = None
+    port = args.port
+    if port is None:
+        port = _free_port()
+        process = start_local_service(port)
+    try:
+        report(*asyncio.run(run_load(args.host, port, targets, args.concurrency)))
+        print('service', json.dumps(asyncio.run(get_stats(args.host, port)), sort_keys=True))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
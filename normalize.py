@@ -0,0 +1,85 @@
+import re
+import unicodedata
+
+import jamo
+
+
+# whitespace anywhere in a word is dropped by str.split, zero width characters scraped text carries are
+# dropped with the translation of compatibility jamo to conjoining jamo, applied after NFD
+zero_width = '\u200b\u200c\u200d\u2060\ufeff'
+translate_table = str.maketrans({**{ord(c): j for c, j in jamo.compatibility_to_jamo.items()},
+                                 **{ord(c): None for c in zero_width}})
+_translated = re.compile(f'[ㄱ-ㅣ{zero_width}]')
+
+_trailing_by_name = {unicodedata.name(letter).split()[-1]: letter for letter in jamo.trailing_jamo[1:]}
+# leading consonant(s) closing a syllable -> trailing jamo, 머ㄱ다 -> 먹다, 다ㄹㄱ -> 닭
+leading_to_trailing = {letter: _trailing_by_name[unicodedata.name(letter).split()[-1]]
+                       for letter in jamo.leading_jamo
+                       if unicodedata.name(letter).split()[-1] in _trailing_by_name}
+leading_to_trailing.update({'ᄀᄉ': 'ᆪ', 'ᄂᄌ': 'ᆬ', 'ᄂᄒ': 'ᆭ', 'ᄅᄀ': 'ᆰ', 'ᄅᄆ': 'ᆱ', 'ᄅᄇ': 'ᆲ',
+                            'ᄅᄉ': 'ᆳ', 'ᄅᄐ': 'ᆴ', 'ᄅᄑ': 'ᆵ', 'ᄅᄒ': 'ᆶ', 'ᄇᄉ': 'ᆹ'})
+
+# one or two leading consonants after a vowel and not followed by one. ᄄ, ᄈ and ᄍ cannot close a syllable,
+# they are left as they are and the word is rejected
+_closing = re.compile(f'(?<=[ᅡ-ᅵ])([{"".join(key for key in leading_to_trailing if len(key) == 1)}])'
+                      '([ᄀ-ᄒ])?(?![ᅡ-ᅵ])')
+canonical = re.compile('[가-힣]+다')
+
+# joins the words normalized as one string, no step changes or removes it
+_separator = '\0'
+_canonical_batch = re.compile(f'[가-힣]+다(?:{_separator}[가-힣]+다)*')
+
+
+def _close_syllable(match):
+    pair = match.group(0)
+    trailing = leading_to_trailing.get(pair)
+    if trailing is not None:
+        return trailing
+    return leading_to_trailing[match.group(1)] + pair[1:]
+
+
+def _normalize_text(text):
+    """
+    Steps run on the whole text, the slow ones only if the text needs them
+    """
+    text = ''.join(unicodedata.normalize('NFD', text).split())
+    if _translated.search(text):
+        # only compatibility jamo leave a consonant without a vowel
+        text = _closing.sub(_close_syllable, text.translate(translate_table))
+    return unicodedata.normalize('NFC', text)
+
+
+def normalize(word):
+    """
+    Canonical dictionary form: precomposed syllables ending with 다. NFD input, compatibility jamo (ㅁㅓㄱㄷㅏ)
+    and whitespace are accepted
+    :raise RuntimeError: anything else
+    """
+    if isinstance(word, str) and canonical.fullmatch(word):
+        return word
+    result = _normalize_text(word) if isinstance(word, str) else None
+    if result is None or not canonical.fullmatch(result):
+        raise RuntimeError(f'{word} is not a verb or adjective')
+    return result
+
+
+def normalize_batch(words):
+    """
+    normalize of many words. The words are normalized as one string, so every step runs once per batch,
+    a batch of canonical words is checked by one regular expression
+    :return: list of words, None for words that cannot be normalized
+    """
+    words = list(words)
+    try:
+        text = _separator.join(words)
+    except TypeError:
+        strings = [word if isinstance(word, str) else '' for word in words]
+        return [result if isinstance(word, str) else None for word, result in zip(words, normalize_batch(strings))]
+    if _canonical_batch.fullmatch(text):
+        return words
+    parts = _normalize_text(text).split(_separator)
+    if len(parts) != len(words):
+        # a word contained the separator
+        parts = [_normalize_text(word) for word in words]
+    match = canonical.fullmatch
+    return [part if match(part) else None for part in parts]
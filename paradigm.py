@@ -0,0 +1,135 @@
+import collections.abc
+import struct
+import threading
+
+import conjugator
+
+
+# suffix id -> suffix, shared by all paradigms of a process. Only grows, new suffixes are added under the lock
+suffix_pool = []
+_suffix_ids = {}
+_intern_lock = threading.Lock()
+
+_form_index = {form_id: i for i, form_id in enumerate(conjugator.FORM_IDS)}
+
+# a pattern has one little endian uint32 code per form of FORM_IDS: suffix id << 8 | characters dropped from the
+# end of stem1, missing_form for forms the rules cannot produce
+_code = struct.Struct('<I')
+_codes = struct.Struct(f'<{len(conjugator.FORM_IDS)}I')
+missing_form = 0xFF
+_patterns = {}      # pattern -> the same pattern, paradigms with equal patterns share one bytes object
+_portable = {}      # pattern -> ((dropped, suffix) or None per form), what a pickled paradigm carries
+_from_portable = {}
+
+
+def intern_suffix(suffix):
+    """
+    :return: id of a suffix in suffix_pool, added if new
+    """
+    suffix_id = _suffix_ids.get(suffix)
+    if suffix_id is None:
+        with _intern_lock:
+            suffix_id = _suffix_ids.get(suffix)
+            if suffix_id is None:
+                suffix_pool.append(suffix)
+                suffix_id = _suffix_ids[suffix] = len(suffix_pool) - 1
+    return suffix_id
+
+
+def _split(stem1, form):
+    """
+    :return: number of characters at the end of stem1 the form does not start with, the rest of the form
+    """
+    if form.startswith(stem1):
+        return 0, form[len(stem1):]
+    keep = len(stem1) - 1
+    while keep and not form.startswith(stem1[:keep]):
+        keep -= 1
+    return len(stem1) - keep, form[keep:]
+
+
+def _intern_pattern(codes):
+    pattern = _codes.pack(*codes)
+    return _patterns.setdefault(pattern, pattern)
+
+
+def _get_portable(pattern):
+    portable = _portable.get(pattern)
+    if portable is None:
+        portable = _portable[pattern] = tuple(
+            None if code == missing_form else (code & 0xFF, suffix_pool[code >> 8])
+            for code, in _code.iter_unpack(pattern))
+    return portable
+
+
+def _restore(lemma, is_verb, portable):
+    pattern = _from_portable.get(portable)
+    if pattern is None:
+        pattern = _from_portable[portable] = _intern_pattern(
+            missing_form if entry is None else intern_suffix(entry[1]) << 8 | entry[0] for entry in portable)
+    return Paradigm(lemma, is_verb, pattern)
+
+
+class Paradigm(collections.abc.Mapping):
+    """
+    Read only mapping form id -> form of a lemma, like conjugator.conjugate_all returns, stored as the lemma and
+    per form the characters dropped from the end of stem1 and the id of the suffix following the rest of stem1.
+    Lemmas conjugating the same way share one pattern of these codes, so a paradigm costs one small object.
+    Forms are built when accessed.
+    Pickles as the lemma and the pattern with its suffixes, shared patterns are written once per pickle
+    """
+    __slots__ = ('lemma', 'is_verb', '_pattern')
+
+    def __init__(self, lemma, is_verb, pattern):
+        """
+        Use from_forms or conjugate
+        """
+        self.lemma = lemma
+        self.is_verb = is_verb
+        self._pattern = pattern
+
+    @classmethod
+    def from_forms(cls, lemma, is_verb, forms):
+        """
+        :param forms: dict form id -> form, e.g. from conjugator.conjugate_all
+        """
+        stem1 = lemma[:-1]
+        codes = [missing_form] * len(_form_index)
+        for form_id, form in forms.items():
+            dropped, suffix = _split(stem1, form)
+            codes[_form_index[form_id]] = intern_suffix(suffix) << 8 | dropped
+        return cls(lemma, is_verb, _intern_pattern(codes))
+
+    @classmethod
+    def conjugate(cls, word, is_verb=True, irregular=None):
+        """
+        :param irregular: looked up in the lexicon if omitted
+        """
+        return cls.from_forms(word, is_verb, conjugator.conjugate_all(word, is_verb, irregular))
+
+    def _build(self, code):
+        stem1 = self.lemma[:-1]
+        return stem1[:len(stem1) - (code & 0xFF)] + suffix_pool[code >> 8]
+
+    def __getitem__(self, form_id):
+        index = _form_index.get(form_id)
+        if index is None:
+            raise KeyError(form_id)
+        code, = _code.unpack_from(self._pattern, index * _code.size)
+        if code == missing_form:
+            raise KeyError(form_id)
+        return self._build(code)
+
+    def __iter__(self):
+        for form_id, (code,) in zip(conjugator.FORM_IDS, _code.iter_unpack(self._pattern)):
+            if code != missing_form:
+                yield form_id
+
+    def __len__(self):
+        return sum(code != missing_form for code, in _code.iter_unpack(self._pattern))
+
+    def __reduce__(self):
+        return _restore, (self.lemma, self.is_verb, _get_portable(self._pattern))
+
+    def __repr__(self):
+        return f'Paradigm({self.lemma!r}, is_verb={self.is_verb!r})'
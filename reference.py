@@ -0,0 +1,212 @@
+import jamo
+import stem2
+import stem3
+
+
+# The form rules as they were written by hand before forms became templates (conjugator.form_templates), kept
+# apart from the plans so differential.py can catch a template or plan regression. Only the stem rules of stem2
+# and stem3 are shared with conjugator. The irregular flag is passed to every stem, the hand written imperative and
+# hortative forms looked it up in the lexicon instead
+
+polite_ending = '요'
+polite_formal_suffix = '습니'
+word_ending = '다'
+
+
+class Stems:
+    """
+    Stems of a word, raising RuntimeError like the stem rules when a stem cannot be produced
+    """
+    def __init__(self, word, irregular):
+        self.stem1 = stem2.get_stem1(word)
+        self.irregular = irregular
+
+    @property
+    def stem2(self):
+        return stem2.stem1_to_stem2(self.stem1, irregular=self.irregular)
+
+    @property
+    def stem3(self):
+        return stem3.stem1_to_stem3(self.stem1, self.irregular)
+
+    @property
+    def past(self):
+        stem = self.stem2
+        letters = jamo.decompose(stem[-1])
+        assert len(letters) == 2
+        return stem[:-1] + jamo.compose(letters[0], letters[1], 'ᆻ')
+
+
+def _letters(stem):
+    return jamo.decompose(stem[-1])
+
+
+def _is_closed(stem, but=None):
+    letters = _letters(stem)
+    return len(letters) == 3 and letters[2] != but
+
+
+def _with_final(stem, final):
+    letters = _letters(stem)
+    return stem[:-1] + jamo.compose(letters[0], letters[1], final)
+
+
+def get_seumni(stems):
+    stem1 = stems.stem1
+    if _is_closed(stem1, but=stem2.final_l):
+        return stem1 + polite_formal_suffix
+    return _with_final(stem1, stem2.final_p) + '니'
+
+
+def get_eupsi(stems):
+    stem1 = stems.stem1
+    if _is_closed(stem1, but=stem2.final_l):
+        return stem1 + '읍시'
+    return _with_final(stem1, stem2.final_p) + '시'
+
+
+def get_plain(stems, is_verb):
+    stem1 = stems.stem1
+    if not is_verb:
+        return stem1 + word_ending
+    if _is_closed(stem1, but=stem2.final_l):
+        return stem1 + '는' + word_ending
+    return _with_final(stem1, stem2.final_n) + word_ending    # final l -> n
+
+
+def drop_l(stem):
+    letters = _letters(stem)
+    if len(letters) == 3 and letters[2] == stem2.final_l:
+        return _with_final(stem, None)
+    return stem
+
+
+def get_plain_interrogative(stems):
+    return drop_l(stems.stem1) + '니'
+
+
+def get_past_and_future_determiner(stems, regular_ending, p_irregular_ending, ending_final):
+    stem1 = stems.stem1
+    letters = _letters(stem1)
+    if stems.irregular and len(letters) == 3:
+        if letters[2] == stem2.final_s:
+            return _with_final(stem1, None) + regular_ending    # s removed
+        elif letters[2] == stem2.final_t:
+            return _with_final(stem1, stem2.final_l) + regular_ending   # t -> l
+        elif letters[2] == stem2.final_p:
+            return _with_final(stem1, None) + p_irregular_ending    # p -> un/ul
+    if len(letters) == 2 or letters[2] in (stem2.final_l, stem2.final_h):
+        return _with_final(stem1, ending_final)
+    return stem1 + regular_ending
+
+
+def get_eum(stems):
+    stem1 = stems.stem1
+    if _is_closed(stem1) and _letters(stem1)[2] == stem2.final_l:
+        return _with_final(stem1, 'ᆱ')
+    return stem1 + '음'
+
+
+def get_fixed_eum(stems):
+    if not _is_closed(stems.stem1):
+        return _with_final(stems.stem1, 'ᆷ')
+    return get_eum(stems)
+
+
+# (mood, tense) -> rules of (formal, polite), (formal, non polite), (informal, polite), (informal, non polite),
+# the order of conjugator.styles
+sentence_final_rules = {
+    ('indicative', 'non_past'): (lambda s, v: get_seumni(s) + word_ending,
+                                 get_plain,
+                                 lambda s, v: s.stem2 + polite_ending,
+                                 lambda s, v: s.stem2),
+    ('indicative', 'past'): (lambda s, v: s.past + polite_formal_suffix + word_ending,
+                             lambda s, v: s.past + word_ending,
+                             lambda s, v: s.past + '어' + polite_ending,
+                             lambda s, v: s.past + '어'),
+    ('interrogative', 'non_past'): (lambda s, v: get_seumni(s) + '까',
+                                    lambda s, v: get_plain_interrogative(s),
+                                    lambda s, v: s.stem2 + polite_ending,
+                                    lambda s, v: s.stem2),
+    ('interrogative', 'past'): (lambda s, v: s.past + polite_formal_suffix + '까',
+                                lambda s, v: s.past + '니',
+                                lambda s, v: s.past + '어' + polite_ending,
+                                lambda s, v: s.past + '어'),
+    ('imperative', 'non_past'): (lambda s, v: get_eupsi(s) + '오',
+                                 lambda s, v: s.stem1 + '라',
+                                 lambda s, v: s.stem2 + polite_ending,
+                                 lambda s, v: s.stem2),
+    ('hortative', 'non_past'): (lambda s, v: get_eupsi(s) + '다',
+                                lambda s, v: s.stem2 + '자',
+                                lambda s, v: s.stem2 + polite_ending,
+                                lambda s, v: s.stem1),
+    ('assertive', 'non_past'): (lambda s, v: s.stem1 + '겠' + polite_formal_suffix + word_ending,
+                                lambda s, v: s.stem1 + '겠' + word_ending,
+                                lambda s, v: s.stem1 + '겠어' + polite_ending,
+                                lambda s, v: s.stem1 + '겠어'),
+}
+
+style_names = ('formal.polite', 'formal.non_polite', 'informal.polite', 'informal.non_polite')
+
+# form id -> function(stems, is_verb) of the hand written rules
+rules = {f'{mood}.{tense}.{style}': rule
+         for (mood, tense), style_rules in sentence_final_rules.items()
+         for style, rule in zip(style_names, style_rules)}
+rules.update({
+    'connective.reason.eo': lambda s, v: s.stem2,
+    'connective.reason.eoseo': lambda s, v: s.stem2 + '서',
+    'connective.reason.euni': lambda s, v: s.stem3 + '니',
+    'connective.reason.eunikka': lambda s, v: s.stem3 + '니까',
+    'connective.contrast.jiman': lambda s, v: s.stem1 + '지만',
+    'connective.contrast.neunde': lambda s, v: s.stem1 + '는데',
+    'connective.contrast.deoni': lambda s, v: s.stem1 + '더니',
+    'connective.conjunction.go': lambda s, v: s.stem1 + '고',
+    'connective.condition.eumyeon': lambda s, v: s.stem3 + '면',
+    'connective.condition.eoya': lambda s, v: s.stem2 + '야',
+    'connective.motive.euryeogo': lambda s, v: s.stem3 + '려고',
+    'determiner.past': lambda s, v: get_past_and_future_determiner(s, '은', '운', stem2.final_n),
+    'determiner.present': lambda s, v: drop_l(s.stem1) + '는',
+    'determiner.future': lambda s, v: get_past_and_future_determiner(s, '을', '울', stem2.final_l),
+    'noun.present.eum': lambda s, v: get_eum(s),
+    'noun.present.gi': lambda s, v: s.stem1 + '기',
+    'noun.past.eum': lambda s, v: s.past + '음',
+    'noun.past.gi': lambda s, v: s.past + '기',
+})
+
+# The forms the template engine fixed on purpose: form id -> (word, hand written form, fixed form, fixed rule).
+# The fixed rule replaces the hand written one, every other form has to match the hand written rules
+fixed_rules = {
+    'hortative.non_past.formal.non_polite': ('먹다', '먹어자', '먹자', lambda s, v: s.stem1 + '자'),
+    'hortative.non_past.informal.non_polite': ('먹다', '먹', '먹어', lambda s, v: s.stem2),
+    'imperative.non_past.formal.non_polite': ('먹다', '먹라', '먹어라', lambda s, v: s.stem2 + '라'),
+    'noun.present.eum': ('가다', '가음', '감', lambda s, v: get_fixed_eum(s)),
+    'connective.contrast.neunde': ('살다', '살는데', '사는데', lambda s, v: drop_l(s.stem1) + '는데'),
+}
+hand_written_rules = {form_id: rules[form_id] for form_id in fixed_rules}
+rules.update({form_id: rule for form_id, (_, _, _, rule) in fixed_rules.items()})
+
+
+def _apply(rule, stems, is_verb):
+    try:
+        return rule(stems, is_verb)
+    except RuntimeError:
+        return None
+
+
+def conjugate_all(word, is_verb, irregular):
+    """
+    All forms of a word by the hand written rules. Honorific forms are the sentence final forms of the honorific
+    stem followed by 다, as a regular word
+    :return: dict form id -> form, None for forms the stem rules cannot produce
+    """
+    stems = Stems(word, irregular)
+    forms = {form_id: _apply(rule, stems, is_verb) for form_id, rule in rules.items()}
+    try:
+        honorific = Stems(stem3.get_honorific_stem(word, irregular) + word_ending, False)
+    except RuntimeError:
+        honorific = None
+    for mood, tense in sentence_final_rules:
+        for style in style_names:
+            form_id = f'{mood}.{tense}.{style}'
+            forms[form_id + '.honorific'] = None if honorific is None else _apply(rules[form_id], honorific, is_verb)
+    return forms
@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import http
+import json
+import urllib.parse
+
+import batch
+import conjugator
+import lexicon
+import normalize
+
+
+def parse_flag(value, default=None):
+    """
+    JSON booleans or 'true'/'false' strings from a query
+    """
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.lower() in ('true', '1', 'yes')
+    return bool(value)
+
+
+class ConjugationService:
+    """
+    Conjugates on an asyncio loop. Identical requests in flight share one result, single form requests arriving
+    within batch_window seconds are conjugated together, groups of at least vector_threshold words with
+    batch.conjugate_batch, and groups or batches of at least offload_threshold words on a process pool
+    """
+    def __init__(self, batch_window=0.002, max_batch=512, vector_threshold=64, offload_threshold=2000, workers=None,
+                 max_body=1 << 20):
+        """
+        :param max_body: largest request body in bytes, larger ones are answered with 413
+        """
+        self.batch_window = batch_window
+        self.max_body = max_body
+        self.max_batch = max_batch
+        self.vector_threshold = vector_threshold
+        self.offload_threshold = offload_threshold
+        self.workers = workers
+        self._executor = None
+        self._inflight = {}
+        self._pending = []
+        self._flush_handle = None
+        self._tasks = set()
+        self.stats = collections.Counter()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def _coalesce(self, key, start):
+        """
+        :param start: called with a new future if no identical request is in flight
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        start(future)
+        return await asyncio.shield(future)
+
+    async def conjugate(self, word, form_id, is_verb=True, irregular=None):
+        """
+        :raise RuntimeError: unknown form or a word the rules cannot conjugate
+        """
+        if form_id not in batch.rules_by_verb[True]:
+            raise RuntimeError(f'{form_id} not implemented')
+        word = normalize.normalize(word)
+        if irregular is None:
+            irregular = lexicon.is_irregular(word)
+        self.stats['conjugate'] += 1
+        return await self._coalesce(('conjugate', word, form_id, is_verb, irregular),
+                                    lambda future: self._enqueue(word, form_id, is_verb, irregular, future))
+
+    async def paradigm(self, word, is_verb=True, irregular=None):
+        word = normalize.normalize(word)
+        self.stats['paradigm'] += 1
+
+        def start(future):
+            try:
+                future.set_result(conjugator.conjugate_all(word, is_verb, irregular))
+            except RuntimeError as e:
+                future.set_exception(e)
+
+        return await self._coalesce(('paradigm', word, is_verb, irregular), start)
+
+    async def conjugate_many(self, words, form_id, is_verb=True, irregular=None):
+        """
+        :return: list of forms, None for words the rules cannot conjugate or normalize
+        :raise ValueError: irregular and words differ in length
+        """
+        if form_id not in batch.rules_by_verb[True]:
+            raise RuntimeError(f'{form_id} not implemented')
+        words = normalize.normalize_batch(words)
+        if irregular is not None and len(irregular) != len(words):
+            raise ValueError(f'{len(irregular)} irregular flags for {len(words)} words')
+        self.stats['batch'] += 1
+        keep = [i for i, word in enumerate(words) if word is not None]
+        if irregular is not None:
+            irregular = [irregular[i] for i in keep]
+        results = [None] * len(words)
+        for i, result in zip(keep, await self._run_batch([words[i] for i in keep], form_id, is_verb, irregular)):
+            results[i] = result
+        return results
+
+    async def _run_batch(self, words, form_id, is_verb, irregular):
+        if len(words) >= self.offload_threshold:
+            self.stats['offloaded'] += 1
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), batch.conjugate_batch, words, form_id, is_verb, irregular)
+        if len(words) >= self.vector_threshold:
+            return batch.conjugate_batch(words, form_id, is_verb, irregular)
+        return conjugator.conjugate_checked(words, form_id, is_verb, irregular).forms
+
+    def _enqueue(self, word, form_id, is_verb, irregular, future):
+        self._pending.append((form_id, is_verb, word, irregular, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        groups = collections.defaultdict(list)
+        for form_id, is_verb, word, irregular, future in pending:
+            groups[(form_id, is_verb)].append((word, irregular, future))
+        self.stats['micro_batches'] += len(groups)
+        for (form_id, is_verb), items in groups.items():
+            task = asyncio.ensure_future(self._resolve(form_id, is_verb, items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, form_id, is_verb, items):
+        words = [word for word, _, _ in items]
+        try:
+            results = await self._run_batch(words, form_id, is_verb, [irregular for _, irregular, _ in items])
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (word, _, future), result in zip(items, results):
+            if future.done():
+                continue
+            if result is None:
+                future.set_exception(RuntimeError(f'{form_id} of {word} cannot be produced'))
+            else:
+                future.set_result(result)
+
+    async def dispatch(self, method, target, body):
+        """
+        :return: HTTP status and JSON payload of a request
+        """
+        url = urllib.parse.urlsplit(target)
+        try:
+            params = json.loads(body) if body else dict(urllib.parse.parse_qsl(url.query))
+            if not isinstance(params, dict):
+                raise ValueError('body is not a JSON object')
+            is_verb = parse_flag(params.get('is_verb'), True)
+            if url.path == '/conjugate':
+                irregular = parse_flag(params.get('irregular'))
+                return 200, {'result': await self.conjugate(params['word'], params['form'], is_verb, irregular)}
+            if url.path == '/paradigm':
+                irregular = parse_flag(params.get('irregular'))
+                return 200, {'forms': await self.paradigm(params['word'], is_verb, irregular)}
+            if url.path == '/batch' and method == 'POST':
+                words, irregular = params['words'], params.get('irregular')
+                if not isinstance(words, list) or not isinstance(irregular, (list, type(None))):
+                    raise ValueError('words and irregular must be lists')
+                if irregular is not None:
+                    irregular = [parse_flag(flag) for flag in irregular]
+                results = await self.conjugate_many(words, params['form'], is_verb, irregular)
+                return 200, {'results': results}
+            if url.path == '/stats':
+                return 200, dict(self.stats)
+        except (KeyError, ValueError, TypeError) as e:
+            return 400, {'error': f'bad request: {e}'}
+        except RuntimeError as e:
+            return 422, {'error': str(e)}
+        return 404, {'error': f'{method} {url.path} not found'}
+
+    async def handle(self, reader, writer):
+        """
+        HTTP/1.1 connection, requests on a keep-alive connection are answered in order
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > self.max_body:
+                    # the body is not read, so the connection cannot carry another request
+                    status, payload = 413, {'error': f'body of {length} bytes, at most {self.max_body} accepted'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+                    status, payload = await self.dispatch(method, target, body)
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                head = [f'HTTP/1.1 {status} {http.HTTPStatus(status).phrase}',
+                        'Content-Type: application/json; charset=utf-8',
+                        f'Content-Length: {len(data)}']
+                if not keep_alive:
+                    head.append('Connection: close')
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        """
+        :return: started asyncio server
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def run(host, port, **options):
+    service = ConjugationService(**options)
+    server = await service.serve(host, port)
+    print(f'serving on {", ".join(str(s.getsockname()) for s in server.sockets)}', flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Conjugation service, JSON over HTTP: GET /conjugate?word=&form=, '
+                                                 'GET /paradigm?word=, POST /batch {"words": [], "form": ""}')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--batch-window', type=float, default=0.002, help='seconds to collect a micro-batch')
+    parser.add_argument('--max-batch', type=int, default=512)
+    parser.add_argument('--offload-threshold', type=int, default=2000, help='words per batch run on the pool')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='pool processes, CPU count by default')
+    parser.add_argument('--max-body', type=int, default=1 << 20, help='largest request body in bytes')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run(args.host, args.port, batch_window=args.batch_window, max_batch=args.max_batch,
+                        offload_threshold=args.offload_threshold, workers=args.workers, max_body=args.max_body))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
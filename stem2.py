@@ -9,9 +9,28 @@ final_s = 'ᆺ'
 final_h = 'ᇂ'
 final_n = 'ᆫ'
 
+IRREGULAR_NONE = 'regular'
+IRREGULAR_HA = 'ha'
+IRREGULAR_EU = 'eu'
+IRREGULAR_LEU = 'leu'
+IRREGULAR_T = 't'
+IRREGULAR_L = 'l'
+IRREGULAR_P = 'p'
+IRREGULAR_S = 's'
+IRREGULAR_H = 'h'
+
+irregular_finals = {final_t: IRREGULAR_T,
+                    final_l: IRREGULAR_L,
+                    final_p: IRREGULAR_P,
+                    final_s: IRREGULAR_S,
+                    final_h: IRREGULAR_H}
+
+# classes which need irregular=True
+irregular_classes = frozenset((IRREGULAR_LEU, IRREGULAR_T, IRREGULAR_L, IRREGULAR_P, IRREGULAR_S, IRREGULAR_H))
+
 
 def is_jamo_letter(sym):
-    return len(sym) == 0 and 0x1100 <= ord(sym[0]) <= 0x11FF
+    return len(sym) == 1 and 0x1100 <= ord(sym) <= 0x11FF
 
 
 def is_bright_vowel(vowel):
@@ -22,25 +41,48 @@ def get_jamo_after_vowel(vowel):
     return '아' if is_bright_vowel(vowel) else '어'
 
 
+def is_predicate(word):
+    """
+    Dictionary form ending with 다, what the non raising functions (*_or_none) accept. Only the two syllables
+    before 다 have to be Hangul, the rules do not look further
+    """
+    return isinstance(word, str) and len(word) > 1 and word[-1] == '다' and '가' <= word[-2] <= '힣' and \
+        (len(word) == 2 or '가' <= word[-3] <= '힣')
+
+
+def get_stem1_or_none(word):
+    if len(word) < 2 or word[-1] != '다':
+        return None
+    return word[:-1]
+
+
 def get_stem1(word):
-    if word[-1] != '다' or len(word) < 2:
+    stem1 = get_stem1_or_none(word)
+    if stem1 is None:
         raise RuntimeError(f'{word} is not a verb or adjective')
-    return word[:-1]
+    return stem1
 
 
 def stem1_to_word(stem1):
     return stem1 + '다'
 
 
-def get_leu_irregular_stem2(prefix):
+def get_leu_irregular_stem2_or_none(prefix):
     if len(prefix) == 0:
-        raise RuntimeError('르다 is not a verb')
+        return None
     letters = jamo.decompose(prefix[-1])
     if len(letters) == 3:
-        raise RuntimeError(f'{prefix}르다 is not a 르 verb')
+        return None
     return prefix[:-1] + jamo.compose(letters[0], letters[1], final_l) + ('라' if is_bright_vowel(letters[1]) else '러')
 
 
+def get_leu_irregular_stem2(prefix):
+    stem = get_leu_irregular_stem2_or_none(prefix)
+    if stem is None:
+        raise RuntimeError(f'{prefix}르다 is not a 르 verb' if prefix else '르다 is not a verb')
+    return stem
+
+
 def get_t_irregular_stem2(prefix, initial, vowel):
     return prefix + jamo.compose(initial, vowel, final_l) + get_jamo_after_vowel(vowel)
 
@@ -72,12 +114,14 @@ def get_eu_stem2(stem1, initial):
             return stem1[:-1] + jamo.compose(initial, 'ᅡ', None)
         else:
             return stem1[:-1] + jamo.compose(initial, 'ᅥ', None)
+    else:
+        return jamo.compose(initial, 'ᅥ', None)  # 크다, 뜨다
 
 
-def get_irregular_stem2(stem1):
+def get_irregular_stem2_or_none(stem1):
     letters = jamo.decompose(stem1[-1])
     if stem1[-1] == '르':
-        return get_leu_irregular_stem2(stem1[:-1])
+        return get_leu_irregular_stem2_or_none(stem1[:-1])
     elif len(letters) == 2 and letters[1] == 'ᅳ':
         return get_eu_stem2(stem1, letters[0])
     elif len(letters) == 3:
@@ -91,8 +135,20 @@ def get_irregular_stem2(stem1):
             return get_s_irregular_stem2(stem1[:-1], letters[0], letters[1])
         elif letters[2] == final_h:
             return get_h_irregular_stem2(stem1[:-1], letters[0])
-    else:
-        raise RuntimeError(f'{stem1}다 cannot be irregular')
+    return None
+
+
+def _irregular_stem2_error(stem1):
+    if stem1[-1] == '르':
+        return RuntimeError(f'{stem1[:-1]}르다 is not a 르 verb' if len(stem1) > 1 else '르다 is not a verb')
+    return RuntimeError(f'{stem1}다 cannot be irregular')
+
+
+def get_irregular_stem2(stem1):
+    stem = get_irregular_stem2_or_none(stem1)
+    if stem is None:
+        raise _irregular_stem2_error(stem1)
+    return stem
 
 
 def get_regular_stem2(stem1):
@@ -115,14 +171,46 @@ def get_regular_stem2(stem1):
 
 
 def stem1_to_stem2(stem1, irregular=False):
+    stem = stem1_to_stem2_or_none(stem1, irregular)
+    if stem is None:
+        raise _irregular_stem2_error(stem1)
+    return stem
+
+
+def stem1_to_stem2_or_none(stem1, irregular=False):
     if stem1[-1] == '하':
-        return '해'
+        return stem1[:-1] + '해'
 
     if irregular:
-        return get_irregular_stem2(stem1)
+        return get_irregular_stem2_or_none(stem1)
     else:
         return get_regular_stem2(stem1)
 
 
-def get_stem2(word, irregular=False):
+def get_stem2(word, irregular=None):
+    """
+    :param irregular: looked up in the lexicon if omitted
+    """
+    if irregular is None:
+        import lexicon  # lexicon imports stem2
+        irregular = lexicon.is_irregular(word)
     return stem1_to_stem2(get_stem1(word), irregular=irregular)
+
+
+def get_irregular_class(stem1, irregular=False):
+    """
+    Class of the rule set stem1_to_stem2 applies to the stem, one of IRREGULAR_* constants
+    """
+    if stem1[-1] == '하':
+        return IRREGULAR_HA
+    letters = jamo.decompose(stem1[-1])
+    if irregular:
+        if stem1[-1] == '르':
+            return IRREGULAR_LEU
+        if len(letters) == 3 and letters[2] in irregular_finals:
+            return irregular_finals[letters[2]]
+    if len(letters) == 2 and letters[1] == 'ᅳ':
+        return IRREGULAR_EU
+    if irregular:
+        raise RuntimeError(f'{stem1}다 cannot be irregular')
+    return IRREGULAR_NONE
@@ -1,10 +1,14 @@
 
 import jamo
+import lexicon
 import stem2
 
 
 stem3_final = '으'
 
+# honorific verbs replacing the regular honorific stem
+honorific_versions = {'마시다': '드시', '먹다': '잡수시'}
+
 
 def get_regular_stem3(stem1):
     letters = jamo.decompose(stem1[-1])
@@ -14,7 +18,7 @@ def get_regular_stem3(stem1):
         return stem1
 
 
-def get_irregular_stem3(stem1):
+def get_irregular_stem3_or_none(stem1):
     letters = jamo.decompose(stem1[-1])
     if len(letters) == 3:
         if letters[2] == stem2.final_s:
@@ -25,19 +29,41 @@ def get_irregular_stem3(stem1):
             return stem1[:-1] + jamo.compose(letters[0], letters[1], None) + '우'
         elif letters[2] == stem2.final_l:
             return stem1[:-1] + jamo.compose(letters[0], letters[1], None)
-    raise RuntimeError(f'{stem2.stem1_to_word(stem1)} cannot be irregular verb')
+    return None
+
+
+def get_irregular_stem3(stem1):
+    stem = get_irregular_stem3_or_none(stem1)
+    if stem is None:
+        raise RuntimeError(f'{stem2.stem1_to_word(stem1)} cannot be irregular verb')
+    return stem
 
 
 def stem1_to_stem3(stem1, irregular):
     return get_irregular_stem3(stem1) if irregular else get_regular_stem3(stem1)
 
 
-def get_stem3(word: str, irregular: bool):
+def stem1_to_stem3_or_none(stem1, irregular):
+    return get_irregular_stem3_or_none(stem1) if irregular else get_regular_stem3(stem1)
+
+
+def get_stem3(word: str, irregular: bool = None):
+    """
+    :param irregular: looked up in the lexicon if omitted
+    """
+    if irregular is None:
+        irregular = lexicon.is_irregular(word)
     return stem1_to_stem3(stem2.get_stem1(word), irregular)
 
 
-def get_honorific_stem(word: str, irregular: bool):
-    honorific_versions = {'마시다': '드시다', '먹다': '잡수시다'}
+def get_honorific_stem(word: str, irregular: bool = None):
     if word in honorific_versions:
         return honorific_versions[word]
     return get_stem3(word, irregular) + '시'
+
+
+def get_honorific_stem_or_none(word: str, irregular: bool):
+    if word in honorific_versions:
+        return honorific_versions[word]
+    stem = stem1_to_stem3_or_none(stem2.get_stem1(word), irregular)
+    return None if stem is None else stem + '시'
@@ -0,0 +1,226 @@
+import hashlib
+import inspect
+import mmap
+import struct
+import sys
+import zlib
+
+import conjugator
+import lexicon
+import stem2
+import stem3
+
+
+# File layout, all integers little endian:
+#   header       magic, format version, rules fingerprint, number of forms, lemmas and suffixes
+#   form ids     newline separated UTF-8
+#   lemmas       uint32 offsets (lemma count + 1) into the lemma pool, keys sorted by their bytes. A key is the
+#                UTF-8 lemma followed by is_verb as one byte, a word can be stored as verb and as adjective
+#   slots        open addressing table of uint32 lemma indices, slot_count(lemma count) slots probed linearly
+#                from the CRC-32 of a key
+#   irregular    uint8 per lemma, the irregular flag the paradigm was conjugated with
+#   entries      per lemma and form: uint8 number of characters kept from the lemma, uint32 suffix id
+#   suffixes     uint32 offsets (suffix count + 1) into the deduplicated suffix pool
+#   pools        lemma pool, suffix pool
+magic = b'KCNJ'
+format_version = 3
+header = struct.Struct('<4sH20sHII')
+offset = struct.Struct('<I')
+entry = struct.Struct('<BI')
+missing_suffix = 0xFFFFFFFF
+empty_slot = 0xFFFFFFFF
+
+
+def get_rules_fingerprint():
+    """
+    SHA-1 of the source of the modules defining the conjugation rules, a store built with other rules is rejected
+    """
+    digest = hashlib.sha1()
+    for module in (stem2, stem3, conjugator):
+        digest.update(inspect.getsource(module).encode('utf-8'))
+    return digest.digest()
+
+
+def _common_prefix_length(a, b):
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return min(length, 255)
+
+
+def _key(word, is_verb):
+    return word.encode('utf-8') + (b'\x01' if is_verb else b'\x00')
+
+
+def slot_count(lemma_count):
+    """
+    Power of two above twice the lemma count, so at most half of the slots are used
+    """
+    return 1 << (2 * lemma_count).bit_length()
+
+
+def _slots(lemma_keys):
+    slots = [empty_slot] * slot_count(len(lemma_keys))
+    mask = len(slots) - 1
+    for index, key in enumerate(lemma_keys):
+        slot = zlib.crc32(key) & mask
+        while slots[slot] != empty_slot:
+            slot = (slot + 1) & mask
+        slots[slot] = index
+    return slots
+
+
+def build_store(path, lemmas):
+    """
+    Conjugates lemmas and writes their paradigms to a store file
+    :param lemmas: iterable of (word, is_verb, irregular), words the rules cannot conjugate are skipped
+    :return: number of lemmas written
+    """
+    paradigms = {}
+    flags = {}
+    for word, is_verb, irregular in lemmas:
+        key = _key(word, is_verb)
+        if key in paradigms:
+            continue
+        try:
+            if irregular is None:
+                irregular = lexicon.is_irregular(word)
+            paradigms[key] = word, conjugator.conjugate_all(word, is_verb, irregular)
+        except RuntimeError:
+            continue
+        flags[key] = irregular
+
+    suffix_ids = {}
+    entries = bytearray()
+    for key in sorted(paradigms):
+        word, forms = paradigms[key]
+        for form_id in conjugator.FORM_IDS:
+            form = forms.get(form_id)
+            if form is None:
+                entries += entry.pack(0, missing_suffix)
+                continue
+            kept = _common_prefix_length(word, form)
+            suffix_id = suffix_ids.setdefault(form[kept:].encode('utf-8'), len(suffix_ids))
+            entries += entry.pack(kept, suffix_id)
+
+    lemma_keys = sorted(paradigms)
+    suffixes = sorted(suffix_ids, key=suffix_ids.get)
+    form_ids = '\n'.join(conjugator.FORM_IDS).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(header.pack(magic, format_version, get_rules_fingerprint(), len(conjugator.FORM_IDS),
+                            len(lemma_keys), len(suffixes)))
+        f.write(offset.pack(len(form_ids)))
+        f.write(form_ids)
+        for pool in (lemma_keys, suffixes):
+            position = 0
+            for item in pool:
+                f.write(offset.pack(position))
+                position += len(item)
+            f.write(offset.pack(position))
+        f.write(struct.pack(f'<{slot_count(len(lemma_keys))}I', *_slots(lemma_keys)))
+        f.write(bytes(flags[key] for key in lemma_keys))
+        f.write(entries)
+        f.write(b''.join(lemma_keys))
+        f.write(b''.join(suffixes))
+    return len(lemma_keys)
+
+
+class ParadigmStore:
+    """
+    Read only view of a store file built by build_store. The file is memory mapped, keys are compared in place
+    and a form is the kept characters of the lemma followed by its suffix decoded from the mapping. Lemmas missing
+    from the store, or asked for with another irregular flag than they were stored with, are conjugated with
+    conjugator.conjugate
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _open(self):
+        mm = self._mm
+        file_magic, version, fingerprint, form_count, lemma_count, suffix_count = header.unpack_from(mm, 0)
+        if file_magic != magic or version != format_version:
+            raise RuntimeError('not a paradigm store or unsupported format version')
+        if fingerprint != get_rules_fingerprint():
+            raise RuntimeError('paradigm store was built with different conjugation rules, rebuild it')
+        if sys.byteorder != 'little':
+            raise RuntimeError('paradigm store offsets are read in place, only little endian hosts are supported')
+        position = header.size
+        form_ids_size, = offset.unpack_from(mm, position)
+        position += offset.size
+        form_ids = mm[position:position + form_ids_size].decode('utf-8').split('\n')
+        self._form_index = {form_id: i for i, form_id in enumerate(form_ids)}
+        position += form_ids_size
+        self._form_count = form_count
+        self._lemma_count = lemma_count
+        view = self._view = memoryview(mm)
+        self._lemma_offsets = view[position:position + (lemma_count + 1) * offset.size].cast('I')
+        position += (lemma_count + 1) * offset.size
+        self._suffix_offsets = view[position:position + (suffix_count + 1) * offset.size].cast('I')
+        position += (suffix_count + 1) * offset.size
+        slots = slot_count(lemma_count)
+        self._slots = view[position:position + slots * offset.size].cast('I')
+        self._slot_mask = slots - 1
+        position += slots * offset.size
+        self._irregular = view[position:position + lemma_count]
+        position += lemma_count
+        self._entries = position
+        position += lemma_count * form_count * entry.size
+        self._lemma_pool = position
+        position += self._lemma_offsets[lemma_count]
+        self._suffix_pool = position
+
+    def close(self):
+        for view in (self._lemma_offsets, self._suffix_offsets, self._slots, self._irregular, self._view):
+            view.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._lemma_count
+
+    def find(self, lemma, is_verb=True):
+        """
+        :return: index of a lemma in the store or -1
+        """
+        key = _key(lemma, is_verb)
+        slots, offsets, pool, view = self._slots, self._lemma_offsets, self._lemma_pool, self._view
+        mask = self._slot_mask
+        slot = zlib.crc32(key) & mask
+        while True:
+            index = slots[slot]
+            if index == empty_slot:
+                return -1
+            if view[pool + offsets[index]:pool + offsets[index + 1]] == key:
+                return index
+            slot = (slot + 1) & mask
+
+    def lookup(self, lemma, form_id, is_verb=True, irregular=None):
+        """
+        :param irregular: looked up in the lexicon if omitted, a stored lemma is conjugated live if it differs
+            from the flag the lemma was stored with
+        """
+        form_index = self._form_index.get(form_id)
+        if form_index is None:
+            raise RuntimeError(f'{form_id} not implemented')
+        index = self.find(lemma, is_verb)
+        if index < 0 or (irregular is not None and irregular != self._irregular[index]):
+            return conjugator.conjugate(lemma, form_id, is_verb, irregular)
+        view = self._view
+        kept, suffix_id = entry.unpack_from(view, self._entries + (index * self._form_count + form_index) * entry.size)
+        if suffix_id == missing_suffix:
+            raise RuntimeError(f'{form_id} of {lemma} cannot be produced')
+        offsets, pool = self._suffix_offsets, self._suffix_pool
+        return lemma[:kept] + str(view[pool + offsets[suffix_id]:pool + offsets[suffix_id + 1]], 'utf-8')
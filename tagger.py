@@ -0,0 +1,364 @@
+import argparse
+import collections
+import functools
+import mmap
+import multiprocessing
+import os
+import re
+import sys
+
+import batch
+import conjugator
+import jamo
+import lexicon
+import stem2
+import stem3
+
+
+Tag = collections.namedtuple('Tag', ('offset', 'surface', 'lemmas', 'forms'))
+
+# UTF-8 of U+AC00..U+D7A3, runs of Hangul syllables are tokens
+hangul_run = re.compile(rb'(?:\xea[\xb0-\xbf][\x80-\xbf]|[\xeb\xec][\x80-\xbf][\x80-\xbf]|'
+                        rb'\xed[\x80-\x9d][\x80-\xbf]|\xed\x9e[\x80-\xa3])+')
+
+
+def _syllables_with_final(final):
+    return ''.join(jamo.compose(L, V, final) for L in jamo.leading_jamo for V in jamo.vowel_jamo)
+
+
+_final_ss_class = f'[{_syllables_with_final(conjugator.final_ss)}]'
+
+# stem kind of the ending patterns, how the part of a token before the ending is turned back into stem1
+STEM1, STEM2, STEM3, PAST, MERGED, HONORIFIC, L_DROPPED = range(7)
+
+# stem of batch.rules_by_verb rules without a merge -> stem kind
+_stem_kinds = {'stem1': STEM1, 'stem2': STEM2, 'stem3': STEM3, 'past': PAST}
+
+
+def _get_pattern(rule):
+    """
+    :return: (stem kind, pattern in front of the suffix, syllable carrying a merged final after a closed stem or '')
+             of a batch.rules_by_verb rule, None for rules that cannot be reversed
+    """
+    stem, merge = rule
+    if merge is None:
+        kind = _stem_kinds.get(stem)
+        if kind is None:
+            return None
+        return kind, _final_ss_class if kind == PAST else '', ''
+    if stem == 'honorific' and merge.kind == 'drop_si':
+        return HONORIFIC, '', ''
+    if stem != 'stem1':
+        return None
+    if merge.kind == 'drop_l':
+        return L_DROPPED, '', ''
+    if merge.kind == 'merge_final':
+        letters = jamo.decompose(merge.connector)
+        connector = jamo.compose(letters[0], letters[1], merge.final)
+        return MERGED, f'(?:{connector}|[{_syllables_with_final(merge.final)}])', connector
+    return None
+
+
+# merged finals distinctive enough to tag by default, -(스)ㅂ니다 and -(으)ㅂ시다. -(느)ㄴ다 would take any
+# syllable ending with ㄴ before 다 for a stem
+_default_finals = (stem2.final_p,)
+
+
+def get_default_forms():
+    """
+    Forms with an ending distinctive enough to find in running text: connectives and sentence final forms whose
+    ending has two syllables or merges into the stem. Bare stems and one syllable endings of sentence final forms
+    (고, 요, 자) match too many other words
+    """
+    forms = []
+    for form_id, (rule, suffix) in batch.rules_by_verb[True].items():
+        pattern = _get_pattern(rule)
+        if pattern is None or not suffix:
+            continue
+        if form_id.startswith('connective.') or len(suffix) > 1 or pattern[0] == PAST or \
+                pattern[0] == MERGED and rule[1].final in _default_finals:
+            forms.append(form_id)
+    return tuple(forms)
+
+
+def compile_matcher(forms):
+    """
+    One regular expression matching the reversed endings of forms at the start of a reversed token,
+    longer endings first, so the longest ending of a token wins. Of endings as long, literal ones come before
+    ones starting with a syllable class: 겠다 before a syllable ending with ㅆ and 다
+    :return: compiled expression and per group (stem kind, form ids, compiled expression of the group alone,
+             connector syllable of merged finals)
+    """
+    patterns = collections.defaultdict(list)
+    for form_id in forms:
+        rule, suffix = batch.rules_by_verb[True].get(form_id, (None, None))
+        pattern = None if rule is None else _get_pattern(rule)
+        if pattern is None or not suffix:
+            raise RuntimeError(f'{form_id} cannot be tagged')
+        patterns[pattern + (suffix,)].append(form_id)
+    ordered = sorted(patterns, key=lambda key: (-len(key[3]) - bool(key[1]), bool(key[1]), key[0] != HONORIFIC))
+    expressions = [f'{re.escape(key[3][::-1])}{key[1]}' for key in ordered]
+    groups = [(key[0], tuple(patterns[key]), re.compile(expression), key[2])
+              for key, expression in zip(ordered, expressions)]
+    return re.compile('|'.join(f'({expression})' for expression in expressions)), groups
+
+
+def _compose(letters, final):
+    try:
+        return jamo.compose(letters[0], letters[1], final)
+    except RuntimeError:
+        return None
+
+
+def _stem1_from_stem2(stem):
+    """
+    Superset of the stem1 whose stem2 is stem, verified by conjugating later.
+    stem itself comes last, 먹어 is rather 먹다 than 먹어다
+    """
+    candidates = []
+    prefix, last = stem[:-1], stem[-1]
+    letters = jamo.decompose(last)
+    if len(letters) == 3:
+        return [stem]
+    before = jamo.decompose(prefix[-1]) if prefix else ()
+    if last in ('아', '어') and prefix:
+        candidates.append(prefix)                                           # 먹어
+        if len(before) == 3 and before[2] == stem2.final_l:
+            candidates.append(prefix[:-1] + _compose(before, stem2.final_t))    # 걸어 -> 걷
+        elif len(before) == 2:
+            candidates.append(prefix[:-1] + _compose(before, stem2.final_s))    # 나아 -> 낫
+    if last in ('와', '워') and len(before) == 2:
+        candidates.append(prefix[:-1] + _compose(before, stem2.final_p))        # 도와 -> 돕
+    if last in ('라', '러') and len(before) == 3 and before[2] == stem2.final_l:
+        candidates.append(prefix[:-1] + _compose(before, None) + '르')          # 몰라 -> 모르
+    for vowel in {'ᅪ': 'ᅩ', 'ᅯ': 'ᅮ', 'ᅧ': 'ᅵ', 'ᅥ': 'ᅳ', 'ᅡ': 'ᅳ'}.get(letters[1], ''):
+        candidates.append(prefix + jamo.compose(letters[0], vowel, None))       # 봐, 써
+    if letters[1] == 'ᅢ':
+        candidates.append(prefix + jamo.compose(letters[0], 'ᅡ', None))          # 해 -> 하
+        candidates.append(prefix + jamo.compose(letters[0], 'ᅡ', stem2.final_h))  # 노래 -> 노랗
+        candidates.append(prefix + jamo.compose(letters[0], 'ᅥ', stem2.final_h))  # 그래 -> 그렇
+    return candidates + [stem]
+
+
+def _stem1_from_stem3(stem):
+    candidates = []
+    prefix, last = stem[:-1], stem[-1]
+    letters = jamo.decompose(last)
+    before = jamo.decompose(prefix[-1]) if prefix else ()
+    if last == stem3.stem3_final and prefix:
+        candidates.append(prefix)                                                   # 먹으
+        if len(before) == 3 and before[2] == stem2.final_l:
+            candidates.append(prefix[:-1] + _compose(before, stem2.final_t))           # 걸으 -> 걷
+        elif len(before) == 2:
+            candidates.append(prefix[:-1] + _compose(before, stem2.final_s))           # 나으 -> 낫
+        return candidates + [stem]
+    if last == '우' and len(before) == 2:
+        candidates.append(prefix[:-1] + _compose(before, stem2.final_p))               # 도우 -> 돕
+    candidates.append(stem)
+    if len(letters) == 2:
+        candidates.append(prefix + jamo.compose(letters[0], letters[1], stem2.final_l))  # 사 -> 살
+    return candidates
+
+
+_honorific_lemmas = {stem[:-1]: word for word, stem in stem3.honorific_versions.items()}
+
+
+def _stem1_candidates(kind, stem, merged, connector=''):
+    """
+    :param stem: token before the ending
+    :param merged: syllable of the ending carrying the stem's last vowel (갔, 갑) or ''
+    :param connector: syllable carrying a merged final after a closed stem (습 of 먹습니다)
+    """
+    if kind == STEM1:
+        return [stem]
+    if kind == L_DROPPED:
+        letters = jamo.decompose(stem[-1]) if stem else ()
+        if len(letters) == 2:
+            return [stem, stem[:-1] + jamo.compose(letters[0], letters[1], stem2.final_l)]   # 사는데 -> 살
+        return [stem]
+    if kind == STEM2:
+        return _stem1_from_stem2(stem) if stem else []
+    if kind == STEM3 or kind == HONORIFIC:
+        candidates = _stem1_from_stem3(stem) if stem else []
+        if kind == HONORIFIC and stem in _honorific_lemmas:
+            candidates.append(stem2.get_stem1(_honorific_lemmas[stem]))
+        return candidates
+    letters = jamo.decompose(merged)
+    if kind == PAST:
+        return _stem1_from_stem2(stem + jamo.compose(letters[0], letters[1], None))
+    if merged == connector:
+        return [stem] if stem else []
+    open_stem = stem + jamo.compose(letters[0], letters[1], None)
+    return [open_stem, open_stem[:-1] + jamo.compose(letters[0], letters[1], stem2.final_l)]    # 갑 -> 가, 삽 -> 살
+
+
+def _conjugate(word, form_id, irregular):
+    try:
+        return conjugator.conjugate(word, form_id, True, irregular)
+    except RuntimeError:
+        return None
+
+
+class Tagger:
+    """
+    Finds predicates in tokens: the longest known ending is matched on the reversed token, candidate lemmas are
+    derived from the rest with reverse stem rules and kept only if conjugating them, irregular as lexicon.classify
+    says, gives the token back. If no candidate does, the next endings matching the token are tried.
+    Results per token are cached, so memory stays bounded by cache_size
+    """
+    def __init__(self, forms=None, cache_size=65536):
+        self.forms = tuple(forms) if forms is not None else get_default_forms()
+        self._matcher, self._groups = compile_matcher(self.forms)
+        self.analyze = functools.lru_cache(cache_size)(self._analyze)
+
+    def _analyze(self, token):
+        """
+        :return: (lemmas, forms) of a token, None if it does not end with a known predicate ending
+        """
+        reversed_token = token[::-1]
+        match = self._matcher.match(reversed_token)
+        if match is None:
+            return None
+        for kind, form_ids, ending, connector in self._groups[match.lastindex - 1:]:
+            match = ending.match(reversed_token)
+            if match is not None:
+                result = self._analyze_ending(token, kind, form_ids, match.end(), connector)
+                if result is not None:
+                    return result
+        return None
+
+    def _analyze_ending(self, token, kind, form_ids, length, connector):
+        """
+        :param length: length of the ending at the end of token
+        """
+        stem = token[:len(token) - length]
+        merged = token[len(stem)] if kind == PAST or kind == MERGED else ''
+        lemmas, forms = [], []
+        for stem1 in _stem1_candidates(kind, stem, merged, connector):
+            word = stem1 + '다'
+            irregular = lexicon.is_irregular(word)
+            for form_id in form_ids:
+                if _conjugate(word, form_id, irregular) == token:
+                    if word not in lemmas:
+                        lemmas.append(word)
+                    if form_id not in forms:
+                        forms.append(form_id)
+        if not lemmas:
+            return None
+        return tuple(lemmas), tuple(forms)
+
+    def tag(self, data, start=0, end=None):
+        """
+        :param data: UTF-8 bytes, bytearray or mmap
+        :return: generator of Tag, offsets are byte offsets in data
+        """
+        end = len(data) if end is None else end
+        for match in hangul_run.finditer(data, start, end):
+            token = match.group().decode('utf-8')
+            result = self.analyze(token)
+            if result is not None:
+                yield Tag(match.start(), token, result[0], result[1])
+
+
+def _open(path):
+    """
+    :return: read only mmap of a file, None if it is empty
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def tag_file(path, forms=None):
+    """
+    Lazily tags a memory mapped file in one process
+    """
+    mm = _open(path)
+    if mm is None:
+        return
+    try:
+        yield from Tagger(forms).tag(mm)
+    finally:
+        mm.close()
+
+
+def split_ranges(mm, parts):
+    """
+    Byte ranges of about equal size, boundaries are moved to the next ASCII byte so no token is split
+    """
+    size = len(mm)
+    bounds = [0]
+    for i in range(1, parts):
+        position = max(bounds[-1], size * i // parts)
+        while position < size and mm[position] >= 0x80:
+            position += 1
+        bounds.append(position)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+_worker_tagger = None
+
+
+def _init_worker(forms):
+    global _worker_tagger
+    _worker_tagger = Tagger(forms)
+
+
+def _tag_range(args):
+    path, start, end = args
+    mm = _open(path)
+    try:
+        return list(_worker_tagger.tag(mm, start, end))
+    finally:
+        mm.close()
+
+
+def tag_file_parallel(path, forms=None, processes=None, range_size=16 * 2 ** 20):
+    """
+    Tags byte ranges of range_size on a process pool, tags are yielded in file order.
+    At most two ranges per process are in flight, so memory is bounded by their tags
+    """
+    mm = _open(path)
+    if mm is None:
+        return
+    try:
+        ranges = split_ranges(mm, max(1, len(mm) // range_size))
+    finally:
+        mm.close()
+    limit = 2 * (processes or os.cpu_count() or 1)
+    pending = collections.deque()
+    with multiprocessing.Pool(processes, _init_worker, (forms,)) as pool:
+        for start, end in ranges:
+            pending.append(pool.apply_async(_tag_range, ((path, start, end),)))
+            if len(pending) == limit:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Count conjugated forms in a UTF-8 text file')
+    parser.add_argument('input')
+    parser.add_argument('-j', '--processes', type=int, default=1, help='worker processes, 0 for CPU count')
+    parser.add_argument('--top', type=int, default=30, help='number of forms and lemmas listed')
+    args = parser.parse_args(argv)
+
+    if args.processes == 1:
+        tags = tag_file(args.input)
+    else:
+        tags = tag_file_parallel(args.input, processes=args.processes or None)
+    forms = collections.Counter()
+    lemmas = collections.Counter()
+    for tag in tags:
+        forms.update(tag.forms)
+        lemmas.update(tag.lemmas)
+    for counter in (forms, lemmas):
+        for name, count in counter.most_common(args.top):
+            print(f'{count}\t{name}')
+        print()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,12 +4,43 @@ import os.path
 import unittest
 import sys
 import itertools
+import asyncio
+import concurrent.futures
 import functools
+import json
+import marshal
+import pickle
+import random
+import subprocess
+import tempfile
+import unicodedata
 
 from stem2 import stem1_to_stem2, get_stem1
 from stem3 import stem1_to_stem3
+import analyzer
+import autocomplete
+import batch
+import benchmark
+import cache
+import cli
 import conjugator
-from conjugator import get_plain, SentenceFinalForm, DeterminerForm, ConnectiveForm
+import differential
+import export
+import formspace
+import fuzzy
+import instrument
+import paradigm
+import reference
+import stem2
+import stem3
+import store
+import tagger
+import jamo
+import lexicon
+import loadgen
+import normalize
+import service
+from conjugator import get_plain, SentenceFinalForm, DeterminerForm, ConnectiveForm, NounForm
 
 sys.path.append(os.path.abspath('..'))
 
@@ -24,6 +55,160 @@ def get_form_params():
         yield param[0], param[1][0], param[1][1]
 
 
+class TestJamo(unittest.TestCase):
+    def testDecomposeTable(self):
+        for code in range(jamo.SBase, jamo.SBase + jamo.SCount):
+            syllable = chr(code)
+            self.assertEqual(jamo._decompose_arithmetic(syllable), jamo.decompose(syllable))
+
+    def testComposeTable(self):
+        for code in range(jamo.SBase, jamo.SBase + jamo.SCount):
+            letters = jamo.decompose(chr(code))
+            T = letters[2] if len(letters) == 3 else None
+            self.assertEqual(chr(code), jamo.compose(letters[0], letters[1], T))
+        self.assertEqual('가', jamo.compose('ᄀ', 'ᅡ', ''))
+
+    def testSharedTuples(self):
+        self.assertIs(jamo.decompose('닭'), jamo.decompose('닭'))
+
+    def testOutOfRange(self):
+        self.assertRaises(RuntimeError, jamo.compose, 'a', 'ᅡ', None)
+        self.assertRaises(RuntimeError, jamo.decompose, 'a')
+        self.assertRaises(RuntimeError, jamo.decompose, '가나')
+        self.assertNotIn('a', jamo._syllable_to_jamo)
+        self.assertNotIn(('a', 'ᅡ', None), jamo._jamo_to_syllable)
+
+
+def get_paradigm_per_form(word, is_verb, irregular):
+    """
+    conjugate_all built from one public API call per form
+    """
+    def call(form_id, func, *args):
+        try:
+            result = func(*args)
+        except RuntimeError:
+            return
+        if isinstance(result, list):
+            forms.update(zip(form_id, result))
+        else:
+            forms[form_id] = result
+
+    forms = {}
+    for honorific in (False, True):
+        if honorific:
+            try:
+                target = stem3.get_honorific_stem(word, irregular) + '다'
+            except RuntimeError:
+                continue
+        else:
+            target = word
+        irr = irregular and not honorific
+        for tense in (conjugator.TENSE_NON_PAST, conjugator.TENSE_PAST):
+            for formal, polite in conjugator.styles:
+                call(conjugator.get_form_id('indicative', tense, formal, polite, honorific),
+                     SentenceFinalForm.indicative, target, is_verb, irr, tense, formal, polite)
+                call(conjugator.get_form_id('interrogative', tense, formal, polite, honorific),
+                     SentenceFinalForm.interrogative, target, irr, tense, formal, polite)
+        for formal, polite in conjugator.styles:
+            for mood in ('imperative', 'hortative', 'assertive'):
+                call(conjugator.get_form_id(mood, conjugator.TENSE_NON_PAST, formal, polite, honorific),
+                     getattr(SentenceFinalForm, mood), conjugator.analyze(target, irr), formal, polite)
+    call(('connective.reason.eo', 'connective.reason.eoseo', 'connective.reason.euni', 'connective.reason.eunikka'),
+         ConnectiveForm.reason, word, irregular)
+    call(('connective.contrast.jiman', 'connective.contrast.neunde', 'connective.contrast.deoni'),
+         ConnectiveForm.contrast, word)
+    call(('connective.conjunction.go',), ConnectiveForm.conjunction, word)
+    call(('connective.condition.eumyeon', 'connective.condition.eoya'), ConnectiveForm.condition, word, irregular)
+    call(('connective.motive.euryeogo',), ConnectiveForm.motive, word, irregular)
+    call('determiner.past', DeterminerForm.get, word, DeterminerForm.PAST, irregular)
+    call('determiner.present', DeterminerForm.get, word, DeterminerForm.PRESENT, irregular)
+    call('determiner.future', DeterminerForm.get, word, DeterminerForm.FUTURE, irregular)
+    call(('noun.present.eum', 'noun.present.gi'), NounForm.get, word, NounForm.PRESENT, irregular)
+    call(('noun.past.eum', 'noun.past.gi'), NounForm.get, word, NounForm.PAST, irregular)
+    return forms
+
+
+paradigm_words = [('가다', True, False), ('먹다', True, False), ('걷다', True, True), ('돕다', True, True),
+                  ('모르다', True, True), ('따르다', True, False), ('열다', True, True), ('짓다', True, True),
+                  ('많다', False, False), ('고맙다', False, True), ('노랗다', False, True), ('크다', False, False),
+                  ('마시다', True, False), ('공부하다', True, False)]
+
+
+class TestConjugateAll(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+
+    def testMatchesPerFormCalls(self):
+        for word, is_verb, irregular in paradigm_words:
+            expected = get_paradigm_per_form(word, is_verb, irregular)
+            forms = conjugator.conjugate_all(word, is_verb, irregular)
+            # reason and condition connectives raise as a whole if stem3 is missing, conjugate_all keeps stem2 ones
+            self.assertEqual(expected, {form_id: forms[form_id] for form_id in expected}, word)
+            self.assertLessEqual({form_id for form_id in forms if not form_id.startswith('connective.')},
+                                 set(expected), word)
+
+    def testSharedTails(self):
+        lemmas = [('가다', True, False), ('나가다', True, False), ('돌아가다', True, False), ('돕다', True, True),
+                  ('고맙다', False, True), ('반갑다', False, True), ('모르다', True, True), ('부르다', True, True),
+                  ('아프다', False, False), ('예쁘다', False, False), ('마시다', True, False),
+                  ('들이마시다', True, False), ('먹다', True, False), ('잡아먹다', True, False)]
+        for word, is_verb, irregular in lemmas:
+            expected = conjugator._conjugate_groups(conjugator.LemmaAnalysis(word, irregular), is_verb)
+            self.assertEqual(dict(zip(*expected)), conjugator.conjugate_all(word, is_verb, irregular), word)
+        form_id = 'indicative.non_past.formal.polite.honorific'
+        self.assertEqual('드십니다', conjugator.conjugate_all('마시다')[form_id])
+        self.assertEqual('들이마시십니다', conjugator.conjugate_all('들이마시다')[form_id])
+
+    def testFormIds(self):
+        self.assertEqual(74, len(conjugator.FORM_IDS))
+        self.assertEqual(set(conjugator.FORM_IDS), set(conjugator.conjugate_all('먹다')))
+
+    def testForms(self):
+        forms = conjugator.conjugate_all('가다')
+        self.assertEqual('갑니다', forms['indicative.non_past.formal.polite'])
+        self.assertEqual('가셨습니다', forms['indicative.past.formal.polite.honorific'])
+        self.assertEqual('가십시오', forms['imperative.non_past.formal.polite.honorific'])
+        self.assertEqual('가려고', forms['connective.motive.euryeogo'])
+
+    def testUnsupportedFormsLeftOut(self):
+        forms = conjugator.conjugate_all('모르다', irregular=True)
+        self.assertEqual('몰랐어요', forms['indicative.past.informal.polite'])
+        self.assertEqual('몰라야', forms['connective.condition.eoya'])
+        self.assertNotIn('connective.condition.eumyeon', forms)
+
+
+class TestTemplates(unittest.TestCase):
+    def testMergeFinal(self):
+        self.assertEqual('갑', conjugator.merge_final('가', 'ᆸ', '스'))
+        self.assertEqual('삽', conjugator.merge_final('살', 'ᆸ', '스'))
+        self.assertEqual('삶', conjugator.merge_final('살', 'ᆷ', '으'))
+        self.assertEqual('먹습', conjugator.merge_final('먹', 'ᆸ', '스'))
+        self.assertEqual('먹는', conjugator.merge_final('먹', 'ᆫ', '느'))
+
+    def testCompile(self):
+        plan = conjugator.compile_template(conjugator.Template('stem1', '(으)ㅂ시다'))
+        self.assertEqual('시다', plan.suffix)
+        self.assertEqual('읽읍시다', conjugator.apply_plan(plan, conjugator.analyze('읽다', False)))
+        plan = conjugator.compile_template(conjugator.Template('stem1', '는데'))
+        self.assertEqual('사는데', conjugator.apply_plan(plan, conjugator.analyze('살다', True)))
+        self.assertRaises(RuntimeError, conjugator.compile_template, conjugator.Template('stem1', '은', 'determiner'))
+
+    def testHonorificGrid(self):
+        forms = conjugator.conjugate_all('가다')
+        for form_id in conjugator.FORM_IDS:
+            if form_id.endswith(conjugator.honorific_suffix):
+                regular = conjugator.conjugate('가시다', form_id[:-len(conjugator.honorific_suffix)], True, False)
+                self.assertEqual(regular, forms[form_id], form_id)
+        self.assertEqual('잡수십니다', conjugator.conjugate('먹다', 'indicative.non_past.formal.polite.honorific'))
+        self.assertEqual('크시다', conjugator.conjugate('크다', 'indicative.non_past.formal.non_polite.honorific', False))
+        self.assertEqual('가신다', conjugator.conjugate('가다', 'indicative.non_past.formal.non_polite.honorific'))
+
+    def testNouns(self):
+        self.assertEqual(['감', '가기'], NounForm.get('가다', NounForm.PRESENT, False))
+        self.assertEqual(['삶', '살기'], NounForm.get('살다', NounForm.PRESENT, True))
+        self.assertEqual('먹음', conjugator.conjugate('먹다', 'noun.present.eum'))
+
+
 class TestStem1(unittest.TestCase):
     def setUp(self):
         self.maxDiff = None
@@ -50,6 +235,9 @@ class TestStem2(unittest.TestCase):
         self.assertEqual('개',    stem1_to_stem2('개'))
         self.assertEqual('기다려', stem1_to_stem2('기다리'))
 
+        self.assertEqual('해', stem1_to_stem2('하'))
+        self.assertEqual('공부해', stem1_to_stem2('공부하'))
+
         self.assertEqual('곪아', stem1_to_stem2('곪'))
         self.assertEqual('얇어', stem1_to_stem2('얇'))
 
@@ -173,12 +361,21 @@ class TestFinalForms(unittest.TestCase):
         self.assertEqual('가자', SentenceFinalForm.hortative('가다', conjugator.STYLE_FORMAL, conjugator.STYLE_NON_POLITE))
         self.assertEqual('가요', SentenceFinalForm.hortative('가다', conjugator.STYLE_INFORMAL, conjugator.STYLE_POLITE))
         self.assertEqual('가', SentenceFinalForm.hortative('가다', conjugator.STYLE_INFORMAL, conjugator.STYLE_NON_POLITE))
+        self.assertEqual('먹자', SentenceFinalForm.hortative('먹다', conjugator.STYLE_FORMAL, conjugator.STYLE_NON_POLITE))
+        self.assertEqual('먹어', SentenceFinalForm.hortative('먹다', conjugator.STYLE_INFORMAL, conjugator.STYLE_NON_POLITE))
 
     def testImperative(self):
         self.assertEqual('갑시오', SentenceFinalForm.imperative('가다', conjugator.STYLE_FORMAL, conjugator.STYLE_POLITE))
         self.assertEqual('가라', SentenceFinalForm.imperative('가다', conjugator.STYLE_FORMAL, conjugator.STYLE_NON_POLITE))
         self.assertEqual('가요', SentenceFinalForm.imperative('가다', conjugator.STYLE_INFORMAL, conjugator.STYLE_POLITE))
         self.assertEqual('가', SentenceFinalForm.imperative('가다', conjugator.STYLE_INFORMAL, conjugator.STYLE_NON_POLITE))
+        self.assertEqual('먹어라', SentenceFinalForm.imperative('먹다', conjugator.STYLE_FORMAL, conjugator.STYLE_NON_POLITE))
+
+    def testMergedFinal(self):
+        analyze = tagger.Tagger(['indicative.non_past.formal.non_polite']).analyze
+        self.assertEqual((('먹다',), ('indicative.non_past.formal.non_polite',)), analyze('먹는다'))
+        self.assertIn('살다', analyze('산다')[0])
+        self.assertIn('indicative.non_past.formal.non_polite.honorific', tagger.get_default_forms())
 
     def testAssertive(self):
         self.assertEqual('가겠습니다', SentenceFinalForm.assertive('가다', conjugator.STYLE_FORMAL, conjugator.STYLE_POLITE))
@@ -250,6 +447,1001 @@ class TestDeterminerForm(unittest.TestCase):
         self.assertEqual('어떨', DeterminerForm.get('어떻다', tense=DeterminerForm.FUTURE, irregular=True))
 
 
+class TestLemmaAnalysis(unittest.TestCase):
+    def testStems(self):
+        analysis = conjugator.LemmaAnalysis('걷다', irregular=True)
+        self.assertEqual('걷', analysis.stem1)
+        self.assertEqual('걸어', analysis.stem2)
+        self.assertEqual('걸으', analysis.stem3)
+        self.assertEqual('걸으시', analysis.honorific)
+        self.assertEqual('걸었', analysis.past)
+        self.assertEqual(stem2.IRREGULAR_T, analysis.irregular_class)
+
+    def testHonorific(self):
+        self.assertEqual('드시', conjugator.LemmaAnalysis('마시다').honorific)
+        self.assertEqual('가시', conjugator.LemmaAnalysis('가다').honorific)
+
+    def testIrregularClass(self):
+        self.assertEqual(stem2.IRREGULAR_NONE, stem2.get_irregular_class('먹'))
+        self.assertEqual(stem2.IRREGULAR_HA, stem2.get_irregular_class('공부하'))
+        self.assertEqual(stem2.IRREGULAR_EU, stem2.get_irregular_class('따르'))
+        self.assertEqual(stem2.IRREGULAR_LEU, stem2.get_irregular_class('모르', irregular=True))
+        self.assertEqual(stem2.IRREGULAR_P, stem2.get_irregular_class('돕', irregular=True))
+        self.assertRaises(RuntimeError, stem2.get_irregular_class, '가', irregular=True)
+
+    def testSharedAcrossForms(self):
+        analysis = conjugator.analyze('먹다')
+        self.assertIs(analysis, conjugator.analyze(analysis))
+        self.assertEqual('먹었습니다', SentenceFinalForm.indicative(analysis, True, False, conjugator.TENSE_PAST,
+                                                               conjugator.STYLE_FORMAL, conjugator.STYLE_POLITE))
+        self.assertEqual(['먹으면', '먹어야'], ConnectiveForm.condition(analysis, irregular=False))
+        self.assertEqual('먹을', DeterminerForm.get(analysis, tense=DeterminerForm.FUTURE, irregular=False))
+
+    def testUnsupportedStemIsLazy(self):
+        analysis = conjugator.analyze('마르다', irregular=True)
+        self.assertEqual('말라', analysis.stem2)
+        self.assertRaises(RuntimeError, lambda: analysis.stem3)
+
+
+class TestLexicon(unittest.TestCase):
+    def testListedWords(self):
+        self.assertEqual(stem2.IRREGULAR_T, lexicon.classify('듣다'))
+        self.assertEqual(stem2.IRREGULAR_P, lexicon.classify('고맙다'))
+        self.assertEqual(stem2.IRREGULAR_S, lexicon.classify('짓다'))
+        self.assertEqual(stem2.IRREGULAR_H, lexicon.classify('어떻다'))
+        self.assertEqual(stem2.IRREGULAR_EU, lexicon.classify('따르다'))
+
+    def testSuffixes(self):
+        self.assertEqual(stem2.IRREGULAR_P, lexicon.classify('자연스럽다'))
+        self.assertEqual(stem2.IRREGULAR_P, lexicon.classify('자유롭다'))
+        self.assertEqual(stem2.IRREGULAR_EU, lexicon.classify('애쓰다'))
+        self.assertEqual(stem2.IRREGULAR_HA, lexicon.classify('공부하다'))
+        self.assertEqual(stem2.IRREGULAR_EU, lexicon.classify('뒤따르다'))
+
+    def testRegularCompounds(self):
+        for word in ('여닫다', '파묻다'):
+            self.assertEqual(stem2.IRREGULAR_NONE, lexicon.classify(word), word)
+            self.assertFalse(lexicon.is_irregular(word), word)
+        self.assertEqual('여닫았습니다', conjugator.conjugate('여닫다', 'indicative.past.formal.polite'))
+
+    def testEndings(self):
+        self.assertEqual(stem2.IRREGULAR_NONE, lexicon.classify('먹다'))
+        self.assertEqual(stem2.IRREGULAR_L, lexicon.classify('만들다'))
+        self.assertEqual(stem2.IRREGULAR_LEU, lexicon.classify('부르다'))
+        self.assertEqual(stem2.IRREGULAR_EU, lexicon.classify('크다'))
+        self.assertFalse(lexicon.is_irregular('받다'))
+        self.assertTrue(lexicon.is_irregular('열다'))
+
+    def testLemmas(self):
+        self.assertIn(('고맙다', False, True), lexicon.get_lemmas())
+        self.assertIn(('따르다', True, False), lexicon.get_lemmas())
+
+    def testIrregularOmitted(self):
+        self.assertEqual('고마워', stem2.get_stem2('고맙다'))
+        self.assertEqual('지으', stem3.get_stem3('짓다'))
+        self.assertEqual('들어요', SentenceFinalForm.imperative('듣다', conjugator.STYLE_INFORMAL,
+                                                              conjugator.STYLE_POLITE))
+        self.assertEqual('몰랐습니다', conjugator.conjugate_all('모르다')['indicative.past.formal.polite'])
+
+
+class TestLexiconSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'lexicon.snapshot')
+        self.saved = lexicon.snapshot_path, lexicon._classes, lexicon._lemmas
+        lexicon.snapshot_path = self.path
+
+    def tearDown(self):
+        lexicon.snapshot_path, lexicon._classes, lexicon._lemmas = self.saved
+
+    def reload(self):
+        lexicon._classes = lexicon._lemmas = None
+        return lexicon.get_lemmas()
+
+    def testRoundTrip(self):
+        lemmas = lexicon.get_lemmas()
+        lexicon.save_snapshot()
+        self.assertIsNotNone(lexicon._read_snapshot(self.path))
+        self.assertEqual(lemmas, self.reload())
+        self.assertEqual(stem2.IRREGULAR_P, lexicon.classify('자연스럽다'))
+
+    def testStaleSnapshotIgnored(self):
+        lemmas = lexicon.get_lemmas()
+        with open(self.path, 'wb') as f:
+            marshal.dump((lexicon.snapshot_format_version, (), {}, []), f)
+        self.assertIsNone(lexicon._read_snapshot(self.path))
+        self.assertEqual(lemmas, self.reload())
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot')
+        self.assertEqual(lemmas, self.reload())
+
+
+class TestBatch(unittest.TestCase):
+    def testMatchesScalar(self):
+        words = [word for word, _, _ in paradigm_words] + [word for word, _, _ in lexicon.get_lemmas()]
+        words += ['아' + chr(code) + '다' for code in range(jamo.SBase, jamo.SBase + jamo.SCount, 97)]
+        words += ['하다', '르다', 'a다', '다', '']
+        for is_verb in (True, False):
+            for irregular in (False, True):
+                for form in conjugator.FORM_IDS:
+                    expected = []
+                    for word in words:
+                        try:
+                            expected.append(conjugator.conjugate_all(word, is_verb, irregular).get(form))
+                        except RuntimeError:
+                            expected.append(None)
+                    self.assertEqual(expected, batch.conjugate_batch(words, form, is_verb, [irregular] * len(words)),
+                                     form)
+
+    def testLexicon(self):
+        self.assertEqual(['고마웠어요', '걸었어요', '먹었어요'],
+                         batch.conjugate_batch(['고맙다', '걷다', '먹다'], 'indicative.past.informal.polite'))
+
+    def testUnknownForm(self):
+        self.assertRaises(RuntimeError, batch.conjugate_batch, ['가다'], 'indicative.future')
+
+    def testRulesFromPlans(self):
+        for is_verb in (True, False):
+            for form_id, plan in conjugator._plans[is_verb].items():
+                rule, suffix = batch.rules_by_verb[is_verb][form_id]
+                self.assertEqual((plan.stem, plan.suffix), (rule[0], suffix))
+        form_id = 'connective.conjunction.go'
+        rules = batch.rules_by_verb[True]
+        saved = rules[form_id]
+        rules[form_id] = (('stem1', conjugator.MergeRule('unknown')), '고')
+        try:
+            # a rule without an array version is conjugated word by word
+            self.assertEqual(['가고', '먹고'], batch.conjugate_batch(['가다', '먹다'], form_id, True, [False, False]))
+        finally:
+            rules[form_id] = saved
+
+
+class TestThreads(unittest.TestCase):
+    def testThreaded(self):
+        words = [word for word, _, _ in paradigm_words] + ['foo', '르다']
+        form = 'connective.reason.eoseo'
+        self.assertEqual(batch.conjugate_batch(words, form, True, [False] * len(words)),
+                         batch.conjugate_batch_threaded(words, form, True, [False] * len(words), threads=3,
+                                                        chunk_size=2))
+        self.assertEqual(batch.conjugate_batch(words, form), batch.conjugate_batch_threaded(words, form, chunk_size=3))
+        self.assertRaises(RuntimeError, batch.conjugate_batch_threaded, words, 'indicative.future')
+        lemmas = paradigm_words + [('foo', True, None)]
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            paradigms = batch.conjugate_all_threaded(lemmas, chunk_size=1, executor=pool)
+        self.assertEqual([conjugator.conjugate_all(*lemma) for lemma in paradigm_words] + [None], paradigms)
+
+    def testSharedStructures(self):
+        lemmas = [(word, True, False) for word in benchmark.make_lemmas(300)] + paradigm_words
+        expected = [conjugator.conjugate_all(*lemma) for lemma in lemmas]
+
+        def work(offset):
+            results = []
+            for i, lemma in enumerate(lemmas[offset:] + lemmas[:offset]):
+                if i % 50 == 0:
+                    conjugator.clear_caches()
+                results.append(dict(paradigm.Paradigm.conjugate(*lemma)))
+            return results[len(lemmas) - offset:] + results[:len(lemmas) - offset]
+
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            for results in pool.map(work, range(0, 80, 10)):
+                self.assertEqual(expected, results)
+        self.assertEqual(len(paradigm.suffix_pool), len(set(paradigm.suffix_pool)))
+
+    def testColdStart(self):
+        code = ('import concurrent.futures, conjugator\n'
+                'with concurrent.futures.ThreadPoolExecutor(8) as pool:\n'
+                '    results = list(pool.map(lambda _: conjugator.conjugate_all("돕다", True, True), range(64)))\n'
+                'print(all(result == results[0] for result in results), len(results[0]))')
+        output = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(f'True {len(conjugator.conjugate_all("돕다", True, True))}', output.strip())
+
+
+class TestReverseIndex(unittest.TestCase):
+    def testAnalyze(self):
+        index = analyzer.ReverseIndex([('가다', True, False), ('고맙다', False, True)])
+        self.assertIn(analyzer.Analysis('가다', 'indicative.past.formal.polite'), index.analyze('갔습니다'))
+        self.assertIn(analyzer.Analysis('고맙다', 'indicative.non_past.informal.polite'), index.analyze('고마워요'))
+        self.assertEqual((), index.analyze('먹었습니다'))
+        self.assertEqual(('indicative', 'past', 'formal', 'polite'),
+                         analyzer.get_form_features('indicative.past.formal.polite'))
+
+    def testAllAnalyses(self):
+        index = analyzer.ReverseIndex([('가다', True, False)])
+        self.assertEqual({'indicative.non_past.informal.polite', 'interrogative.non_past.informal.polite',
+                          'imperative.non_past.informal.polite', 'hortative.non_past.informal.polite'},
+                         {analysis.form for analysis in index.analyze('가요')})
+
+    def testIncremental(self):
+        index = analyzer.ReverseIndex()
+        self.assertNotIn('먹었어요', index)
+        self.assertEqual(74, index.add('먹다'))
+        self.assertEqual(0, index.add('먹다'))
+        self.assertIn(analyzer.Analysis('먹다', 'indicative.past.informal.polite'), index.analyze('먹었어요'))
+
+    def testLexicon(self):
+        index = analyzer.ReverseIndex.from_lexicon()
+        self.assertIn(analyzer.Analysis('돕다', 'indicative.past.informal.polite'), index.analyze('도왔어요'))
+
+
+class TestCli(unittest.TestCase):
+    lines = ['가다\n', '고맙다\tadj\n', '\n', '걷다\tverb\tirregular\n', 'foo\n']
+
+    def testParseLine(self):
+        self.assertEqual(('가다', True, None), cli.parse_line('가다\n'))
+        self.assertEqual(('고맙다', False, True), cli.parse_line('고맙다\tadj\tirregular'))
+        self.assertIsNone(cli.parse_line('\n'))
+
+    def testStream(self):
+        forms = ['indicative.past.formal.polite']
+        output = list(cli.conjugate_stream(self.lines, forms, processes=1, chunk_size=2))
+        self.assertEqual(4, sum(count for _, count in output))
+        records = [json.loads(line) for chunk, _ in output for line in chunk.splitlines()]
+        self.assertEqual([{'lemma': '가다', 'forms': {'indicative.past.formal.polite': '갔습니다'}},
+                          {'lemma': '고맙다', 'forms': {'indicative.past.formal.polite': '고마웠습니다'}},
+                          {'lemma': '걷다', 'forms': {'indicative.past.formal.polite': '걸었습니다'}},
+                          {'lemma': 'foo', 'error': 'foo is not a verb or adjective'}], records)
+
+    def testPoolKeepsOrder(self):
+        expected = list(cli.conjugate_stream(self.lines * 5, output_format=cli.FORMAT_TSV, processes=1, chunk_size=3))
+        self.assertEqual(expected, list(cli.conjugate_stream(self.lines * 5, output_format=cli.FORMAT_TSV,
+                                                             processes=2, chunk_size=3)))
+
+
+class TestConjugate(unittest.TestCase):
+    def testMatchesConjugateAll(self):
+        for word, is_verb, irregular in paradigm_words:
+            forms = conjugator.conjugate_all(word, is_verb, irregular)
+            for form_id, form in forms.items():
+                self.assertEqual(form, conjugator.conjugate(word, form_id, is_verb, irregular), form_id)
+
+    def testUnknownForm(self):
+        self.assertRaises(RuntimeError, conjugator.conjugate, '가다', 'indicative.future')
+
+    def testEnums(self):
+        self.assertIs(conjugator.Tense.PAST, conjugator.TENSE_PAST)
+        self.assertEqual('먹었습니다', SentenceFinalForm.indicative('먹다', True, False, 2, 3, 5))
+        self.assertEqual('먹었습니다', SentenceFinalForm.indicative('먹다', True, False, conjugator.Tense.PAST,
+                                                               conjugator.Formality.FORMAL,
+                                                               conjugator.Politeness.POLITE))
+        self.assertRaises(RuntimeError, SentenceFinalForm.assertive, '가다', conjugator.Formality.FORMAL,
+                          conjugator.TENSE_PAST)
+
+
+class TestConjugateChecked(unittest.TestCase):
+    def testErrorCodes(self):
+        words = ['먹다', '먹다', 'foo', '다', 'abc다', None, '걷다']
+        result = conjugator.conjugate_checked(words, 'indicative.past.informal.polite', True,
+                                              [None, True, None, None, None, None, None])
+        self.assertEqual(['먹었어요', None, None, None, None, None, '걸었어요'], result.forms)
+        self.assertEqual({1: conjugator.ERROR_IMPOSSIBLE_IRREGULAR, 2: conjugator.ERROR_NOT_A_PREDICATE,
+                          3: conjugator.ERROR_NOT_A_PREDICATE, 4: conjugator.ERROR_NOT_A_PREDICATE,
+                          5: conjugator.ERROR_NOT_A_PREDICATE}, result.errors)
+        self.assertEqual(([None, None], {0: conjugator.ERROR_UNSUPPORTED_FORM, 1: conjugator.ERROR_UNSUPPORTED_FORM}),
+                         conjugator.conjugate_checked(['먹다', 'foo'], 'indicative.future'))
+
+    def testLengthMismatch(self):
+        form_id = 'connective.conjunction.go'
+        self.assertRaises(ValueError, conjugator.conjugate_checked, ['가다', '먹다'], form_id, True, [False])
+        self.assertRaises(ValueError, conjugator.conjugate_checked, ['가다'], form_id, True, [False, False])
+        self.assertRaises(ValueError, batch.conjugate_batch, ['가다', '먹다'], form_id, True, [False])
+        self.assertRaises(ValueError, batch.conjugate_batch_threaded, ['가다', '먹다'], form_id, True, [False])
+
+    def testMatchesConjugate(self):
+        for word, is_verb, _ in paradigm_words:
+            for irregular in (False, True):
+                for form_id in conjugator.FORM_IDS:
+                    result = conjugator.conjugate_checked([word], form_id, is_verb, [irregular])
+                    try:
+                        expected = conjugator.conjugate(word, form_id, is_verb, irregular)
+                    except RuntimeError:
+                        self.assertEqual(([None], {0: conjugator.ERROR_IMPOSSIBLE_IRREGULAR}), result, (word, form_id))
+                    else:
+                        self.assertEqual(([expected], {}), result, (word, form_id))
+
+    def testRaisingWrappers(self):
+        self.assertIsNone(stem2.get_stem1_or_none('foo'))
+        self.assertRaisesRegex(RuntimeError, 'foo is not a verb', stem2.get_stem1, 'foo')
+        self.assertIsNone(stem2.get_leu_irregular_stem2_or_none(''))
+        self.assertRaisesRegex(RuntimeError, '^르다 is not a verb', stem2.get_leu_irregular_stem2, '')
+        self.assertRaisesRegex(RuntimeError, '않르다 is not a 르 verb', stem2.get_irregular_stem2, '않르')
+        self.assertIsNone(stem2.get_irregular_stem2_or_none('먹'))
+        self.assertRaisesRegex(RuntimeError, '먹다 cannot be irregular', stem2.get_irregular_stem2, '먹')
+        self.assertIsNone(stem3.get_irregular_stem3_or_none('가'))
+        self.assertRaises(RuntimeError, stem3.get_irregular_stem3, '가')
+        self.assertEqual('들으', stem3.get_irregular_stem3_or_none('듣'))
+
+    def testStemOrNone(self):
+        analysis = conjugator.analyze('먹다', True)
+        self.assertEqual('먹', analysis.stem_or_none('stem1'))
+        self.assertIsNone(analysis.stem_or_none('stem2'))
+        self.assertIsNone(analysis.stem_or_none('past'))
+        self.assertIsNone(conjugator.analyze('가다', True).stem_or_none('honorific'))
+        self.assertEqual('잡수시', analysis.stem_or_none('honorific'))
+        self.assertEqual('갔', conjugator.analyze('가다', False).stem_or_none('past'))
+
+    def testPredicate(self):
+        self.assertTrue(stem2.is_predicate('먹다'))
+        for word in ('다', '먹', 'a먹다', '먹 다', 'ㅁ다', 3):
+            self.assertFalse(stem2.is_predicate(word), word)
+
+
+class TestParadigmStore(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'paradigms.bin')
+        self.assertEqual(len(paradigm_words), store.build_store(self.path, paradigm_words + [('foo', True, None)]))
+
+    def testLookup(self):
+        with store.ParadigmStore(self.path) as paradigms:
+            for word, is_verb, irregular in paradigm_words:
+                for form_id, form in conjugator.conjugate_all(word, is_verb, irregular).items():
+                    self.assertEqual(form, paradigms.lookup(word, form_id, is_verb), form_id)
+            self.assertRaises(RuntimeError, paradigms.lookup, '가다', 'indicative.future')
+
+    def testFallback(self):
+        with store.ParadigmStore(self.path) as paradigms:
+            self.assertEqual(-1, paradigms.find('잡다'))
+            self.assertEqual('잡았습니다', paradigms.lookup('잡다', 'indicative.past.formal.polite'))
+
+    def testVerbAndAdjective(self):
+        store.build_store(self.path, [('낫다', True, True), ('낫다', False, True)])
+        form_id = 'indicative.non_past.formal.non_polite'
+        with store.ParadigmStore(self.path) as paradigms:
+            self.assertEqual(2, len(paradigms))
+            self.assertEqual('낫는다', paradigms.lookup('낫다', form_id, is_verb=True))
+            self.assertEqual('낫다', paradigms.lookup('낫다', form_id, is_verb=False))
+            self.assertEqual(-1, paradigms.find('낫다'[:-1]))
+
+    def testIrregularFlag(self):
+        form_id = 'indicative.past.formal.polite'
+        with store.ParadigmStore(self.path) as paradigms:
+            self.assertEqual('걸었습니다', paradigms.lookup('걷다', form_id, irregular=True))
+            self.assertEqual('걷었습니다', paradigms.lookup('걷다', form_id, irregular=False))
+            self.assertEqual('걸었습니다', paradigms.lookup('걷다', form_id))
+
+    def testSlots(self):
+        words = [f'가{chr(0xAC00 + i)}다' for i in range(300)]
+        store.build_store(self.path, [(word, True, False) for word in words])
+        with store.ParadigmStore(self.path) as paradigms:
+            self.assertEqual(sorted(range(300)), sorted(paradigms.find(word) for word in words))
+            self.assertEqual(-1, paradigms.find('가다다다'))
+            self.assertEqual('가각았습니다', paradigms.lookup('가각다', 'indicative.past.formal.polite'))
+
+    def testRulesFingerprint(self):
+        with open(self.path, 'r+b') as f:
+            f.seek(6)
+            f.write(bytes(20))
+        self.assertRaises(RuntimeError, store.ParadigmStore, self.path)
+
+
+class TestParadigm(unittest.TestCase):
+    def testForms(self):
+        for word, is_verb, irregular in paradigm_words:
+            forms = conjugator.conjugate_all(word, is_verb, irregular)
+            p = paradigm.Paradigm.conjugate(word, is_verb, irregular)
+            self.assertEqual(forms, dict(p), word)
+            self.assertEqual([form_id for form_id in conjugator.FORM_IDS if form_id in forms], list(p))
+
+    def testMissingForms(self):
+        p = paradigm.Paradigm.conjugate('모르다', True, True)
+        self.assertEqual('몰라요', p['indicative.non_past.informal.polite'])
+        self.assertLess(len(p), len(conjugator.FORM_IDS))
+        missing = next(form_id for form_id in conjugator.FORM_IDS if form_id not in p)
+        self.assertRaises(KeyError, p.__getitem__, missing)
+        self.assertRaises(KeyError, p.__getitem__, 'indicative.future')
+        self.assertIsNone(p.get('indicative.future'))
+
+    def testSharedPattern(self):
+        self.assertIs(paradigm.Paradigm.conjugate('가다', True, False)._pattern,
+                      paradigm.Paradigm.conjugate('아가다', True, False)._pattern)
+        self.assertFalse(hasattr(paradigm.Paradigm.conjugate('가다'), '__dict__'))
+
+    def testPickle(self):
+        paradigms = [paradigm.Paradigm.conjugate(word, is_verb, irregular)
+                     for word, is_verb, irregular in paradigm_words]
+        restored = pickle.loads(pickle.dumps(paradigms))
+        for p, q in zip(paradigms, restored):
+            self.assertEqual((p.lemma, p.is_verb), (q.lemma, q.is_verb))
+            self.assertIs(p._pattern, q._pattern)
+            self.assertEqual(dict(p), dict(q))
+
+    def testPickleFewerBytes(self):
+        lemmas = [(word, True, False) for word in benchmark.make_lemmas(200)]
+        paradigms = [paradigm.Paradigm.conjugate(*lemma) for lemma in lemmas]
+        self.assertLess(len(pickle.dumps(paradigms)), len(pickle.dumps([list(p.values()) for p in paradigms])) / 4)
+
+
+class TestFormSpace(unittest.TestCase):
+    def setUp(self):
+        self.space = formspace.FormSpace(paradigm_words)
+
+    def testBijection(self):
+        self.assertEqual(len(paradigm_words) * len(conjugator.FORM_IDS), len(self.space))
+        seen = set()
+        for i in range(len(self.space)):
+            address = self.space.form_at(i)
+            self.assertEqual(i, self.space.index_of(address.lemma_index, address.form_id))
+            seen.add((address.lemma_index, address.form_id))
+        self.assertEqual(len(self.space), len(seen))
+        self.assertEqual(self.space.form_at(len(self.space) - 1), self.space.form_at(-1))
+        self.assertRaises(IndexError, self.space.form_at, len(self.space))
+        self.assertRaises(RuntimeError, self.space.index_of, 0, 'indicative.future')
+
+    def testAxes(self):
+        form_id = 'interrogative.past.informal.polite.honorific'
+        address = self.space.form_at(self.space.index_of(2, form_id))
+        self.assertEqual((2, form_id, 'interrogative', conjugator.Tense.PAST, conjugator.Formality.INFORMAL,
+                          conjugator.Politeness.POLITE, True), address)
+        self.assertEqual(('connective', None, None, None, False), formspace.get_axes('connective.reason.eo'))
+        self.assertRaises(RuntimeError, formspace.get_axes, 'indicative.future')
+
+    def testRangesAndShards(self):
+        self.assertEqual([self.space.form_at(i) for i in range(70, 230)], list(self.space.iter_range(70, 230)))
+        self.assertEqual(list(self.space.iter_range(-5)), [self.space.form_at(i) for i in range(-5, 0)])
+        shards = self.space.shards(7)
+        self.assertEqual(list(range(len(self.space))), [i for shard in shards for i in shard])
+        self.assertLessEqual(max(map(len, shards)) - min(map(len, shards)), 1)
+
+    def testHugeSpace(self):
+        class Lemmas:
+            def __len__(self):
+                return 10 ** 9
+
+            def __getitem__(self, i):
+                return '아' + chr(jamo.SBase + i % jamo.SCount) + '다', True, False
+
+        space = formspace.FormSpace(Lemmas(), ['indicative.past.formal.polite', 'connective.conjunction.go'])
+        self.assertEqual(2 * 10 ** 9, len(space))
+        address = space.form_at(1999999999)
+        self.assertEqual((999999999, 'connective.conjunction.go'), address[:2])
+        self.assertEqual(conjugator.conjugate(space.lemmas[999999999][0], 'connective.conjunction.go'),
+                         space.conjugate_at(1999999999))
+        self.assertEqual(range(1000000000, 1500000000), space.shard(2, 4))
+        sample = space.sample(20, random.Random(0))
+        self.assertEqual(20, len({(a.lemma_index, a.form_id) for a in sample}))
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.lemmas = [('가다', True, False), ('돕다', True, True), ('그렇다', False, True), ('모르다', True, True)]
+
+    def testIncremental(self):
+        result = export.export(self.directory, self.lemmas)
+        self.assertEqual((4, 4, 0), result[:3])
+        self.assertEqual(sum(len(conjugator.conjugate_all(*lemma)) for lemma in self.lemmas), len(result.changes))
+        with open(export._paradigm_path(self.directory, '돕다', True), encoding='utf-8') as f:
+            self.assertEqual(conjugator.conjugate_all('돕다', True, True), json.load(f)['forms'])
+        self.assertEqual((4, 0, 0, []), export.export(self.directory, self.lemmas))
+
+        lemmas = [('가다', True, False), ('돕다', True, False), ('그렇다', False, True), ('먹다', True, False)]
+        result = export.export(self.directory, lemmas)
+        self.assertEqual((4, 2, 1), result[:3])
+        changed = {(change.lemma, change.form_id): change for change in result.changes}
+        self.assertEqual(('도와요', '돕아요'), changed[('돕다', 'indicative.non_past.informal.polite')][3:])
+        self.assertEqual(('몰라', None), changed[('모르다', 'connective.reason.eo')][3:])
+        self.assertIsNone(changed[('먹다', 'connective.conjunction.go')].old)
+        self.assertEqual({'돕다', '모르다', '먹다'}, {change.lemma for change in result.changes})
+        with open(os.path.join(self.directory, export.diff_name), encoding='utf-8') as f:
+            self.assertEqual(len(result.changes), len(f.readlines()))
+        self.assertFalse(os.path.exists(export._paradigm_path(self.directory, '모르다', True)))
+
+    def testRuleFingerprints(self):
+        fingerprints = export.get_rule_fingerprints()
+        self.assertIn('stem2.get_h_irregular_stem2', fingerprints)
+        self.assertIn('conjugator.LemmaAnalysis.stem_or_none', fingerprints)
+        _, rules = export._trace_lemma('그렇다', False, True)
+        self.assertIn('stem2.get_h_irregular_stem2', rules)
+        _, regular_rules = export._trace_lemma('가다', True, False)
+        self.assertNotIn('stem2.get_h_irregular_stem2', regular_rules)
+
+        shared = export._get_shared_rules(fingerprints)
+        changed = dict(fingerprints, **{'stem2.get_h_irregular_stem2': 'edited'})
+        self.assertNotEqual(export.get_lemma_hash('그렇다', False, True, rules, fingerprints, shared),
+                            export.get_lemma_hash('그렇다', False, True, rules, changed, shared))
+        self.assertEqual(export.get_lemma_hash('가다', True, False, regular_rules, fingerprints, shared),
+                         export.get_lemma_hash('가다', True, False, regular_rules, changed, shared))
+        self.assertNotEqual(export.get_lemma_hash('걷다', True, False, regular_rules, fingerprints, shared),
+                            export.get_lemma_hash('걷다', True, True, regular_rules, fingerprints, shared))
+        self.assertNotEqual(shared, export._get_shared_rules(dict(fingerprints, conjugator='edited')))
+
+    @unittest.skipIf(sys.version_info < (3, 11), 'compares with co_qualname')
+    def testNamesWithoutQualname(self):
+        # interpreters before 3.11 name the called code objects by their lines
+        conjugator.clear_caches()
+        with export._Tracer() as tracer:
+            conjugator.conjugate_all(conjugator.LemmaAnalysis('그렇다', True), False)
+        definitions = {module.__file__: export.get_definitions(module) for module in export.rule_modules}
+        for code in tracer.called:
+            qualname = code.co_qualname.split('.<locals>', 1)[0]
+            expected = None if qualname.startswith('<') else qualname
+            self.assertEqual(expected, export._enclosing_name(code, definitions[code.co_filename]), qualname)
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(cache.disable)
+
+    def testMemoize(self):
+        original = stem2.get_stem2
+        cache.enable(maxsize=16)
+        self.assertIsNot(original, stem2.get_stem2)
+        self.assertEqual('가', stem2.get_stem2('가다', False))
+        self.assertEqual('가', stem2.get_stem2('가다', False))
+        self.assertEqual('도와', stem2.get_stem2('돕다'))
+        self.assertEqual('드시', stem3.get_honorific_stem('마시다'))
+        self.assertEqual('먹었', conjugator.get_past('먹다', False))
+        self.assertRaises(RuntimeError, stem2.get_stem2, 'foo', False)
+        stats = cache.get_stats()['stem2.get_stem2']
+        self.assertEqual((1, 3, 0, 2, 16), stats)
+        cache.disable()
+        self.assertIs(original, stem2.get_stem2)
+        self.assertEqual({}, cache.get_stats())
+
+    def testInvalidate(self):
+        cache.enable(maxsize=16, policy=cache.POLICY_TINYLFU)
+        stem3.get_stem3('걷다', True)
+        stem3.get_stem3('먹다', False)
+        cache.invalidate('걷다')
+        self.assertEqual(1, cache.get_stats()['stem3.get_stem3'].size)
+        cache.invalidate()
+        self.assertEqual(0, cache.get_stats()['stem3.get_stem3'].size)
+        self.assertRaises(RuntimeError, cache.enable, 16, 'fifo')
+
+    def testAnalyze(self):
+        cache.enable(maxsize=16)
+        form_id = 'indicative.past.formal.polite'
+        self.assertEqual('걸었습니다', conjugator.conjugate('걷다', form_id))
+        self.assertEqual('걸었습니다', conjugator.conjugate_all('걷다')[form_id])
+        self.assertEqual('걸었습니다', SentenceFinalForm.indicative('걷다', True, None, 2, 3, 5))
+        self.assertEqual('먹었습니다', conjugator.conjugate('먹다', form_id, True, False))
+        self.assertEqual((2, 2, 0, 2, 16), cache.get_stats()['conjugator.analyze'])
+        lexicon.reload()
+        self.assertEqual(1, cache.get_stats()['conjugator.analyze'].size)
+        self.assertEqual('먹었습니다', conjugator.conjugate('먹다', form_id, True, False))
+        self.assertEqual(3, cache.get_stats()['conjugator.analyze'].hits)
+
+    def testLRUEviction(self):
+        lru = cache.LRUCache(2)
+        lru.put('a', 1)
+        lru.put('b', 2)
+        self.assertEqual(1, lru.get('a'))
+        lru.put('c', 3)
+        self.assertNotIn('b', lru)
+        self.assertEqual(1, lru.stats().evictions)
+
+    def testTinyLFUAdmission(self):
+        tiny = cache.TinyLFUCache(2)
+        for key in (1, 2):
+            for _ in range(3):
+                tiny.get(key)
+            tiny.put(key, key)
+        tiny.get(3)
+        tiny.put(3, 3)
+        self.assertNotIn(3, tiny)
+        for _ in range(3):
+            tiny.get(3)
+        tiny.put(3, 3)
+        self.assertIn(3, tiny)
+        self.assertNotIn(1, tiny)
+        self.assertEqual(1, tiny.stats().evictions)
+
+
+class TestBenchmark(unittest.TestCase):
+    def testCompare(self):
+        baseline = {'jamo.decompose': 1000.0, 'conjugate_all': 100.0, 'removed': 10.0}
+        results = {'jamo.decompose': 950.0, 'conjugate_all': 80.0}
+        self.assertEqual([('conjugate_all', 100.0, 80.0)], benchmark.compare(baseline, results, threshold=0.1))
+        self.assertEqual([], benchmark.compare(baseline, results, threshold=0.25))
+
+    def testLemmaMix(self):
+        classes = {irregular_class for _, _, _, irregular_class in benchmark.lemma_mix()}
+        self.assertEqual({'regular', 'ha', 'eu', 'leu', 't', 'l', 'p', 's', 'h'}, classes)
+
+    def testImportBuildsNoTables(self):
+        code = ('import sys, conjugator, jamo, lexicon; '
+                'print(len(jamo._syllable_to_jamo), len(conjugator._plans), lexicon._lemmas, "re" in sys.modules)')
+        output = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual('0 0 None False', output.strip())
+        code = ('import conjugator, batch, service, tagger, differential; '
+                'print(len(conjugator._plans), len(batch.rules_by_verb))')
+        output = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual('0 0', output.strip())
+
+    def testMeasureImport(self):
+        self.assertGreater(benchmark.measure_import('stem2', repeat=1), 0)
+
+
+class TestDifferential(unittest.TestCase):
+    def testWords(self):
+        words = differential.get_words(1000)
+        self.assertEqual(len(differential.prefixes) * 12 + len(stem3.honorific_versions), len(words))
+        self.assertIn('가다', words)
+        self.assertIn('아가다', words)
+        self.assertIn('마시다', words)
+
+    def testEnginesMatch(self):
+        report = differential.run(words=differential.get_words(499), processes=1, chunk_size=40)
+        self.assertEqual(len(differential.get_words(499)) * 4 * len(conjugator.FORM_IDS), report.forms)
+        self.assertEqual(set(differential.engines), set(report.seconds))
+        self.assertEqual(0, sum(report.mismatches.values()), report.examples)
+
+    def testFixedRules(self):
+        for form_id, (word, hand_written, fixed, _) in reference.fixed_rules.items():
+            stems = reference.Stems(word, False)
+            self.assertEqual(hand_written, reference.hand_written_rules[form_id](stems, True), form_id)
+            self.assertEqual(fixed, reference.conjugate_all(word, True, False)[form_id], form_id)
+            self.assertEqual(fixed, conjugator.conjugate(word, form_id), form_id)
+
+    def testPlanRegressionCaught(self):
+        plans = conjugator._plans[True]
+        plan = plans['connective.conjunction.go']
+        plans['connective.conjunction.go'] = plan._replace(suffix='구')
+        try:
+            report = differential.run(['conjugate'], ['가다', '먹다'], processes=1)
+        finally:
+            plans['connective.conjunction.go'] = plan
+        self.assertEqual(4, report.mismatches['conjugate'])
+        self.assertEqual(differential.Mismatch('conjugate', '가다', True, False, 'connective.conjunction.go', '가고',
+                                               '가구'), report.examples['conjugate'][0])
+
+    def testMismatchReported(self):
+        def broken(words, is_verb, irregular):
+            return [tuple(None if form_id == 'connective.conjunction.go' else form for form_id, form
+                          in zip(conjugator.FORM_IDS, row))
+                    for row in differential.run_reference(words, is_verb, irregular)]
+
+        differential.engines['broken'] = broken
+        try:
+            report = differential.run(['broken'], ['가다', '먹다'], processes=1, max_examples=3)
+        finally:
+            del differential.engines['broken']
+        self.assertEqual(8, report.mismatches['broken'])
+        self.assertEqual(differential.Mismatch('broken', '가다', True, False, 'connective.conjunction.go', '가고', None),
+                         report.examples['broken'][0])
+        self.assertEqual(3, len(report.examples['broken']))
+
+
+class TestInstrument(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(instrument.reset)
+        self.addCleanup(instrument.disable)
+        instrument.reset()
+
+    def testCounters(self):
+        original = SentenceFinalForm.__dict__['indicative']
+        instrument.enable()
+        self.assertEqual('먹었습니다', SentenceFinalForm.indicative('먹다', True, False, 2, 3, 5))
+        self.assertEqual('도운', DeterminerForm.get('돕다', DeterminerForm.PAST, True))
+        self.assertEqual('크고', conjugator.conjugate('크다', 'connective.conjunction.go', False, False))
+        self.assertRaises(RuntimeError, stem3.get_stem3, '모르다', True)
+        values = instrument.snapshot()
+        self.assertEqual(1, values['calls']['indicative.past.formal.polite'])
+        self.assertEqual(1, values['calls']['determiner.past'])
+        self.assertEqual(1, values['calls']['connective.conjunction.go'])
+        self.assertEqual({'p_to_u': 1}, values['branches']['get_past_and_future_determiner'])
+        self.assertEqual({'error': 1}, values['branches']['get_irregular_stem3'])
+        self.assertEqual(1, values['errors']['get_irregular_stem3'])
+        instrument.disable()
+        self.assertIs(original, SentenceFinalForm.__dict__['indicative'])
+        SentenceFinalForm.indicative('먹다', True, False, 2, 3, 5)
+        self.assertEqual(values['calls'], instrument.snapshot()['calls'])
+
+    def testConjugateAll(self):
+        instrument.enable()
+        for _ in range(3):
+            conjugator.conjugate_all('걷다', True, True)
+            conjugator.conjugate_all('모르다', True, True)
+        branches = instrument.snapshot()['branches']
+        self.assertEqual({'irregular': 6}, branches['stem1_to_stem2'])
+        self.assertEqual({stem2.IRREGULAR_T: 3, stem2.IRREGULAR_LEU: 3}, branches['get_irregular_stem2'])
+        # once for stem3 and once for the honorific stem
+        self.assertEqual({stem2.IRREGULAR_T: 6, 'error': 6}, branches['get_irregular_stem3'])
+        self.assertEqual({'t_to_l': 6, 'final_merged': 6}, branches['get_past_and_future_determiner'])
+        self.assertEqual(6, instrument.snapshot()['errors']['get_irregular_stem3'])
+        self.assertEqual(6, instrument.snapshot()['calls']['conjugate_all'])
+
+    def testConjugateAllPrometheus(self):
+        group_endings = conjugator._group_endings
+        instrument.enable()
+        conjugator.conjugate_all('크다', False, False)
+        conjugator.conjugate_all('크다', False, False)
+        text = instrument.to_prometheus()
+        self.assertIn('conjugator_calls_total{form="conjugate_all"} 2\n', text)
+        self.assertIn('conjugator_rule_branch_total{function="get_eu_stem2",branch="single_syllable"} 2\n', text)
+        self.assertIn('conjugator_rule_branch_total{function="get_past_and_future_determiner",'
+                      'branch="final_merged"} 4\n', text)
+        instrument.disable()
+        self.assertIs(group_endings, conjugator._group_endings)
+        conjugator.conjugate_all('크다', False, False)
+        self.assertEqual(text, instrument.to_prometheus())
+
+    def testChecked(self):
+        instrument.enable()
+        conjugator.conjugate_checked(['걷다', '먹다'], 'indicative.past.formal.polite', True, [True, True])
+        values = instrument.snapshot()
+        self.assertEqual({stem2.IRREGULAR_T: 1, 'error': 1}, values['branches']['get_irregular_stem2'])
+        self.assertEqual(1, values['errors']['stem1_to_stem2'])
+
+    def testPrometheus(self):
+        instrument.enable()
+        stem2.get_stem2('크다', False)
+        text = instrument.to_prometheus()
+        self.assertIn('# TYPE conjugator_rule_branch_total counter\n', text)
+        self.assertIn('conjugator_rule_branch_total{function="get_eu_stem2",branch="single_syllable"} 1\n', text)
+
+
+class TestService(unittest.TestCase):
+    def testCoalescingAndBatching(self):
+        async def run():
+            conjugation = service.ConjugationService(batch_window=0.01)
+            form = 'indicative.past.formal.polite'
+            results = await asyncio.gather(conjugation.conjugate('가다', form), conjugation.conjugate('가다', form),
+                                           conjugation.conjugate('돕다', form),
+                                           conjugation.conjugate('foo다', form, irregular=False),
+                                           return_exceptions=True)
+            return conjugation.stats, results
+
+        stats, results = asyncio.run(run())
+        self.assertEqual(['갔습니다', '갔습니다', '도왔습니다'], results[:3])
+        self.assertIsInstance(results[3], RuntimeError)
+        self.assertEqual(1, stats['coalesced'])
+        self.assertEqual(1, stats['micro_batches'])
+
+    def testHttp(self):
+        async def run():
+            conjugation = service.ConjugationService(offload_threshold=3, workers=1)
+            server = await conjugation.serve(port=0)
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            try:
+                responses = [await loadgen.request(reader, writer, target) for target in (
+                    '/conjugate?word=%EB%8F%95%EB%8B%A4&form=indicative.past.informal.polite',
+                    '/paradigm?word=%EA%B0%80%EB%8B%A4',
+                    '/conjugate?word=%EA%B0%80%EB%8B%A4&form=indicative.future',
+                    '/missing')]
+                responses.append(await conjugation.dispatch(
+                    'POST', '/batch', json.dumps({'words': ['가다', '먹다', '노랗다'], 'form': 'connective.conjunction.go',
+                                                  'is_verb': False}).encode('utf-8')))
+            finally:
+                writer.close()
+                server.close()
+                await server.wait_closed()
+                conjugation.close()
+            return responses
+
+        responses = asyncio.run(run())
+        self.assertEqual((200, {'result': '도왔어요'}), responses[0])
+        self.assertEqual('갔어요', responses[1][1]['forms']['indicative.past.informal.polite'])
+        self.assertEqual(422, responses[2][0])
+        self.assertEqual(404, responses[3][0])
+        self.assertEqual((200, {'results': ['가고', '먹고', '노랗고']}), responses[4])
+
+    def testBadBody(self):
+        async def run():
+            conjugation = service.ConjugationService()
+            form = 'connective.conjunction.go'
+            bodies = ([{'words': ['가다', '먹다'], 'form': form, 'irregular': [False]}],
+                      {'words': ['가다', '먹다'], 'form': form, 'irregular': [False]},
+                      {'words': '가다', 'form': form},
+                      {'words': ['가다'], 'form': form, 'irregular': True})
+            return [await conjugation.dispatch('POST', '/batch', json.dumps(body).encode('utf-8')) for body in bodies]
+
+        for status, payload in asyncio.run(run()):
+            self.assertEqual(400, status)
+            self.assertTrue(payload['error'].startswith('bad request: '))
+
+    def testBatchFlags(self):
+        body = {'words': ['걷다', '걷다', '걷다', '걷다'], 'form': 'connective.reason.eo',
+                'irregular': ['false', 'true', None, 0]}
+        status, payload = asyncio.run(service.ConjugationService().dispatch('POST', '/batch',
+                                                                            json.dumps(body).encode('utf-8')))
+        self.assertEqual((200, {'results': ['걷어', '걸어', '걸어', '걷어']}), (status, payload))
+
+    def testBodyTooLarge(self):
+        async def run():
+            conjugation = service.ConjugationService(max_body=64)
+            server = await conjugation.serve(port=0)
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            try:
+                writer.write(b'POST /batch HTTP/1.1\r\nContent-Length: 65\r\n\r\n')
+                await writer.drain()
+                return await reader.read()
+            finally:
+                writer.close()
+                server.close()
+                await server.wait_closed()
+
+        response = asyncio.run(run())
+        self.assertTrue(response.startswith(b'HTTP/1.1 413 '), response)
+        self.assertIn(b'Connection: close', response)
+
+
+class TestAutocomplete(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.trie = autocomplete.AutocompleteTrie.from_lemmas([('먹다', True, False, 1), ('가다', True, False),
+                                                              ('걷다', True, True)])
+
+    def testComplete(self):
+        completions = self.trie.complete('먹었어')
+        self.assertEqual(['먹었어', '먹었어요'], [completion.surface for completion in completions])
+        self.assertIn(analyzer.Analysis('먹다', 'indicative.past.informal.polite'), completions[1].analyses)
+        self.assertEqual(3, len(self.trie.complete('먹', k=3)))
+        self.assertEqual([], self.trie.complete('읽'))
+
+    def testPartialSyllable(self):
+        self.assertEqual(self.trie.complete('먹'), self.trie.complete('머'))
+        self.assertIn('먹었어요', [completion.surface for completion in self.trie.complete('먹었ㅇ')])
+        self.assertIn('가서', [completion.surface for completion in self.trie.complete('갓')])
+        self.assertIn('걸어서', [completion.surface for completion in self.trie.complete('걸')])
+
+    def testSaveLoad(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'forms.trie')
+            self.trie.save(path)
+            loaded = autocomplete.AutocompleteTrie.load(path)
+        self.assertEqual(len(self.trie), len(loaded))
+        self.assertEqual(self.trie.complete('가'), loaded.complete('가'))
+
+
+class TestFuzzy(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.index = fuzzy.FuzzyIndex.from_lemmas(paradigm_words + [('고맙다', False, True)])
+
+    def testDistance(self):
+        def levenshtein(a, b):
+            previous = list(range(len(b) + 1))
+            for i, x in enumerate(a, 1):
+                current = [i]
+                for j, y in enumerate(b, 1):
+                    current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+                previous = current
+            return previous[-1]
+
+        for a, b in itertools.product(['', 'a', 'ab', 'ba', 'abc', 'acb', 'bcaab', 'aaaa'], repeat=2):
+            self.assertEqual(levenshtein(a, b), fuzzy.distance(a, b), (a, b))
+        slip = fuzzy.distance(fuzzy.to_jamo('먹었읍니다'), fuzzy.to_jamo('먹었습니다'))
+        wrong = fuzzy.distance(fuzzy.to_jamo('먹었읍니다'), fuzzy.to_jamo('먹었었니다'))
+        self.assertEqual(1, slip)
+        self.assertLess(slip, wrong)
+
+    def testNearest(self):
+        corrections = self.index.nearest('먹었읍니다', k=3)
+        self.assertEqual(('먹었습니다', 1), corrections[0][:2])
+        self.assertIn(analyzer.Analysis('먹다', 'indicative.past.formal.polite'), corrections[0].analyses)
+        self.assertEqual(3, len(corrections))
+        self.assertEqual('고마워요', self.index.nearest('고맙어요', k=1)[0].surface)
+        self.assertEqual(0, self.index.nearest('가요')[0].distance)
+        self.assertEqual([], self.index.nearest('읽었습니다', max_distance=1))
+
+    def testExact(self):
+        letters = self.index._letters
+        for query in ('먹었읍니다', '가써요', '도와쓰니다', '걸엇어', '고맙슴니다'):
+            query = fuzzy.to_jamo(query)
+            found, visited = self.index._search(query, 5, 6)
+            expected = sorted(fuzzy.distance(query, node_letters) for node_letters in letters)[:5]
+            self.assertEqual(expected, [d for d, _ in found], query)
+            self.assertLess(visited, len(letters))
+
+    def testIncremental(self):
+        index = fuzzy.FuzzyIndex()
+        self.assertEqual([], index.nearest('가요'))
+        index.add_forms('가다', conjugator.conjugate_all('가다'))
+        index.add('먹었습니다', '먹다', 'indicative.past.formal.polite')
+        index.add('먹었습니다', '먹다', 'indicative.past.formal.polite')
+        self.assertEqual(len(set(conjugator.conjugate_all('가다').values())) + 1, len(index))
+        self.assertEqual((analyzer.Analysis('먹다', 'indicative.past.formal.polite'),),
+                         index.nearest('먹엇습니다', k=1)[0].analyses)
+
+    def testLimits(self):
+        index = fuzzy.FuzzyIndex()
+        for i in range(300):
+            index.add('가요', '가다', f'form.{i}')
+        self.assertEqual(('가다', 'form.299'), index.nearest('가요', k=1)[0].analyses[-1])
+        index._forms.extend(f'filler.{i}' for i in range((1 << fuzzy.form_bits) - len(index._forms)))
+        self.assertRaises(ValueError, index.add, '가요', '가다', 'one.too.many')
+        self.assertRaises(ValueError, index.add, '가' * 200, '가다', 'form.0')
+        index.add('가' * 120, '가다', 'form.0')
+        self.assertEqual(240, index.nearest('가' * 240, k=1, max_distance=300)[0].distance)
+
+    def testSaveLoad(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'forms.bk')
+            self.index.save(path)
+            loaded = fuzzy.FuzzyIndex.load(path)
+        self.assertEqual(len(self.index), len(loaded))
+        self.assertEqual(self.index.nearest('도와쓰니다'), loaded.nearest('도와쓰니다'))
+
+
+class TestTagger(unittest.TestCase):
+    corpus = '어제 밥을 먹었어요. 그리고 공부했습니다!\n친구를 도와서 (가려고) 했는데 비가 오는데 ABC 123\n'
+
+    def testTag(self):
+        data = self.corpus.encode('utf-8')
+        tags = list(tagger.Tagger().tag(data))
+        surfaces = [tag.surface for tag in tags]
+        for surface in ('먹었어요', '공부했습니다', '도와서', '가려고'):
+            self.assertIn(surface, surfaces)
+        for tag in tags:
+            self.assertEqual(tag.surface, data[tag.offset:tag.offset + len(tag.surface.encode('utf-8'))].decode())
+        by_surface = {tag.surface: tag for tag in tags}
+        self.assertEqual('먹다', by_surface['먹었어요'].lemmas[0])
+        self.assertEqual('공부하다', by_surface['공부했습니다'].lemmas[0])
+        self.assertIn('indicative.past.formal.polite', by_surface['공부했습니다'].forms)
+        self.assertIn('돕다', by_surface['도와서'].lemmas)
+        self.assertNotIn('밥을', surfaces)
+
+    def testForms(self):
+        tags = list(tagger.Tagger(['connective.motive.euryeogo']).tag(self.corpus.encode('utf-8')))
+        self.assertEqual(['가려고'], [tag.surface for tag in tags])
+        self.assertRaises(RuntimeError, tagger.Tagger, ['indicative.non_past.informal.non_polite'])
+
+    def testAssertive(self):
+        analyze = tagger.Tagger().analyze
+        self.assertEqual((('가다',), ('assertive.non_past.formal.non_polite',)), analyze('가겠다'))
+        self.assertEqual((('먹다',), ('assertive.non_past.formal.non_polite',)), analyze('먹겠다'))
+        self.assertEqual((('가다',), ('indicative.past.formal.non_polite',)), analyze('갔다'))
+        self.assertEqual('돕다', analyze('도왔다')[0][0])
+
+    def testFile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'corpus.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.corpus * 50)
+            serial = list(tagger.tag_file(path))
+            parallel = list(tagger.tag_file_parallel(path, processes=2, range_size=1000))
+            empty = os.path.join(directory, 'empty.txt')
+            open(empty, 'w').close()
+            self.assertEqual([], list(tagger.tag_file(empty)))
+            self.assertEqual([], list(tagger.tag_file_parallel(empty)))
+        self.assertEqual(serial, parallel)
+        self.assertEqual(50 * len(list(tagger.Tagger().tag(self.corpus.encode('utf-8')))), len(serial))
+
+
+class TestNormalize(unittest.TestCase):
+    def testNormalize(self):
+        self.assertEqual('먹다', normalize.normalize('먹다'))
+        self.assertEqual('먹었다', normalize.normalize(unicodedata.normalize('NFD', '먹었다')))
+        self.assertEqual('먹다', normalize.normalize('ㅁㅓㄱㄷㅏ'))
+        self.assertEqual('닭다', normalize.normalize('ㄷㅏㄹㄱㄷㅏ'))
+        self.assertEqual('앉다', normalize.normalize('아ㄴㅈ다'))
+        self.assertEqual('가다', normalize.normalize(' 가 다\u200b\n'))
+        for word in ('foo', '다', '먹다1', 'ㅈㅣㅂ', '', None):
+            self.assertRaises(RuntimeError, normalize.normalize, word)
+
+    def testBatch(self):
+        words = ['가다', unicodedata.normalize('NFD', '걷다'), 'ㄱㅏㅂㅅㄷㅏ', 'foo', None, '먹\0다', '\t먹다']
+        self.assertEqual(['가다', '걷다', '값다', None, None, None, '먹다'], normalize.normalize_batch(words))
+        self.assertEqual(['가다', '먹다'], normalize.normalize_batch(['가다', '먹다']))
+        self.assertEqual([], normalize.normalize_batch([]))
+
+    def testNoTrailingForm(self):
+        for letter in ('ㄸ', 'ㅃ', 'ㅉ'):
+            self.assertRaises(RuntimeError, normalize.normalize, f'ㄱㅏ{letter}다')
+            self.assertEqual([None, '먹다'], normalize.normalize_batch([f'ㄱㅏ{letter}다', '먹다']))
+            self.assertEqual([None], normalize.normalize_batch([f'ㅇㅏㄹ{letter}다']))
+        self.assertEqual('가따다', normalize.normalize('ㄱㅏㄸㅏ다'))
+
+    def testJamoLetter(self):
+        self.assertTrue(stem2.is_jamo_letter('ᄀ'))
+        self.assertFalse(stem2.is_jamo_letter('가'))
+        self.assertFalse(stem2.is_jamo_letter(''))
+
+    def testCli(self):
+        output, count = cli.conjugate_chunk([unicodedata.normalize('NFD', '가다') + '\n', 'ㅁㅓㄱㄷㅏ\n', 'x\n'],
+                                            ['indicative.past.formal.polite'], cli.FORMAT_TSV)
+        self.assertEqual(3, count)
+        self.assertEqual('가다\tindicative.past.formal.polite\t갔습니다\n'
+                         '먹다\tindicative.past.formal.polite\t먹었습니다\n'
+                         'x\terror\tx is not a verb or adjective\n', output)
+
+
 if __name__ == '__main__':
     suite = unittest.TestLoader().loadTestsFromTestCase(TestStem1)
     suite = unittest.TestLoader().loadTestsFromTestCase(TestStem2)